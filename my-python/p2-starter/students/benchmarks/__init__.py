@@ -0,0 +1 @@
+"""Synthetic data generators and timings for the weather processing pipeline."""
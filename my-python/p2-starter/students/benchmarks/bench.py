@@ -0,0 +1,186 @@
+"""Times the weather processing pipeline on synthetic data of growing size.
+
+From the students directory:
+
+    python -m benchmarks.bench --sizes 5,1000,100000 --output results.json
+    python -m benchmarks.bench --compare results.json --threshold 0.1
+
+Results are written as JSON. With --compare each timing is checked against a
+stored baseline and the run exits with status 1 if anything got slower by more
+than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.generate import STUDENTS_DIR, iter_forecast_days, write_forecast, write_historical
+from weather.units import convert_all_f_to_c, convert_array_f_to_c
+
+DEFAULT_SIZES = (5, 1000, 10000)
+DEFAULT_THRESHOLD = 0.10
+
+
+def _import_parts():
+    for part in ("part1", "part2", "part3"):
+        path = os.path.normpath(os.path.join(STUDENTS_DIR, part))
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import part1
+    import part3
+    try:
+        import part2
+    except ImportError:
+        #part2 needs numpy, the rest of the suite still runs without it
+        part2 = None
+    return part1, part2, part3
+
+
+def build_cases(size, data_dir):
+    """Generates the input files for one size and returns the cases to time.
+
+    Returns:
+        A list of (benchmark name, function to time) tuples.
+    """
+    part1, part2, part3 = _import_parts()
+    forecast = os.path.join(data_dir, f"forecast_{size}.json")
+    historical = os.path.join(data_dir, f"historical_{size}.json")
+    if not os.path.exists(forecast):
+        write_forecast(forecast, size)
+    if not os.path.exists(historical):
+        write_historical(historical, size)
+
+    dates = [day["Date"] for day in iter_forecast_days(size)]
+    temps = [day["Temperature"]["Minimum"]["Value"] for day in iter_forecast_days(size)]
+    processed = part3.process_weather(historical)
+
+    cases = [
+        ("part1.process_weather", lambda: part1.process_weather(forecast)),
+        ("part3.process_weather", lambda: part3.process_weather(historical)),
+        ("part3.summarise_weather", lambda: part3.summarise_weather(processed)),
+        ("convert_date", lambda: [part1.convert_date(date) for date in dates]),
+        ("convert_f_to_c", lambda: [part1.convert_f_to_c(temp) for temp in temps]),
+        ("convert_all_f_to_c", lambda: convert_all_f_to_c(temps)),
+    ]
+    if part2 is not None:
+        cases.insert(1, ("part2.process_weather", lambda: part2.process_weather(forecast)))
+        cases.append(("convert_array_f_to_c", lambda: convert_array_f_to_c(temps)))
+    return cases
+
+
+def time_case(function, repeat):
+    """Runs function repeat times and returns the wall times in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(sizes, repeat, data_dir, progress=sys.stderr):
+    """Times every benchmark at every size.
+
+    Returns:
+        The results document, ready to be written as JSON.
+    """
+    results = []
+    for size in sizes:
+        for name, function in build_cases(size, data_dir):
+            timings = time_case(function, repeat)
+            best = min(timings)
+            results.append({
+                "name": name,
+                "size": size,
+                "best": best,
+                "mean": sum(timings) / len(timings),
+                "per_record_us": best / size * 1e6,
+                "repeat": repeat,
+            })
+            if progress is not None:
+                print(f"{name:<26} {size:>10} {best * 1000:>12.3f} ms", file=progress, flush=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compares best timings against a baseline results document.
+
+    Args:
+        current: A results document from run.
+        baseline: A results document from an earlier run.
+        threshold: The allowed slowdown, 0.1 meaning 10%.
+    Returns:
+        A list of dictionaries, one per benchmark found in both, with a
+        'regression' flag set on the ones that slowed down past the threshold.
+    """
+    before = {(r["name"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get((result["name"], result["size"]))
+        if old is None:
+            continue
+        ratio = result["best"] / old["best"] if old["best"] else float("inf")
+        rows.append({
+            "name": result["name"],
+            "size": result["size"],
+            "baseline": old["best"],
+            "current": result["best"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the weather processing pipeline.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated record counts (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best is kept")
+    parser.add_argument("--output", help="write the results JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a result counts as a regression (default: %(default)s)")
+    parser.add_argument("--data-dir", help="keep generated input files here and reuse them on later runs")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="weather-bench-")
+    os.makedirs(data_dir, exist_ok=True)
+    try:
+        current = run(sizes, args.repeat, data_dir)
+    finally:
+        if args.data_dir is None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding='utf8') as read_file:
+            baseline = json.load(read_file)
+        current["comparison"] = compare(current, baseline, args.threshold)
+
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding='utf8') as write_file:
+            write_file.write(text + "\n")
+    else:
+        print(text)
+
+    regressions = [row for row in current.get("comparison", []) if row["regression"]]
+    for row in regressions:
+        print(f"REGRESSION {row['name']} size {row['size']}: {row['ratio']:.2f}x the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Writes synthetic AccuWeather files of any size for benchmarking.
+
+Records are built from the real files in part1/data and part3/data, so every
+key the parts read (and all the ones they skip) is present, with the dates,
+temperatures, phrases and observations varied from record to record.
+
+    python -m benchmarks.generate forecast 100000 big_forecast.json
+    python -m benchmarks.generate historical 100000 big_historical.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+STUDENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+FORECAST_TEMPLATE = os.path.join(STUDENTS_DIR, "part1", "data", "forecast_10days.json")
+HISTORICAL_TEMPLATE = os.path.join(STUDENTS_DIR, "part3", "data", "historical_24hours_b.json")
+
+START = datetime(2000, 1, 1, 7, 0, tzinfo=timezone(timedelta(hours=8)))
+
+PHRASES = [
+    "Sunshine mixing with some clouds", "Plenty of sunshine", "Clear", "Mainly clear",
+    "Increasing clouds and breezy; periods of rain late in the afternoon",
+    "A shower; plenty of clouds in the morning, then times of clouds and sun in the afternoon",
+    "Partly cloudy with a shower in spots late", "Cloudy with a thunderstorm",
+]
+WEATHER_TEXTS = [
+    "Sunny", "Clear", "Light rain", "Partly sunny", "Mostly cloudy", "Partly cloudy", "Mist", "Rain", "Cloudy",
+]
+
+
+def _load(path):
+    with open(path, "r", encoding='utf8') as read_file:
+        return json.load(read_file)
+
+
+def _iso(moment):
+    return moment.isoformat()
+
+
+def iter_forecast_days(count, seed=0):
+    """Yields count DailyForecasts dictionaries, one day apart.
+
+    The same dictionary is updated and yielded every time, so serialise each
+    one before asking for the next.
+    """
+    rng = random.Random(seed)
+    day = _load(FORECAST_TEMPLATE)["DailyForecasts"][0]
+    for i in range(count):
+        moment = START + timedelta(days=i)
+        day["Date"] = _iso(moment)
+        day["EpochDate"] = int(moment.timestamp())
+        low = rng.randint(-10, 80)
+        high = low + rng.randint(2, 30)
+        for key, spread in (("Temperature", 0), ("RealFeelTemperature", 6), ("RealFeelTemperatureShade", 3)):
+            day[key]["Minimum"]["Value"] = low - rng.randint(0, spread)
+            day[key]["Maximum"]["Value"] = high + rng.randint(-spread, spread)
+        for half in ("Day", "Night"):
+            day[half]["LongPhrase"] = rng.choice(PHRASES)
+            day[half]["RainProbability"] = rng.randint(0, 100)
+        yield day
+
+
+def iter_observations(count, seed=0):
+    """Yields count historical observation dictionaries an hour apart, newest first.
+
+    The same dictionary is updated and yielded every time, so serialise each
+    one before asking for the next.
+    """
+    rng = random.Random(seed)
+    obj = _load(HISTORICAL_TEMPLATE)[0]
+    latest = START + timedelta(hours=count)
+    for i in range(count):
+        moment = latest - timedelta(hours=i)
+        obj["LocalObservationDateTime"] = _iso(moment)
+        obj["EpochTime"] = int(moment.timestamp())
+        obj["WeatherText"] = rng.choice(WEATHER_TEXTS)
+        obj["IsDayTime"] = 6 <= moment.hour < 18
+        obj["UVIndex"] = rng.randint(0, 11) if obj["IsDayTime"] else 0
+        temp = round(rng.uniform(-5, 40), 1)
+        obj["Temperature"]["Metric"]["Value"] = temp
+        obj["RealFeelTemperature"]["Metric"]["Value"] = round(temp + rng.uniform(-4, 4), 1)
+        obj["PrecipitationSummary"]["Past24Hours"]["Metric"]["Value"] = round(rng.choice([0, 0, 0, rng.uniform(0, 20)]), 1)
+        for group in obj["TemperatureSummary"].values():
+            group["Minimum"]["Metric"]["Value"] = round(temp - rng.uniform(0, 8), 1)
+            group["Maximum"]["Metric"]["Value"] = round(temp + rng.uniform(0, 8), 1)
+        yield obj
+
+
+def write_forecast(path, count, seed=0):
+    """Writes a forecast file with count DailyForecasts, one record at a time."""
+    headline = _load(FORECAST_TEMPLATE)["Headline"]
+    with open(path, "w", encoding='utf8') as write_file:
+        write_file.write('{"Headline": ' + json.dumps(headline) + ', "DailyForecasts": [')
+        for i, day in enumerate(iter_forecast_days(count, seed)):
+            if i:
+                write_file.write(",\n")
+            write_file.write(json.dumps(day))
+        write_file.write("]}\n")
+
+
+def write_historical(path, count, seed=0):
+    """Writes a historical file with count observations, one record at a time."""
+    with open(path, "w", encoding='utf8') as write_file:
+        write_file.write("[")
+        for i, obj in enumerate(iter_observations(count, seed)):
+            if i:
+                write_file.write(",\n")
+            write_file.write(json.dumps(obj))
+        write_file.write("]\n")
+
+
+WRITERS = {"forecast": write_forecast, "historical": write_historical}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic AccuWeather file.")
+    parser.add_argument("kind", choices=sorted(WRITERS))
+    parser.add_argument("count", type=int, help="number of days or observations")
+    parser.add_argument("path", help="file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    WRITERS[args.kind](args.path, args.count, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,22 @@
-import json
-from datetime import datetime
+import argparse
+import os
+import sys
+import time
+
+#part1 is a script (python part1.py from the part1 directory), so put the students
+#directory, which holds the weather package, on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from weather import instrument, units
+from weather.aggregate import ForecastOverview
+from weather.cache import FORECAST
+from weather.compare import compare_stations
+from weather.dates import LONG_DATE_FORMAT, format_date
+from weather.records import ForecastDay, iter_daily_forecasts, iter_forecast_temperatures, iter_records
+from weather.render import iter_file, render
 
 DEGREE_SYBMOL = u"\N{DEGREE SIGN}C"
+#per-day text is kept in memory up to this size before spilling to disk
+SPOOL_SIZE = 1024 * 1024
 
 def format_temperature(temp):
     """Takes a temperature and returns it in string format with the degrees and celcius symbols.
@@ -21,8 +36,7 @@ def convert_date(iso_string):
     Returns:
         A date formatted like: Weekday Date Month Year
     """
-    d = datetime.strptime(iso_string, "%Y-%m-%dT%H:%M:%S%z")
-    return d.strftime('%A %d %B %Y')
+    return format_date(iso_string, LONG_DATE_FORMAT)
 
 
 def convert_f_to_c(temp_in_farenheit):
@@ -33,8 +47,7 @@ def convert_f_to_c(temp_in_farenheit):
     Returns:
         An integer representing a temperature in degrees celcius.
     """
-    tempC = round(((temp_in_farenheit-32)/1.8 ),1)
-    return tempC
+    return units.convert_f_to_c(temp_in_farenheit)
 
 
 def calculate_mean(total, num_items):
@@ -49,83 +62,290 @@ def calculate_mean(total, num_items):
     mean = round(total/num_items,1)
     return mean
 
-def process_weather(forecast_file):
+def iter_days(forecast_file, cache=None):
+    """Reads each day of a forecast file, one day at a time.
+
+    Args:
+        forecast_file: A string representing the file path to a file
+            containing raw weather data.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    Returns:
+        A generator of weather.records.ForecastDay records, with temperatures in celcius.
+    """
+    return iter_records(forecast_file, FORECAST, cache)
+
+
+def format_overview(overview):
+    """Formats the overview block that heads a report.
+
+    Args:
+        overview: A dictionary returned by weather.aggregate.ForecastOverview.result,
+            labelled with formatted dates.
+    Returns:
+        A string containing the overview.
+    """
+    return (f"{overview['Days']} Day Overview\n"
+            f"    The lowest temperature will be {format_temperature(overview['Min'][0])}, and will occur on {overview['Min'][1]}.\n"
+            f"    The highest temperature will be {format_temperature(overview['Max'][0])}, and will occur on {overview['Max'][1]}.\n"
+            f"    The average low this week is {format_temperature(overview['MeanLow'])}.\n"
+            f"    The average high this week is {format_temperature(overview['MeanHigh'])}.\n\n")
+
+
+class ReportSink:
+    """Renders the report one weather.records.ForecastDay at a time.
+
+    The per-day blocks are rendered as the days arrive, alongside the overview,
+    and parked in a spooled temporary file until the overview is ready to go in
+    front of them. Feed it with add and collect the report with result, see
+    weather.pipeline.
+
+    Args:
+        forecast_file: The file the days come from, for error messages.
+    """
+
+    def __init__(self, forecast_file):
+        self.forecast_file = forecast_file
+        self.overview = ForecastOverview()
+        import tempfile
+        self.days = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode="w+", encoding='utf8')
+
+    def add(self, day, date=None):
+        """Renders one day.
+
+        Args:
+            day: A weather.records.ForecastDay.
+            date: The day's date already run through convert_date, if the caller has it.
+        """
+        if date is None:
+            date = convert_date(day.date)
+        minT = day.minimum
+        maxT = day.maximum
+        self.overview.add(minT, maxT, date)
+
+        self.days.write(
+            f"-------- {date} --------\n"
+            f"Minimum Temperature: {format_temperature(minT)}\n"
+            f"Maximum Temperature: {format_temperature(maxT)}\n"
+            f"Daytime: {day.dayPhrase}\n"
+            f"    Chance of rain:  {day.dayRain}%\n"
+            f"Nighttime: {day.nightPhrase}\n"
+            f"    Chance of rain:  {day.nightRain}%\n\n")
+
+    def result(self):
+        """Returns a generator of strings which join up into the report."""
+        overview = self.overview.result()
+        if overview is None:
+            self.days.close()
+            raise ValueError(f"No DailyForecasts found in {self.forecast_file}")
+        instrument.count("part1.records", overview["Days"])
+        return self._chunks(overview)
+
+    def _chunks(self, overview):
+        with self.days:
+            yield format_overview(overview)
+            self.days.seek(0)
+            yield from iter_file(self.days)
+
+
+def iter_weather(forecast_file, cache=None):
+    """Converts raw weather data into meaningful text, one chunk at a time.
+
+    The forecast file is read one day at a time, so memory use stays flat no
+    matter how many days the file holds, see ReportSink. With weather.instrument
+    enabled each stage of every day is timed, see _add_days_timed.
+
+    Args:
+        forecast_file: A string representing the file path to a file
+            containing raw weather data.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    Returns:
+        A generator of strings which join up into the formatted weather data.
+    """
+    report = ReportSink(forecast_file)
+    if instrument.enabled():
+        _add_days_timed(report, forecast_file, cache)
+    else:
+        for day in iter_days(forecast_file, cache):
+            report.add(day)
+    yield from report.result()
+
+
+def _add_days_timed(report, forecast_file, cache=None):
+    """Feeds every day of a forecast file to report, timing each stage separately.
+
+    A span per day would cost more than some of the stages, so each one is
+    timed with perf_counter and recorded once for the whole file:
+
+        part1.decode   reading and checking a DailyForecasts day, or a cached row
+        part1.convert  building the ForecastDay, farenheit to celcius (not cached files)
+        part1.parse    turning the ISO date into the report's long date
+        part1.render   adding the day to the overview and writing its block
+    """
+    if cache is not None:
+        with cache.load(forecast_file, FORECAST) as table:
+            _time_days(report, ForecastDay.from_table(table))
+        return
+    instrument.count("bytes_read", os.path.getsize(forecast_file))
+    with open(forecast_file, "r", encoding='utf8') as read_file:
+        _time_days(report, iter_daily_forecasts(read_file), ForecastDay.from_json)
+
+
+def _time_days(report, records, build=None):
+    clock = time.perf_counter
+    decodeTime = convertTime = parseTime = renderTime = 0.0
+    days = 0
+    records = iter(records)
+    while True:
+        start = clock()
+        try:
+            day = next(records)
+        except StopIteration:
+            decodeTime += clock() - start
+            break
+        decoded = clock()
+        if build is not None:
+            day = build(day)
+        converted = clock()
+        date = convert_date(day.date)
+        parsed = clock()
+        report.add(day, date)
+        rendered = clock()
+        decodeTime += decoded - start
+        convertTime += converted - decoded
+        parseTime += parsed - converted
+        renderTime += rendered - parsed
+        days += 1
+    instrument.record_span("part1.decode", decodeTime, days)
+    if build is not None:
+        instrument.record_span("part1.convert", convertTime, days)
+    instrument.record_span("part1.parse", parseTime, days)
+    instrument.record_span("part1.render", renderTime, days)
+
+
+def write_weather(forecast_file, write_file, cache=None):
+    """Converts raw weather data into meaningful text, streaming it to a file.
+
+    Args:
+        forecast_file: A string representing the file path to a file
+            containing raw weather data.
+        write_file: A text file object the formatted weather data is written to.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    """
+    render(iter_weather(forecast_file, cache), write_file)
+
+
+def process_weather(forecast_file, cache=None):
     """Converts raw weather data into meaningful text.
 
     Args:
         forecast_file: A string representing the file path to a file
             containing raw weather data.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
     Returns:
         A string containing the processed and formatted weather data.
     """
-    output = ""
-    minOfmin = 100
-    maxOfmax = 0
-    sumMin = 0
-    sumMax = 0
-    minLs = []
-    maxLs = []
-    datels = []
+    return render(iter_weather(forecast_file, cache))
 
-    with open(forecast_file, "r", encoding='utf8') as read_file:
-        data = json.load(read_file) #load file
-
-        for t in data['DailyForecasts']:
-            dates = t['Date']
-            datels.append(dates)
-        
-            mn = convert_f_to_c(t['Temperature']['Minimum']['Value'])
-            minLs.append(mn)
-
-            if mn < minOfmin:
-                minOfmin = mn
-                dateMin = convert_date(t['Date'])
-            sumMin = sumMin + mn
-        
-            mx = convert_f_to_c(t['Temperature']['Maximum']['Value'])
-            maxLs.append(mx)
-
-            if mx > maxOfmax:
-                maxOfmax = mx
-                dateMax = convert_date(t['Date'])
-            sumMax = sumMax + mx
-
-        meanLows = calculate_mean(sumMin,len(minLs))
-        meanHighs = calculate_mean(sumMax,len(maxLs))
-
-        output+= (f"{len(datels)} Day Overview\n")
-        output+= (f"    The lowest temperature will be {format_temperature(minOfmin)}, and will occur on {dateMin}.\n")
-        output+= (f"    The highest temperature will be {format_temperature(maxOfmax)}, and will occur on {dateMax}.\n")
-        output+= (f"    The average low this week is {format_temperature(meanLows)}.\n")
-        output+= (f"    The average high this week is {format_temperature(meanHighs)}.\n\n")
-
-
-        for t in data['DailyForecasts']:
-            date = convert_date(t['Date'])
-            minT = convert_f_to_c(t['Temperature']['Minimum']['Value'])
-            maxT = convert_f_to_c(t['Temperature']['Maximum']['Value'])
-
-            output+= (f"-------- {date} --------\n")
-            output+= (f"Minimum Temperature: {format_temperature(minT)}\n")
-            output+= (f"Maximum Temperature: {format_temperature(maxT)}\n")
-            output+= (f"Daytime: {t['Day']['LongPhrase']}\n")
-            output+= (f"    Chance of rain:  {t['Day']['RainProbability']}%\n")
-            output+= (f"Nighttime: {t['Night']['LongPhrase']}\n")
-            output+= (f"    Chance of rain:  {t['Night']['RainProbability']}%\n\n")
-    return output
+def process_overview(forecast_file):
+    """Works out just the overview of a forecast file.
+
+    Only the date and temperature range of each day are decoded, straight out
+    of the memory-mapped file, so the phrases and everything else are never
+    built. The result matches the start of process_weather's report.
+
+    Args:
+        forecast_file: A string representing the file path to a file
+            containing raw weather data.
+    Returns:
+        A string containing the overview.
+    """
+    overview = ForecastOverview()
+    with instrument.span("part1.overview"):
+        for isoDate, minT, maxT in iter_forecast_temperatures(forecast_file):
+            overview.add(minT, maxT, isoDate)
+    result = overview.result()
+    if result is None:
+        raise ValueError(f"No DailyForecasts found in {forecast_file}")
+    #only the two dates that are reported get formatted
+    for key in ("Min", "Max"):
+        result[key][1] = convert_date(result[key][1])
+    return format_overview(result)
+
+def iter_comparison(comparison):
+    """Formats a multi-station comparison as text, one chunk at a time.
+
+    Args:
+        comparison: A dictionary returned by weather.compare.compare_stations.
+    Returns:
+        A generator of strings which join up into the report.
+    """
+    yield f"{len(comparison['Stations'])} Station Comparison\n\n"
+    for station in comparison["Stations"]:
+        yield f"-------- {station['Station']} --------\n"
+        yield format_overview(station)
+    yield "-------- Hottest and coldest stations --------\n"
+    for day in comparison["Days"]:
+        yield (f"{day['Date']}: hottest {day['Hottest'][0]} at {format_temperature(day['Hottest'][1])}, "
+               f"coldest {day['Coldest'][0]} at {format_temperature(day['Coldest'][1])} "
+               f"({day['Stations']} stations)\n")
 
-if __name__ == "__main__":
-    print(process_weather("data/forecast_5days_a.json"))
-    print(process_weather("data/forecast_5days_b.json"))
-    print(process_weather("data/forecast_10days.json"))
 
-with open("forecast_5days_a_output.txt", "w", encoding='utf8') as write_file:
-    write_file.write(process_weather("data/forecast_5days_a.json"))
+def process_stations(forecast_files, workers=None):
+    """Compares the forecasts of many stations in one report.
 
-with open("forecast_5days_b_output.txt", "w", encoding='utf8') as write_file:
-    write_file.write(process_weather("data/forecast_5days_b.json"))
+    Args:
+        forecast_files: A list of forecast JSON file paths, one per station.
+        workers: The number of processes parsing files, None for one per CPU
+            or 0 to parse them all in this process.
+    Returns:
+        A string containing the comparison report.
+    """
+    with instrument.span("part1.compare_stations"):
+        comparison = compare_stations(forecast_files, workers)
+    return render(iter_comparison(comparison))
 
-with open("forecast_5days_10days_output.txt", "w", encoding='utf8') as write_file:
-    write_file.write(process_weather("data/forecast_10days.json"))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+#where the original three forecasts have always been written
+DEFAULT_OUTPUTS = {
+    os.path.join(DATA_DIR, "forecast_5days_a.json"): "forecast_5days_a_output.txt",
+    os.path.join(DATA_DIR, "forecast_5days_b.json"): "forecast_5days_b_output.txt",
+    os.path.join(DATA_DIR, "forecast_10days.json"): "forecast_5days_10days_output.txt",
+}
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert forecast files into readable text reports.")
+    parser.add_argument("forecast_files", nargs="*", default=list(DEFAULT_OUTPUTS),
+                        help="forecast JSON files (default: the three files in data/)")
+    parser.add_argument("--no-write", action="store_true", help="only print the reports")
+    parser.add_argument("--overview", action="store_true",
+                        help="only print each file's overview, decoding just the temperatures")
+    parser.add_argument("--compare", metavar="OUTPUT",
+                        help="write one report comparing every file as a station to OUTPUT instead")
+    parser.add_argument("-j", "--workers", type=int, help="processes parsing files with --compare (0 runs serially)")
+    args = parser.parse_args(argv)
 
+    if args.compare:
+        report = process_stations(args.forecast_files, args.workers)
+        print(report)
+        if not args.no_write:
+            with open(args.compare, "w", encoding='utf8') as write_file:
+                write_file.write(report)
+        return
+
+    if args.overview:
+        for forecast_file in args.forecast_files:
+            print(process_overview(forecast_file))
+        return
+
+    for forecast_file in args.forecast_files:
+        #render once and write the same text to both places
+        report = process_weather(forecast_file)
+        print(report)
+        if not args.no_write:
+            name = os.path.splitext(os.path.basename(forecast_file))[0]
+            output_file = DEFAULT_OUTPUTS.get(os.path.abspath(forecast_file), f"{name}_output.txt")
+            with open(output_file, "w", encoding='utf8') as write_file:
+                write_file.write(report)
+
+if __name__ == "__main__":
+    main()
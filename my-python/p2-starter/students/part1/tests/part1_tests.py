@@ -1,5 +1,23 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
 import unittest
-from part1 import process_weather, convert_f_to_c, calculate_mean
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PART1_DIR = os.path.normpath(os.path.join(TESTS_DIR, os.pardir))
+DATA_DIR = os.path.join(PART1_DIR, "data")
+EXPECTED_DIR = os.path.join(TESTS_DIR, "expected_output")
+
+#part1 is a script rather than a package, so import it from its own directory
+#whether the tests run from part1 or from the students directory
+sys.path.insert(0, PART1_DIR)
+from part1 import process_weather, process_overview, process_stations, write_weather, convert_f_to_c, calculate_mean, iter_weather
+from weather import instrument
+from weather.cache import ParsedCache
+from weather.render import iter_file
 
 
 class Part1Tests(unittest.TestCase):
@@ -9,26 +27,85 @@ class Part1Tests(unittest.TestCase):
         self.maxDiff = None
     
     def test_correct_output_5days_version_a(self):
-        test_data = "data/forecast_5days_a.json"
-        with open('tests/expected_output/forecast_5days_a_output.txt', encoding='utf8') as txt_file:
+        test_data = os.path.join(DATA_DIR, "forecast_5days_a.json")
+        with open(os.path.join(EXPECTED_DIR, 'forecast_5days_a_output.txt'), encoding='utf8') as txt_file:
             expected_string = txt_file.read()
         result_string = process_weather(test_data)
         self.assertEqual(expected_string, result_string)
 
     def test_correct_output_5days_version_b(self):
-        test_data = "data/forecast_5days_b.json"
-        with open('tests/expected_output/forecast_5days_b_output.txt', encoding='utf8') as txt_file:
+        test_data = os.path.join(DATA_DIR, "forecast_5days_b.json")
+        with open(os.path.join(EXPECTED_DIR, 'forecast_5days_b_output.txt'), encoding='utf8') as txt_file:
             expected_string = txt_file.read()
         result_string = process_weather(test_data)
         self.assertEqual(expected_string, result_string)
 
     def test_correct_output_10days(self):
-        test_data = "data/forecast_10days.json"
-        with open('tests/expected_output/forecast_10days_output.txt', encoding='utf8') as txt_file:
+        test_data = os.path.join(DATA_DIR, "forecast_10days.json")
+        with open(os.path.join(EXPECTED_DIR, 'forecast_10days_output.txt'), encoding='utf8') as txt_file:
             expected_string = txt_file.read()
         result_string = process_weather(test_data)
         self.assertEqual(expected_string, result_string)
 
+    def test_write_weather_streams_to_file(self):
+        test_data = os.path.join(DATA_DIR, "forecast_10days.json")
+        with open(os.path.join(EXPECTED_DIR, 'forecast_10days_output.txt'), encoding='utf8') as txt_file:
+            expected_string = txt_file.read()
+        write_file = io.StringIO()
+        write_weather(test_data, write_file)
+        self.assertEqual(expected_string, write_file.getvalue())
+
+    def test_report_is_rendered_in_chunks(self):
+        test_data = os.path.join(DATA_DIR, "forecast_10days.json")
+        with open(os.path.join(EXPECTED_DIR, 'forecast_10days_output.txt'), encoding='utf8') as txt_file:
+            expected_string = txt_file.read()
+        chunks = list(iter_weather(test_data))
+        self.assertEqual(expected_string, "".join(chunks))
+        self.assertEqual(expected_string.split("\n\n")[0] + "\n\n", chunks[0])
+
+    def test_report_spilled_to_disk_is_unchanged(self):
+        test_data = os.path.join(DATA_DIR, "forecast_10days.json")
+        with open(os.path.join(EXPECTED_DIR, 'forecast_10days_output.txt'), encoding='utf8') as txt_file:
+            expected_string = txt_file.read()
+        #a few bytes of memory, so the per-day blocks go through a real file
+        with mock.patch("part1.SPOOL_SIZE", 16), mock.patch("part1.iter_file", wraps=iter_file) as reads:
+            self.assertEqual(expected_string, process_weather(test_data))
+        self.assertTrue(reads.call_args[0][0]._rolled)
+
+    def test_instrumented_report_times_each_stage(self):
+        test_data = os.path.join(DATA_DIR, "forecast_10days.json")
+        expected_string = process_weather(test_data)
+        days = int(expected_string.split(" Day Overview")[0])
+        self.addCleanup(instrument.reset)
+        self.addCleanup(instrument.disable)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = ParsedCache(directory)
+        #cached days are already in celcius, so there is nothing to convert
+        for cached, stages in ((None, ["part1.convert", "part1.decode", "part1.parse", "part1.render"]),
+                               (cache, ["part1.decode", "part1.parse", "part1.render"]),
+                               (cache, ["part1.decode", "part1.parse", "part1.render"])):
+            instrument.reset()
+            instrument.enable()
+            self.assertEqual(expected_string, process_weather(test_data, cached))
+            spans = instrument.snapshot()["spans"]
+            self.assertEqual(stages, sorted(spans))
+            self.assertEqual([days] * len(stages), [spans[name]["calls"] for name in stages])
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_compare_stations_repeats_each_overview(self):
+        test_data = [os.path.join(DATA_DIR, "forecast_5days_a.json"), os.path.join(DATA_DIR, "forecast_5days_b.json"), os.path.join(DATA_DIR, "forecast_10days.json")]
+        report = process_stations(test_data, workers=0)
+        for forecast_file in test_data:
+            overview = process_weather(forecast_file).split("\n\n")[0]
+            self.assertIn(overview, report)
+        self.assertIn("Monday 22 June 2020: hottest forecast_5days_a at 22.2", report)
+
+    def test_overview_matches_full_report(self):
+        for test_data in [os.path.join(DATA_DIR, "forecast_5days_a.json"), os.path.join(DATA_DIR, "forecast_5days_b.json"), os.path.join(DATA_DIR, "forecast_10days.json")]:
+            overview = process_weather(test_data).split("\n\n")[0] + "\n\n"
+            self.assertEqual(overview, process_overview(test_data))
+
     def test_convert_f_to_c(self):
         self.assertEqual(convert_f_to_c(50), 10)
         self.assertEqual(convert_f_to_c(45), 7.2)
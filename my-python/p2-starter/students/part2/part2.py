@@ -1,7 +1,17 @@
-import json
-#import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+import argparse
+import os
+import sys
+
+#part2 is a script (python part2.py from the part2 directory), so put the students
+#directory, which holds the weather package, on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from weather import instrument, units
+from weather.cache import FORECAST
+from weather.dates import SHORT_DATE_FORMAT, format_date
+from weather.downsample import DEFAULT_TARGET, downsample
+from weather.plotting import FigureTemplate, axis_titles, export_figures, to_figure
+from weather.records import iter_daily_forecasts
+from weather.table import ForecastTable
 
 #data extract
 def convert_f_to_c(temp_in_farenheit):
@@ -12,8 +22,7 @@ def convert_f_to_c(temp_in_farenheit):
     Returns:
         An integer representing a temperature in degrees celcius.
     """
-    tempC = round(((temp_in_farenheit-32)/1.8 ),1)
-    return tempC
+    return units.convert_f_to_c(temp_in_farenheit)
 
 def convert_date(iso_string):
     """Converts and ISO formatted date into a human readable format.
@@ -23,125 +32,130 @@ def convert_date(iso_string):
     Returns:
         A date formatted like: Weekday Date Month Year
     """
-    d = datetime.strptime(iso_string, "%Y-%m-%dT%H:%M:%S%z")
-    return d.strftime('%d %B %Y')
+    return format_date(iso_string, SHORT_DATE_FORMAT)
 
-def process_weather(forecast_file):
-    """Converts raw weather data into meaningful text.
+def load_forecast_table(forecast_file, cache=None):
+    """Reads raw weather data into a columnar ForecastTable.
 
     Args:
         forecast_file: A string representing the file path to a file
             containing raw weather data.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
     Returns:
-        A string containing the processed and formatted weather data.
+        A ForecastTable holding the dates and celcius temperatures.
     """
-    output = {}
-    minLs = []
-    maxLs = []
-    datels = []
-    rlminLs = []
-    rlmaxLs = []
-    rlminLssh = []
-    rlmaxLssh = []
-
-    with open(forecast_file, "r", encoding='utf8') as read_file:
-        data = json.load(read_file) #load file
-
-        for t in data['DailyForecasts']:
-            dates = convert_date(t['Date'])
-            datels.append(dates)
-        
-            mn = convert_f_to_c(t['Temperature']['Minimum']['Value'])
-            minLs.append(mn)
-        
-            mx = convert_f_to_c(t['Temperature']['Maximum']['Value'])
-            maxLs.append(mx)
-
-            mnrl = convert_f_to_c(t['RealFeelTemperature']['Minimum']['Value'])
-            rlminLs.append(mnrl)
-        
-            mxrl = convert_f_to_c(t['RealFeelTemperature']['Maximum']['Value'])
-            rlmaxLs.append(mxrl)
-
-            mnrlsh = convert_f_to_c(t['RealFeelTemperatureShade']['Minimum']['Value'])
-            rlminLssh.append(mnrlsh)
-        
-            mxrlsh = convert_f_to_c(t['RealFeelTemperatureShade']['Maximum']['Value'])
-            rlmaxLssh.append(mxrlsh)
-        
-        output = {
-            "Dates": datels,
-            "Mins": minLs,
-            "Max": maxLs,
-            "RealFeelTemperatureMins": rlminLs,
-            "RealFeelTemperatureMax": rlmaxLs,
-            "RealFeelTemperatureShadeMins": rlminLssh,
-            "RealFeelTemperatureShadeMax": rlmaxLssh
-        }
-        #print(type(output))
-
-    return output
+    if cache is not None:
+        with instrument.span("part2.cache_load"), cache.load(forecast_file, FORECAST) as columns:
+            table = ForecastTable.from_columns(columns)
+    else:
+        instrument.count("bytes_read", os.path.getsize(forecast_file))
+        #keep the farenheit values as read and convert each whole column at once
+        with instrument.span("part2.parse_and_convert"), open(forecast_file, "r", encoding='utf8') as read_file:
+            table = ForecastTable.from_forecasts(iter_daily_forecasts(read_file))
+    instrument.count("part2.records", len(table))
+    return table
 
-if __name__ == "__main__":
-    print(process_weather("data/forecast_5days_a.json"))
-    print(process_weather("data/forecast_5days_b.json"))
-    print(process_weather("data/forecast_10days.json"))
+def process_weather(forecast_file, cache=None):
+    """Converts raw weather data into meaningful text.
 
+    Args:
+        forecast_file: A string representing the file path to a file
+            containing raw weather data.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    Returns:
+        A dictionary of lists with the dates and each daily temperature series.
+    """
+    table = load_forecast_table(forecast_file, cache)
+    with instrument.span("part2.to_dict"):
+        return table.to_dict()
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+FORECAST_FILES = [
+    os.path.join(DATA_DIR, "forecast_5days_a.json"),
+    os.path.join(DATA_DIR, "forecast_5days_b.json"),
+    os.path.join(DATA_DIR, "forecast_10days.json"),
+]
 
 #plotting
-df1 = process_weather("data/forecast_5days_a.json")
-fig1 = go.Figure()
-fig1.add_trace(go.Scatter(x=df1['Dates'], y=df1['Mins'], name='Daily Minimums',
-                         line=dict(color='royalblue', width=4)))
-fig1.add_trace(go.Scatter(x=df1['Dates'], y=df1['Max'], name = 'Daily Maximums',
-                         line=dict(color='firebrick', width=4)))
-fig1.add_trace(go.Scatter(x=df1['Dates'], y=df1['RealFeelTemperatureMins'], name = 'Real Feel Minimums',
-                         line=dict(color='royalblue', width=4, dash = 'dash')))
-fig1.add_trace(go.Scatter(x=df1['Dates'], y=df1['RealFeelTemperatureMax'], name = 'Real Feel Maximums',
-                         line=dict(color='firebrick', width=4, dash = 'dash')))
-fig1.add_trace(go.Scatter(x=df1['Dates'], y=df1['RealFeelTemperatureShadeMins'], name = 'Real Feel Shade Minimums',
-                         line=dict(color='royalblue', width=4, dash = 'dot')))
-fig1.add_trace(go.Scatter(x=df1['Dates'], y=df1['RealFeelTemperatureShadeMax'], name = 'Real Feel Shade Maximums',
-                         line=dict(color='firebrick', width=4, dash = 'dot')))
-fig1.update_layout(title='Daily Minimum and Maximum Temperature',
-                   xaxis_title='Date',
-                   yaxis_title='Temperature (°C)')                         
-fig1.show()
-
-df2 = process_weather("data/forecast_5days_b.json")
-fig2 = go.Figure()
-fig2.add_trace(go.Scatter(x=df2['Dates'], y=df2['Mins'], name='Daily Minimums',
-                         line=dict(color='royalblue', width=4)))
-fig2.add_trace(go.Scatter(x=df2['Dates'], y=df2['Max'], name = 'Daily Maximums',
-                         line=dict(color='firebrick', width=4)))
-fig2.add_trace(go.Scatter(x=df2['Dates'], y=df2['RealFeelTemperatureMins'], name = 'Real Feel Minimums',
-                         line=dict(color='royalblue', width=4, dash = 'dash')))
-fig2.add_trace(go.Scatter(x=df2['Dates'], y=df2['RealFeelTemperatureMax'], name = 'Real Feel Maximums',
-                         line=dict(color='firebrick', width=4, dash = 'dash')))
-fig2.add_trace(go.Scatter(x=df2['Dates'], y=df2['RealFeelTemperatureShadeMins'], name = 'Real Feel Shade Minimums',
-                         line=dict(color='royalblue', width=4, dash = 'dot')))
-fig2.add_trace(go.Scatter(x=df2['Dates'], y=df2['RealFeelTemperatureShadeMax'], name = 'Real Feel Shade Maximums',
-                         line=dict(color='firebrick', width=4, dash = 'dot')))
-fig2.update_layout(title='Daily Minimum and Maximum Temperature',
-                   xaxis_title='Date',
-                   yaxis_title='Temperature (°C)')                         
-fig2.show()
-
-df3 = process_weather("data/forecast_10days.json")
-fig3 = go.Figure()
-fig3.add_trace(go.Scatter(x=df3['Dates'], y=df3['Mins'], name='Daily Minimums',
-                         line=dict(color='royalblue', width=4)))
-fig3.add_trace(go.Scatter(x=df3['Dates'], y=df3['Max'], name = 'Daily Maximums',
-                         line=dict(color='firebrick', width=4)))
-fig3.add_trace(go.Scatter(x=df3['Dates'], y=df3['RealFeelTemperatureMins'], name = 'Real Feel Minimums',
-                         line=dict(color='royalblue', width=4, dash = 'dash')))
-fig3.add_trace(go.Scatter(x=df3['Dates'], y=df3['RealFeelTemperatureMax'], name = 'Real Feel Maximums',
-                         line=dict(color='firebrick', width=4, dash = 'dash')))
-fig3.add_trace(go.Scatter(x=df3['Dates'], y=df3['RealFeelTemperatureShadeMins'], name = 'Real Feel Shade Minimums',
-                         line=dict(color='royalblue', width=4, dash = 'dot')))
-fig3.add_trace(go.Scatter(x=df3['Dates'], y=df3['RealFeelTemperatureShadeMax'], name = 'Real Feel Shade Maximums',
-                         line=dict(color='firebrick', width=4, dash = 'dot')))
-fig3.update_layout(title='Daily Minimum and Maximum Temperature',
-                   xaxis_title='Date',
-                   yaxis_title='Temperature (°C)')                         
-fig3.show()
+def _forecast_trace(column, name, color, dash=None):
+    line = dict(color=color, width=4)
+    if dash:
+        line["dash"] = dash
+    return dict(type="scatter", x="Dates", y=column, name=name, line=line)
+
+FORECAST_TEMPLATE = FigureTemplate(
+    [
+        _forecast_trace("Mins", "Daily Minimums", "royalblue"),
+        _forecast_trace("Max", "Daily Maximums", "firebrick"),
+        _forecast_trace("RealFeelTemperatureMins", "Real Feel Minimums", "royalblue", "dash"),
+        _forecast_trace("RealFeelTemperatureMax", "Real Feel Maximums", "firebrick", "dash"),
+        _forecast_trace("RealFeelTemperatureShadeMins", "Real Feel Shade Minimums", "royalblue", "dot"),
+        _forecast_trace("RealFeelTemperatureShadeMax", "Real Feel Shade Maximums", "firebrick", "dot"),
+    ],
+    'Daily Minimum and Maximum Temperature',
+    axis_titles('Date', 'Temperature (°C)'))
+
+def plot_forecast(process_dict, show=True, max_points=None):
+    """Plots the daily minimum and maximum temperature series.
+
+    Args:
+        process_dict: A dictionary of lists returned by process_weather.
+        show: Whether to open the figure once it is built.
+        max_points: If set, long series are thinned out to about this many
+            days, keeping the extremes of every series.
+    Returns:
+        The plotly Figure.
+    """
+    if max_points:
+        with instrument.span("part2.downsample"):
+            process_dict = downsample(process_dict, max_points)
+    with instrument.span("part2.plot"):
+        fig = to_figure(FORECAST_TEMPLATE.spec(process_dict))
+        if show:
+            fig.show()
+    return fig
+
+def export_forecasts(forecast_files, directory, formats=("html",), cache=None, max_points=None):
+    """Writes the forecast chart of every file without opening a browser.
+
+    Args:
+        forecast_files: A list of forecast JSON file paths.
+        directory: The directory the charts are written to.
+        formats: Any of 'html', 'json' and 'svg'.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+        max_points: If set, long series are thinned out to about this many days.
+    Returns:
+        The list of paths written.
+    """
+    def figures():
+        for forecast_file in forecast_files:
+            process_dict = process_weather(forecast_file, cache)
+            if max_points:
+                process_dict = downsample(process_dict, max_points)
+            yield os.path.splitext(os.path.basename(forecast_file))[0], FORECAST_TEMPLATE.spec(process_dict)
+    return export_figures(figures(), directory, formats)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract and plot daily temperatures from forecast files.")
+    parser.add_argument("forecast_files", nargs="*", default=FORECAST_FILES,
+                        help="forecast JSON files (default: the three files in data/)")
+    parser.add_argument("--no-plot", action="store_true", help="only print the extracted data")
+    parser.add_argument("--export", metavar="DIR", help="write the charts to DIR instead of showing them")
+    parser.add_argument("--formats", default="html",
+                        help="comma separated export formats out of html, json and svg (default: %(default)s)")
+    parser.add_argument("--max-points", type=int,
+                        help=f"thin long series down to about this many days when plotting, eg. {DEFAULT_TARGET}")
+    args = parser.parse_args(argv)
+
+    if args.export:
+        export_forecasts(args.forecast_files, args.export, args.formats.split(","), max_points=args.max_points)
+        return
+
+    for forecast_file in args.forecast_files:
+        df = process_weather(forecast_file)
+        print(df)
+        if not args.no_plot:
+            plot_forecast(df, max_points=args.max_points)
+
+if __name__ == "__main__":
+    main()
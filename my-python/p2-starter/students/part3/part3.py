@@ -1,6 +1,21 @@
-import json
-import plotly.graph_objects as go
-from datetime import datetime
+import argparse
+import itertools
+import os
+import sys
+
+#part3 is a script (python part3.py from the part3 directory), so put the students
+#directory, which holds the weather package, on the path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from weather import instrument
+from weather.aggregate import HistoricalSummary
+from weather.cache import HISTORICAL
+from weather.dates import SHORT_DATE_FORMAT, format_date
+from weather.ingest import DEFAULT_CONCURRENCY, summarise_historical
+from weather.ooc import BOX_STATS, DEFAULT_CHUNK_SIZE, OLDEST, ChunkedSummary
+from weather.plotting import FigureTemplate, axis_titles, export_figures, to_figure
+from weather.pipeline import feed
+from weather.records import Observation, iter_records
+from weather.render import render
 
 DEGREE_SYBMOL = u"\N{DEGREE SIGN}C"
 
@@ -13,106 +28,93 @@ def convert_date(iso_string):
     Returns:
         A date formatted like: Weekday Date Month Year
     """
-    d = datetime.strptime(iso_string, "%Y-%m-%dT%H:%M:%S%z")
-    return d.strftime('%d %B %Y')
+    return format_date(iso_string, SHORT_DATE_FORMAT)
 
-def process_weather(forecast_file):
+def period_name(historical_file):
+    """Returns the period a historical file covers from its name, eg. "6hours" from data/historical_6hours.json."""
+    strfile = os.path.splitext(os.path.basename(historical_file))[0]
+    if "_" in strfile:
+        strfile = strfile.split("_")[1]
+    return strfile
+
+def process_weather(forecast_file, cache=None, chunk_size=None, spill=None):
     """Converts raw weather data into structured dictionary.
     Args:
         forecast_file: A string representing the file path to a file
             containing raw weather data.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+        chunk_size: If set, aggregate this many observations at a time so
+            memory does not grow with the file, see weather.ooc.ChunkedSummary.
+        spill: An optional directory the per-observation series are written to
+            in chunked mode. It implies chunk_size if that is not set.
     Returns:
-        A dictionary containing the processed and formatted weather data.
+        A dictionary containing the processed and formatted weather data,
+        see weather.aggregate.HistoricalSummary for what each key holds, or
+        weather.ooc.ChunkedSummary in chunked mode.
+    """
+    if chunk_size or spill:
+        summary = ChunkedSummary(period_name(forecast_file), chunk_size or DEFAULT_CHUNK_SIZE, spill)
+    else:
+        summary = HistoricalSummary(period_name(forecast_file))
+    if cache is not None:
+        with cache.load(forecast_file, HISTORICAL) as table, instrument.span("part3.aggregate"):
+            feed(Observation.from_table(table), [summary])
+            instrument.count("part3.records", len(table))
+        return summary.result()
+
+    with instrument.span("part3.parse_and_aggregate"):
+        numRecords = feed(iter_records(forecast_file, HISTORICAL), [summary])
+    instrument.count("part3.records", numRecords)
+    return summary.result()
+
+def process_weather_files(historical_files, name, concurrency=DEFAULT_CONCURRENCY, chunk_size=None, spill=None):
+    """Summarises many historical files as one period, reading them concurrently.
+    Args:
+        historical_files: A list of historical JSON file paths.
+        name: The period name reported as 'File'.
+        concurrency: How many files may be read at the same time.
+        chunk_size: If set, read the files one after another instead, this many
+            observations at a time, see process_weather.
+        spill: An optional directory for the per-observation series in chunked mode.
+    Returns:
+        A dictionary shaped like the process_weather one, covering every observation.
+        'Date' is the date of the oldest observation.
+    """
+    if not (chunk_size or spill):
+        import asyncio
+        return asyncio.run(summarise_historical(historical_files, name, concurrency))
+    summary = ChunkedSummary(name, chunk_size or DEFAULT_CHUNK_SIZE, spill, date=OLDEST)
+    records = itertools.chain.from_iterable(iter_records(path, HISTORICAL) for path in historical_files)
+    with instrument.span("part3.parse_and_aggregate"):
+        numRecords = feed(records, [summary])
+    instrument.count("part3.records", numRecords)
+    return summary.result()
+
+def iter_summary(process_dict):
+    """Summarise the dictionary of data into meaningful text, one line at a time.
+    Args:
+        process_dict: A dictionary of data extracted and formatted with process_weather function.
+    Returns:
+        A generator of strings which join up into the summary.
+    """
+    yield f"----------------------------- {process_dict['Date']} -----------------------------\n"
+    yield f"------------------- Summary for the past {process_dict['File']} ------------------- \n"
+    yield f"Minimum temperature of {process_dict['MinsGroup'][1]}{DEGREE_SYBMOL} occurred in the {process_dict['MinsGroup'][0]}. \n"
+    yield f"Maximum temperature of {process_dict['MaxGroup'][1]}{DEGREE_SYBMOL} occurred in the {process_dict['MaxGroup'][0]}. \n"
+    yield f"The amount of precipitation that fell in the past {process_dict['File']} is {process_dict['Rain24mm']} mm. \n"
+    yield f"The number of daylight hours in the past {process_dict['File']} is {process_dict['DaylightHour']} hours. \n"
+    yield f"The maximum UV index for the past {process_dict['File']} is {process_dict['MaxUV']}. \n"
+    yield "\n"
+    yield "------------------------------- (>^.^)>^ -------------------------------\n"
+
+def write_summary(process_dict, write_file):
+    """Writes the summary of the dictionary of data straight to a file.
+    Args:
+        process_dict: A dictionary of data extracted and formatted with process_weather function.
+        write_file: A text file object the summary is written to.
     """
-    #get filename str
-    strfile = str(forecast_file.split("_")[1])
-    strfile = strfile.split(".")[0]
-
-    #declare variables
-    output = {}
-    temp = {}
-    wt = []
-    dates = []
-    overallTs = []
-    overallRFTs = []
-    temps = []
-    minOfmin = 100
-    maxOfmax = 0
-    minLs = []
-    maxLs = []
-    sumRain24 = 0
-    daytimeCount = 0
-    maxOfuv = 0
-
-    #extract data
-    with open(forecast_file, "r", encoding='utf8') as read_file:
-        data = json.load(read_file) #load file
-        for obj in data:
-            date = convert_date(obj["LocalObservationDateTime"])
-
-            overallT = obj["Temperature"]
-            for key,value in overallT.items():
-                overallTs.append(overallT["Metric"]["Value"])
-            
-            overallRFT = obj["RealFeelTemperature"]
-            for key,value in overallRFT.items():
-                overallRFTs.append(overallRFT["Metric"]["Value"])
-            wt.append(obj["WeatherText"])
-        
-        lr = wt.count('Light rain')
-        s = wt.count('Sunny')
-
-        for t in data:
-            temp = t["TemperatureSummary"]
-            for key,value in temp.items():
-                for k,v in value.items():
-                    mn = value["Minimum"]["Metric"]["Value"]
-                    if mn < minOfmin:
-                        minOfmin = mn
-                        groupMin = key
-                    minLs.append(mn)
-
-                    mx = value["Maximum"]["Metric"]["Value"]
-                    if mx > maxOfmax:
-                        maxOfmax = mx
-                        groupMax = key
-                    maxLs.append(mx)
-                    
-                    for i,j in v.items():
-                        tmp = v["Metric"]["Value"]
-                        temps.append(tmp)
-        for p in data:
-            precip = p["PrecipitationSummary"]
-            for key,value in precip.items():
-                rain24 = precip["Past24Hours"]["Metric"]["Value"]
-                sumRain24 = sumRain24 + rain24
-
-        for d in data:
-            daytime = d["IsDayTime"]
-            if(daytime == True):
-                daytimeCount = daytimeCount + 1
-        
-        for u in data:
-            uv = u["UVIndex"]
-            if uv > maxOfuv:
-                maxOfuv = uv
-
-        output = {
-            "File": strfile,
-            "Date": date,
-            "DaylightHour": daytimeCount,
-            "MaxUV": maxOfuv,
-            "MinsGroup": [groupMin, minOfmin],
-            "MaxGroup": [groupMax, maxOfmax],
-            "Rain24mm": sumRain24,
-            "overallTs": overallTs,
-            "overallRFTs": overallRFTs,
-            "Mins": minLs,
-            "Maxs": maxLs,
-            "WeatherText": ['Light rain','Sunny'],
-            "WeatherFreq": [lr,s]
-        }
-    return output
+    with instrument.span("part3.render"):
+        render(iter_summary(process_dict), write_file)
 
 def summarise_weather(process_dict):
     """Summarise the dictionary of data into meaningful text.
@@ -121,57 +123,121 @@ def summarise_weather(process_dict):
     Returns:
         A meaningful summary on the data dictionary.
     """
-    #declare
-    summary = ""
-
-    mingroup = process_dict['MinsGroup'][0]
-    maxgroup = process_dict['MaxGroup'][0]
-
-    #summarise
-    summary += (f"----------------------------- {process_dict['Date']} -----------------------------\n")
-    summary += (f"------------------- Summary for the past {process_dict['File']} ------------------- \n")
-    summary += (f"Minimum temperature of {process_dict['MinsGroup'][1]}{DEGREE_SYBMOL} occurred in the {process_dict['MinsGroup'][0]}. \n")
-    summary += (f"Maximum temperature of {process_dict['MaxGroup'][1]}{DEGREE_SYBMOL} occurred in the {process_dict['MaxGroup'][0]}. \n")
-    summary += (f"The amount of precipitation that fell in the past {process_dict['File']} is {process_dict['Rain24mm']} mm. \n")
-    summary += (f"The number of daylight hours in the past {process_dict['File']} is {process_dict['DaylightHour']} hours. \n")
-    summary += (f"The maximum UV index for the past {process_dict['File']} is {process_dict['MaxUV']}. \n")
-    summary += ("\n")
-    summary += (f"------------------------------- (>^.^)>^ -------------------------------\n")
-
-    return summary
-
-
-# if __name__ == "__main__":
-#     print(process_weather("data/historical_24hours_a.json"))
-
-def plot_weather(process_dict):
-    #plotting
-    #boxplot
-    fig1a = go.Figure()
-    fig1a.add_trace(go.Box(y=process_dict['overallTs'], name = "Temperature"))
-    fig1a.add_trace(go.Box(y=process_dict['overallRFTs'], name = "Real Feel Temperature"))
-    fig1a.update_layout(title=f"Boxplot comparison of Temperature and Real Feel Temperature on {process_dict['Date']} for the past {process_dict['File']}",
-                   xaxis_title='Variable',
-                   yaxis_title='Temperature (°C)')        
-    fig1a.show()
-
-    #bar graph
-    fig1b = go.Figure()
-    fig1b.add_trace(go.Bar(x = process_dict['WeatherText'], y=process_dict['WeatherFreq'], name = "Weather"))
-    fig1b.update_layout(title=f"Frequency comparison of WeatherText on {process_dict['Date']} for the past {process_dict['File']}",
-                   xaxis_title='WeatherText Category',
-                   yaxis_title='Count')        
-    fig1b.show()
-
-
-with open("historical_6hours_summary.txt", "w", encoding='utf8') as write_file:
-    write_file.write(summarise_weather(process_weather("data/historical_6hours.json")))
-plot_weather(process_weather("data/historical_6hours.json"))
-
-with open("historical_24hours_a_summary.txt", "w", encoding='utf8') as write_file:
-    write_file.write(summarise_weather(process_weather("data/historical_24hours_a.json")))
-plot_weather(process_weather("data/historical_24hours_a.json"))
-
-with open("historical_24hours_b_summary.txt", "w", encoding='utf8') as write_file:
-    write_file.write(summarise_weather(process_weather("data/historical_24hours_b.json")))
-plot_weather(process_weather("data/historical_24hours_b.json"))
+    with instrument.span("part3.render"):
+        return render(iter_summary(process_dict))
+
+
+BOX_TEMPLATE = FigureTemplate(
+    [
+        dict(type="box", y="overallTs", name="Temperature"),
+        dict(type="box", y="overallRFTs", name="Real Feel Temperature"),
+    ],
+    "Boxplot comparison of Temperature and Real Feel Temperature on {Date} for the past {File}",
+    axis_titles('Variable', 'Temperature (°C)'))
+
+#the same box plot drawn from the statistics a chunked summary keeps instead of every value
+BOX_STATS_TEMPLATE = FigureTemplate(
+    [
+        dict(type="box", stats=BOX_STATS["overallTs"], name="Temperature"),
+        dict(type="box", stats=BOX_STATS["overallRFTs"], name="Real Feel Temperature"),
+    ],
+    BOX_TEMPLATE.title,
+    BOX_TEMPLATE.layout)
+
+def box_template(process_dict):
+    """Returns the box plot template for a process_weather dictionary, chunked or not."""
+    return BOX_STATS_TEMPLATE if BOX_STATS["overallTs"] in process_dict else BOX_TEMPLATE
+
+BAR_TEMPLATE = FigureTemplate(
+    [dict(type="bar", x="WeatherText", y="WeatherFreq", name="Weather")],
+    "Frequency comparison of WeatherText on {Date} for the past {File}",
+    axis_titles('WeatherText Category', 'Count'))
+
+def plot_weather(process_dict, show=True):
+    """Plots a box plot of the temperatures and a bar chart of the weather text.
+    Args:
+        process_dict: A dictionary of data extracted and formatted with process_weather function.
+        show: Whether to open the figures once they are built.
+    Returns:
+        A tuple of the box plot and bar chart Figures.
+    """
+    with instrument.span("part3.plot"):
+        fig1a = to_figure(box_template(process_dict).spec(process_dict))
+        fig1b = to_figure(BAR_TEMPLATE.spec(process_dict))
+        if show:
+            fig1a.show()
+            fig1b.show()
+    return fig1a, fig1b
+
+def iter_figures(name, process_dict):
+    """Yields the (NAME_box, spec) and (NAME_bar, spec) figures for weather.plotting.export_figures."""
+    yield f"{name}_box", box_template(process_dict).spec(process_dict)
+    yield f"{name}_bar", BAR_TEMPLATE.spec(process_dict)
+
+def export_plots(historical_files, directory, formats=("html",), cache=None):
+    """Writes the box plot and bar chart of every file without opening a browser.
+    Args:
+        historical_files: A list of historical JSON file paths.
+        directory: The directory the charts are written to, as NAME_box and NAME_bar.
+        formats: Any of 'html', 'json' and 'svg'.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    Returns:
+        The list of paths written.
+    """
+    figures = (figure for historical_file in historical_files
+               for figure in iter_figures(os.path.splitext(os.path.basename(historical_file))[0],
+                                          process_weather(historical_file, cache)))
+    return export_figures(figures, directory, formats)
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+HISTORICAL_FILES = [
+    os.path.join(DATA_DIR, "historical_6hours.json"),
+    os.path.join(DATA_DIR, "historical_24hours_a.json"),
+    os.path.join(DATA_DIR, "historical_24hours_b.json"),
+]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise and plot historical weather files.")
+    parser.add_argument("historical_files", nargs="*", default=HISTORICAL_FILES,
+                        help="historical JSON files (default: the three files in data/)")
+    parser.add_argument("--no-plot", action="store_true", help="only write the summary files")
+    parser.add_argument("--combine", metavar="NAME",
+                        help="read every file concurrently into one summary written to NAME_summary.txt")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="files read at the same time with --combine (default: %(default)s)")
+    parser.add_argument("--export", metavar="DIR", help="write the charts to DIR instead of showing them")
+    parser.add_argument("--formats", default="html",
+                        help="comma separated export formats out of html, json and svg (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, metavar="N",
+                        help=f"aggregate N observations at a time so memory stays flat on huge archives, eg. {DEFAULT_CHUNK_SIZE}")
+    parser.add_argument("--spill", metavar="DIR",
+                        help="with --chunk-size, also write the per-observation temperature series to DIR")
+    args = parser.parse_args(argv)
+
+    if args.combine:
+        jobs = [(args.combine, lambda: process_weather_files(args.historical_files, args.combine, args.concurrency,
+                                                             args.chunk_size, args.spill))]
+    else:
+        jobs = [(os.path.splitext(os.path.basename(path))[0],
+                 lambda path=path: process_weather(path, chunk_size=args.chunk_size, spill=args.spill))
+                for path in args.historical_files]
+
+    def summarise_all():
+        for name, process in jobs:
+            process_dict = process()
+            with open(f"{name}_summary.txt", "w", encoding='utf8') as write_file:
+                write_summary(process_dict, write_file)
+            yield name, process_dict
+
+    if args.export:
+        figures = (figure for name, process_dict in summarise_all() for figure in iter_figures(name, process_dict))
+        export_figures(figures, args.export, args.formats.split(","))
+        return
+    for name, process_dict in summarise_all():
+        if not args.no_plot:
+            plot_weather(process_dict)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared helpers for the part1, part2 and part3 weather scripts."""
@@ -0,0 +1,247 @@
+"""Single-pass summaries of forecast days and historical observations.
+
+ForecastOverview works out part1's overview and HistoricalSummary every part3
+metric. Both take one record at a time, so a record can be dropped as soon as
+it has been added. The trackers they are built from (MinWithLabel, Max, Sum,
+...) can also merge, which weather.ooc uses to combine the summaries of
+separate chunks of a file.
+
+HistoricalSummary lists every WeatherText it sees in WeatherText and
+WeatherFreq, most frequent first. part3 used to report only 'Light rain' and
+'Sunny', so its WeatherText chart now has a bar per category.
+"""
+from weather.categorical import CategoricalColumn
+from weather.dates import SHORT_DATE_FORMAT, format_date
+from weather.records import Observation
+
+#(result key, frequency key, Observation attribute) of each categorical field
+CATEGORICAL_FIELDS = (
+    ("WeatherText", "WeatherFreq", "text"),
+    ("WeatherIcon", "WeatherIconFreq", "icon"),
+    ("PrecipitationType", "PrecipitationFreq", "precipitationType"),
+)
+
+
+class MinWithLabel:
+    """Tracks the smallest value seen and the label it came with. The first label wins a tie."""
+
+    def __init__(self):
+        self.value = None
+        self.label = None
+
+    def add(self, value, label=None):
+        if self.value is None or value < self.value:
+            self.value = value
+            self.label = label
+
+    def merge(self, other):
+        """Folds in another MinWithLabel that saw later values, so this one keeps a tie."""
+        if other.value is not None:
+            self.add(other.value, other.label)
+
+    def result(self):
+        return [self.label, self.value]
+
+
+class MaxWithLabel:
+    """Tracks the largest value seen and the label it came with. The first label wins a tie."""
+
+    def __init__(self):
+        self.value = None
+        self.label = None
+
+    def add(self, value, label=None):
+        if self.value is None or value > self.value:
+            self.value = value
+            self.label = label
+
+    def merge(self, other):
+        """Folds in another MaxWithLabel that saw later values, so this one keeps a tie."""
+        if other.value is not None:
+            self.add(other.value, other.label)
+
+    def result(self):
+        return [self.label, self.value]
+
+
+class Max:
+    """Tracks the largest value seen, starting from a floor value."""
+
+    def __init__(self, floor=0):
+        self.value = floor
+
+    def add(self, value):
+        if value > self.value:
+            self.value = value
+
+    def merge(self, other):
+        self.add(other.value)
+
+    def result(self):
+        return self.value
+
+
+class Sum:
+    """Adds values up, rounding the total to the given number of decimal places."""
+
+    def __init__(self, ndigits=1):
+        self.total = 0
+        self.ndigits = ndigits
+
+    def add(self, value):
+        self.total += value
+
+    def merge(self, other):
+        self.total += other.total
+
+    def result(self):
+        return round(self.total, self.ndigits)
+
+
+class Count:
+    """Counts how many times add was called with a true value."""
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value=True):
+        if value:
+            self.count += 1
+
+    def merge(self, other):
+        self.count += other.count
+
+    def result(self):
+        return self.count
+
+
+class ForecastOverview:
+    """Works out part1's overview of a forecast one day at a time.
+
+    The comparisons are written out rather than built from MinWithLabel and
+    MaxWithLabel, as this runs once per forecast day. The first day wins a tie.
+    """
+
+    def __init__(self):
+        self.days = 0
+        self.minimum = None
+        self.minLabel = None
+        self.maximum = None
+        self.maxLabel = None
+        self.sumMin = 0
+        self.sumMax = 0
+
+    def add(self, minT, maxT, label=None):
+        self.days += 1
+        if self.minimum is None or minT < self.minimum:
+            self.minimum = minT
+            self.minLabel = label
+        self.sumMin = self.sumMin + minT
+
+        if self.maximum is None or maxT > self.maximum:
+            self.maximum = maxT
+            self.maxLabel = label
+        self.sumMax = self.sumMax + maxT
+
+    def result(self):
+        """Returns the overview, or None if no days were added.
+
+        Returns:
+            A dictionary with the number of Days, the Min and Max as
+            [temperature, label], and the MeanLow and MeanHigh rounded to 1
+            decimal place.
+        """
+        if self.days == 0:
+            return None
+        return {
+            "Days": self.days,
+            "Min": [self.minimum, self.minLabel],
+            "Max": [self.maximum, self.maxLabel],
+            "MeanLow": round(self.sumMin / self.days, 1),
+            "MeanHigh": round(self.sumMax / self.days, 1),
+        }
+
+
+class HistoricalSummary:
+    """Works out every part3 metric in a single pass over the observations.
+
+    The result dictionary holds:
+        File: the period name, eg. '6hours'.
+        Date: the date of the last observation added. AccuWeather lists the
+            newest observation first, so this is the start of the period.
+        DaylightHour: the number of observations with IsDayTime set.
+        MaxUV: the largest UVIndex, 0 if there were no observations.
+        MinsGroup: [TemperatureSummary range, value] of the lowest Minimum over
+            every observation and range, the first one seen winning a tie.
+        MaxGroup: the same for the highest Maximum.
+        Rain24mm: the PrecipitationSummary Past24Hours values added up, in mm.
+        overallTs, overallRFTs: one Temperature / RealFeelTemperature value per observation.
+        Mins, Maxs: one Minimum / Maximum value per observation and range.
+        WeatherText, WeatherFreq: every WeatherText seen and how many
+            observations had it, most frequent first (see
+            weather.categorical.frequency_table).
+        WeatherIcon, WeatherIconFreq and PrecipitationType, PrecipitationFreq:
+            the same for the WeatherIcon and PrecipitationType.
+
+    Args:
+        name: The period name reported as 'File'.
+        encoders: An optional dictionary of result key (eg. 'WeatherText') to
+            weather.categorical.CategoryEncoder, to share codes between summaries.
+    """
+
+    def __init__(self, name, encoders=None):
+        self.name = name
+        self.lastDate = None
+        self.minTemp = MinWithLabel()
+        self.maxTemp = MaxWithLabel()
+        self.rain = Sum()
+        self.daylight = Count()
+        self.maxUV = Max()
+        encoders = encoders or {}
+        self.categories = [(key, freqKey, attribute, CategoricalColumn(encoders.get(key)))
+                           for key, freqKey, attribute in CATEGORICAL_FIELDS]
+        self.overallTs = []
+        self.overallRFTs = []
+        self.mins = []
+        self.maxs = []
+
+    def add(self, observation):
+        """Folds one weather.records.Observation into the running totals."""
+        self.lastDate = observation.date
+        self.overallTs.append(observation.temperature)
+        self.overallRFTs.append(observation.realFeel)
+
+        for group, mn, mx in observation.ranges:
+            self.minTemp.add(mn, group)
+            self.mins.append(mn)
+            self.maxTemp.add(mx, group)
+            self.maxs.append(mx)
+
+        self.rain.add(observation.rain)
+        self.daylight.add(observation.isDay)
+        self.maxUV.add(observation.uv)
+        for _, _, attribute, column in self.categories:
+            column.append(getattr(observation, attribute))
+
+    def add_columns(self, table):
+        """Folds every observation of a HISTORICAL weather.cache.ColumnTable into the running totals."""
+        for observation in Observation.from_table(table):
+            self.add(observation)
+
+    def result(self):
+        result = {
+            "File": self.name,
+            "Date": format_date(self.lastDate, SHORT_DATE_FORMAT) if self.lastDate else None,
+            "DaylightHour": self.daylight.result(),
+            "MaxUV": self.maxUV.result(),
+            "MinsGroup": self.minTemp.result(),
+            "MaxGroup": self.maxTemp.result(),
+            "Rain24mm": self.rain.result(),
+            "overallTs": self.overallTs,
+            "overallRFTs": self.overallRFTs,
+            "Mins": self.mins,
+            "Maxs": self.maxs,
+        }
+        for key, freqKey, _, column in self.categories:
+            result[key], result[freqKey] = column.frequencies()
+        return result
@@ -0,0 +1,167 @@
+"""Processes many forecast and historical files in parallel.
+
+Usage, from the students directory:
+
+    python -m weather.batch part1/data part3/data/historical_*.json --workers 8
+
+Forecast files (a JSON object holding DailyForecasts) are rendered with
+part1.process_weather into <name>_output.txt, historical files (a JSON array of
+observations) are summarised with part3 into <name>_summary.txt, both written
+next to the input file.
+
+--timings FILE.csv|FILE.json records per-stage timings and counters for each
+input file. --profile cprofile|tracemalloc runs every file in this process
+under the chosen profiler and writes the result to --profile-output.
+"""
+import argparse
+import glob
+import os
+import sys
+import traceback
+
+from weather import instrument
+from weather.cache import ParsedCache
+from weather.files import FORECAST, atomic_write, detect_kind, import_parts, output_path
+
+def process_file(path, cache=None, timings=False):
+    """Processes one input file, never raising.
+
+    Args:
+        path: A string representing the file path to a JSON weather file.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+        timings: Whether to record instrumentation for this file.
+    Returns:
+        A tuple of (path, output path or None, error message or None,
+        instrument snapshot or None).
+    """
+    if timings:
+        instrument.enable()
+        instrument.reset()
+    try:
+        path, out, error = _process_file(path, cache)
+        return path, out, error, instrument.snapshot() if timings else None
+    finally:
+        if timings:
+            instrument.disable()
+
+
+def _process_file(path, cache):
+    try:
+        import_parts()
+        kind = detect_kind(path)
+        out = output_path(path, kind)
+        with atomic_write(out) as write_file:
+            if kind == FORECAST:
+                import part1
+                part1.write_weather(path, write_file, cache)
+            else:
+                import part3
+                part3.write_summary(part3.process_weather(path, cache), write_file)
+        return path, out, None
+    except Exception:
+        return path, None, traceback.format_exc(limit=3).strip()
+
+
+def find_inputs(patterns):
+    """Expands directories and glob patterns into a sorted list of JSON files.
+
+    Args:
+        patterns: A list of file paths, directories or glob patterns.
+    Returns:
+        A list of file paths with duplicates removed.
+    """
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found.update(glob.glob(os.path.join(pattern, "*.json")))
+        else:
+            found.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(found)
+
+
+def _results_in_process(paths, cache, timings):
+    for path in paths:
+        yield process_file(path, cache, timings)
+
+
+def _results_in_pool(paths, workers, cache, timings):
+    #watch imports this module for find_inputs, so only load multiprocessing for a pool
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_file, path, cache, timings) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(paths, workers=None, progress=sys.stderr, cache=None, snapshots=None):
+    """Processes files across a pool of worker processes.
+
+    Args:
+        paths: A list of file paths to process.
+        workers: The number of worker processes, defaults to the number of
+            cores. 0 processes every file in this process.
+        progress: A text file that receives one line per finished file, or None.
+        cache: An optional weather.cache.ParsedCache shared by every worker.
+        snapshots: An optional dictionary, filled with each input file's
+            instrumentation snapshot.
+    Returns:
+        A list of (path, error message) tuples for the files that failed.
+    """
+    failures = []
+    total = len(paths)
+    width = len(str(total))
+    timings = snapshots is not None
+    if workers == 0:
+        results = _results_in_process(paths, cache, timings)
+    else:
+        results = _results_in_pool(paths, workers, cache, timings)
+    for done, (path, out, error, snap) in enumerate(results, 1):
+        if error is not None:
+            failures.append((path, error))
+        if timings:
+            snapshots[path] = snap
+        if progress is not None:
+            status = f"-> {out}" if error is None else "FAILED"
+            print(f"[{done:>{width}}/{total}] {path} {status}", file=progress, flush=True)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process forecast and historical weather files in parallel.")
+    parser.add_argument("inputs", nargs="+", help="JSON files, directories or glob patterns")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes, 0 to run in this process (default: one per core)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print per-file progress")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="reuse parsed files from the weather cache (default dir: $WEATHER_CACHE_DIR or ~/.cache/weather)")
+    parser.add_argument("--timings", metavar="FILE", help="write per-file stage timings to a .csv or .json file")
+    parser.add_argument("--profile", choices=instrument.PROFILE_MODES,
+                        help="profile the whole run in this process instead of a worker pool")
+    parser.add_argument("--profile-output", metavar="FILE", help="where to write the profile (default: weather.<mode>)")
+    args = parser.parse_args(argv)
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        parser.error("no input files found")
+
+    cache = None if args.cache is None else ParsedCache(args.cache or None)
+    snapshots = {} if args.timings else None
+    progress = None if args.quiet else sys.stderr
+    if args.profile:
+        output = args.profile_output or f"weather.{args.profile}"
+        with instrument.profile(args.profile, output):
+            failures = run_batch(paths, 0, progress, cache, snapshots)
+        print(f"{args.profile} profile written to {output}", file=sys.stderr)
+    else:
+        failures = run_batch(paths, args.workers, progress, cache, snapshots)
+    if args.timings:
+        instrument.export(args.timings, snapshots)
+    for path, error in failures:
+        print(f"\n{path}:\n{error}", file=sys.stderr)
+    print(f"{len(paths) - len(failures)} of {len(paths)} files processed, {len(failures)} failed", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,522 @@
+"""An on-disk cache of parsed weather files in a compact columnar format.
+
+The first time a file is loaded its records are normalized (temperatures
+already in celcius, only the fields part1-3 use) and written to a binary file
+keyed on the input's path and content hash. Later loads memory-map that file
+instead of decoding the JSON again. The input is only hashed again when its
+modification time or size moved since the last load, see file_signature.
+
+Clear the cache from the students directory with:
+
+    python -m weather.cache --clear [files...]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from weather import decode, instrument
+from weather.decode import FORECAST_RECORD, HISTORICAL_RECORD, TEMPERATURE_RANGES, validate
+from weather.units import convert_f_to_c
+
+MAGIC = b"WXC3"
+SUFFIX = ".wxc"
+SIGNATURE_SUFFIX = ".sig"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+FORECAST = "forecast"
+HISTORICAL = "historical"
+
+#stands in for a missing integer, such as an observation without a WeatherIcon
+NULL_INT = -2 ** 63
+
+#column name -> array typecode: 'd' float64, 'q' int64, 's' utf8 string, 'n' a
+#JSON number, stored as a float64 and a flag saying whether it was an int
+FORECAST_SCHEMA = (
+    ("Date", "s"),
+    ("EpochDate", "q"),
+    ("Mins", "d"),
+    ("Max", "d"),
+    ("RealFeelTemperatureMins", "d"),
+    ("RealFeelTemperatureMax", "d"),
+    ("RealFeelTemperatureShadeMins", "d"),
+    ("RealFeelTemperatureShadeMax", "d"),
+    ("DayLongPhrase", "s"),
+    ("DayRainProbability", "n"),
+    ("NightLongPhrase", "s"),
+    ("NightRainProbability", "n"),
+)
+
+HISTORICAL_SCHEMA = (
+    ("LocalObservationDateTime", "s"),
+    ("EpochTime", "q"),
+    ("WeatherText", "s"),
+    ("WeatherIcon", "q"),
+    ("PrecipitationType", "s"),
+    ("IsDayTime", "q"),
+    ("UVIndex", "n"),
+    ("Temperature", "n"),
+    ("RealFeelTemperature", "n"),
+    ("Past24HoursRain", "n"),
+) + tuple(
+    (f"{group}.{bound}", "n") for group in TEMPERATURE_RANGES for bound in ("Minimum", "Maximum")
+)
+
+
+def normalize_forecasts(days, source="<data>"):
+    """Pulls the columns in FORECAST_SCHEMA out of decoded DailyForecasts days.
+
+    Args:
+        days: An iterable of decoded DailyForecasts days, eg. from weather.decode.iter_array.
+        source: The file the days came from, for error messages.
+    Returns:
+        A dictionary of column name to list of values.
+    Raises:
+        weather.decode.SchemaError: if a day is missing a field or has the wrong type.
+    """
+    columns = {name: [] for name, _ in FORECAST_SCHEMA}
+    for i, t in enumerate(days):
+        validate(t, FORECAST_RECORD, source, f"DailyForecasts[{i}]")
+        columns["Date"].append(t['Date'])
+        columns["EpochDate"].append(t['EpochDate'])
+        columns["Mins"].append(convert_f_to_c(t['Temperature']['Minimum']['Value']))
+        columns["Max"].append(convert_f_to_c(t['Temperature']['Maximum']['Value']))
+        columns["RealFeelTemperatureMins"].append(convert_f_to_c(t['RealFeelTemperature']['Minimum']['Value']))
+        columns["RealFeelTemperatureMax"].append(convert_f_to_c(t['RealFeelTemperature']['Maximum']['Value']))
+        columns["RealFeelTemperatureShadeMins"].append(convert_f_to_c(t['RealFeelTemperatureShade']['Minimum']['Value']))
+        columns["RealFeelTemperatureShadeMax"].append(convert_f_to_c(t['RealFeelTemperatureShade']['Maximum']['Value']))
+        columns["DayLongPhrase"].append(t['Day']['LongPhrase'])
+        columns["DayRainProbability"].append(t['Day']['RainProbability'])
+        columns["NightLongPhrase"].append(t['Night']['LongPhrase'])
+        columns["NightRainProbability"].append(t['Night']['RainProbability'])
+    return columns
+
+
+def normalize_historical(observations, source="<data>"):
+    """Pulls the columns in HISTORICAL_SCHEMA out of decoded historical observations.
+
+    Args:
+        observations: An iterable of decoded observations, eg. from weather.decode.iter_array.
+        source: The file the observations came from, for error messages.
+    Returns:
+        A dictionary of column name to list of values.
+    Raises:
+        weather.decode.SchemaError: if an observation is missing a field or has the wrong type.
+    """
+    columns = {name: [] for name, _ in HISTORICAL_SCHEMA}
+    for i, obj in enumerate(observations):
+        validate(obj, HISTORICAL_RECORD, source, f"[{i}]")
+        columns["LocalObservationDateTime"].append(obj["LocalObservationDateTime"])
+        columns["EpochTime"].append(obj["EpochTime"])
+        columns["WeatherText"].append(obj["WeatherText"])
+        icon = obj.get("WeatherIcon")
+        columns["WeatherIcon"].append(NULL_INT if icon is None else icon)
+        columns["PrecipitationType"].append(obj.get("PrecipitationType") or "")
+        columns["IsDayTime"].append(int(obj["IsDayTime"]))
+        columns["UVIndex"].append(obj["UVIndex"])
+        columns["Temperature"].append(obj["Temperature"]["Metric"]["Value"])
+        columns["RealFeelTemperature"].append(obj["RealFeelTemperature"]["Metric"]["Value"])
+        columns["Past24HoursRain"].append(obj["PrecipitationSummary"]["Past24Hours"]["Metric"]["Value"])
+        for group in TEMPERATURE_RANGES:
+            value = obj["TemperatureSummary"][group]
+            columns[f"{group}.Minimum"].append(value["Minimum"]["Metric"]["Value"])
+            columns[f"{group}.Maximum"].append(value["Maximum"]["Metric"]["Value"])
+    return columns
+
+
+SCHEMAS = {FORECAST: FORECAST_SCHEMA, HISTORICAL: HISTORICAL_SCHEMA}
+NORMALIZERS = {FORECAST: normalize_forecasts, HISTORICAL: normalize_historical}
+#the top level key holding the records of each kind of file
+RECORD_KEYS = {FORECAST: "DailyForecasts", HISTORICAL: None}
+
+
+class StringColumn:
+    """A read-only sequence of strings decoded from the cache on access."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def release(self):
+        self.offsets.release()
+        self.blob.release()
+
+
+class NumberColumn:
+    """A read-only sequence of JSON numbers, giving back ints for the values that were ints."""
+
+    def __init__(self, data, ints):
+        self.data = data
+        self.ints = ints
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        value = self.data[i]
+        return int(value) if self.ints[i] else value
+
+    def __iter__(self):
+        for value, isInt in zip(self.data, self.ints):
+            yield int(value) if isInt else value
+
+    def release(self):
+        self.data.release()
+        self.ints.release()
+
+
+class ColumnTable:
+    """Columns of normalized records, either in memory or memory-mapped from the cache.
+
+    Numeric columns are sequences of floats or ints (memoryviews or
+    NumberColumns when mapped), string columns decode each value only when it
+    is read.
+
+    Args:
+        kind: FORECAST or HISTORICAL.
+        columns: A dictionary of column name to sequence.
+    """
+
+    def __init__(self, kind, columns, mapping=None):
+        self.kind = kind
+        self.columns = columns
+        self._mapping = mapping
+
+    def __len__(self):
+        first = next(iter(self.columns.values()), ())
+        return len(first)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self):
+        """Yields one dictionary of column name to value per record."""
+        names = list(self.columns)
+        for values in zip(*(self.columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def close(self):
+        """Releases the memory map behind a cached table."""
+        if self._mapping is not None:
+            for column in self.columns.values():
+                column.release()
+            self.columns = {}
+            self._mapping.close()
+            self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _pad(length):
+    return -length % 8
+
+
+def write_table(path, kind, columns):
+    """Writes columns in the binary cache format.
+
+    The file is MAGIC, a 4 byte header length, a JSON header describing each
+    column and then the column data. Block offsets in the header are relative to
+    the start of the data, and every block is aligned to 8 bytes so it can be
+    cast straight from the memory map.
+    """
+    blocks = []
+    offset = 0
+    for name, code in SCHEMAS[kind]:
+        values = columns[name]
+        if code == "s":
+            encoded = [value.encode('utf8') for value in values]
+            offsets = [0]
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            parts = (("offsets", struct.pack(f"={len(offsets)}q", *offsets)), ("blob", b"".join(encoded)))
+        elif code == "n":
+            parts = (("data", struct.pack(f"={len(values)}d", *values)),
+                     ("ints", bytes(isinstance(value, int) for value in values)))
+        else:
+            parts = (("data", struct.pack(f"={len(values)}{code}", *values)),)
+        for part, data in parts:
+            blocks.append(({"name": name, "part": part, "offset": offset, "length": len(data)}, data))
+            offset += len(data) + _pad(len(data))
+
+    header = {
+        "kind": kind,
+        "columns": [list(column) for column in SCHEMAS[kind]],
+        "blocks": [entry for entry, _ in blocks],
+    }
+    headerBytes = json.dumps(header).encode('utf8')
+    with open(path, "wb") as write_file:
+        write_file.write(MAGIC)
+        write_file.write(struct.pack("<I", len(headerBytes)))
+        write_file.write(headerBytes)
+        write_file.write(b"\0" * _pad(len(MAGIC) + 4 + len(headerBytes)))
+        for _, data in blocks:
+            write_file.write(data)
+            write_file.write(b"\0" * _pad(len(data)))
+
+
+def read_table(path):
+    """Memory-maps a cache file written by write_table.
+
+    Returns:
+        A ColumnTable whose columns are views onto the mapped file.
+    """
+    with open(path, "rb") as read_file:
+        mapping = mmap.mmap(read_file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    try:
+        if bytes(view[:4]) != MAGIC:
+            raise ValueError(f"{path} is not a weather cache file")
+        headerLength = struct.unpack("<I", view[4:8])[0]
+        header = json.loads(bytes(view[8:8 + headerLength]))
+        start = 8 + headerLength
+        start += _pad(start)
+        parts = {}
+        for entry in header["blocks"]:
+            offset = start + entry["offset"]
+            parts[(entry["name"], entry["part"])] = view[offset:offset + entry["length"]]
+        columns = {}
+        for name, code in header["columns"]:
+            if code == "s":
+                columns[name] = StringColumn(parts[(name, "offsets")].cast("q"), parts[(name, "blob")])
+            elif code == "n":
+                columns[name] = NumberColumn(parts[(name, "data")].cast("d"), parts[(name, "ints")])
+            else:
+                columns[name] = parts[(name, "data")].cast(code)
+        del parts
+    except Exception:
+        view.release()
+        mapping.close()
+        raise
+    view.release()
+    return ColumnTable(header["kind"], columns, mapping)
+
+
+def hash_file(path):
+    """Returns a hex digest of the contents of a file, read a chunk at a time."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as read_file:
+        for chunk in iter(lambda: read_file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path, previous=None):
+    """Works out the version of a file, hashing it only if its stat changed.
+
+    Args:
+        path: The file to look at.
+        previous: The [mtime_ns, size, digest] signature last recorded for it, if any.
+    Returns:
+        A [mtime_ns, size, digest] list.
+    """
+    stat = os.stat(path)
+    if previous is not None and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+        return previous
+    return [stat.st_mtime_ns, stat.st_size, hash_file(path)]
+
+
+def _path_key(path):
+    return hashlib.blake2b(os.path.abspath(path).encode('utf8'), digest_size=8).hexdigest()
+
+
+class ParsedCache:
+    """A size-bounded directory of cached, normalized weather files.
+
+    Args:
+        directory: Where cache files live, defaults to $WEATHER_CACHE_DIR or
+            ~/.cache/weather.
+        max_bytes: Once the cache grows past this, the least recently used
+            files are deleted.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        if directory is None:
+            directory = os.environ.get("WEATHER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "weather")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, path):
+        """Returns the cache file for the current contents of path.
+
+        The signature of path is kept next to its entries, so path is only
+        hashed when its modification time or size no longer match it.
+        """
+        key = _path_key(path)
+        signaturePath = os.path.join(self.directory, key + SIGNATURE_SUFFIX)
+        previous = None
+        try:
+            with open(signaturePath, "r", encoding='utf8') as read_file:
+                previous = json.load(read_file)
+        except (OSError, ValueError):
+            pass
+        signature = file_signature(path, previous)
+        if signature is not previous:
+            self._write_signature(signaturePath, signature)
+        return os.path.join(self.directory, f"{key}-{signature[2]}{SUFFIX}")
+
+    def _write_signature(self, signaturePath, signature):
+        import tempfile
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding='utf8') as write_file:
+                json.dump(signature, write_file)
+            os.replace(tmp, signaturePath)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def load(self, path, kind):
+        """Returns the normalized columns of a weather file, parsing it only on a cache miss.
+
+        Args:
+            path: A string representing the file path to a JSON weather file.
+            kind: FORECAST or HISTORICAL.
+        Returns:
+            A memory-mapped ColumnTable. Close it (or use it in a with block) when done.
+        """
+        entry = self.entry_path(path)
+        if os.path.exists(entry):
+            try:
+                table = read_table(entry)
+            except (OSError, ValueError, KeyError):
+                #a damaged entry is just a miss, and another process may have evicted it already
+                try:
+                    os.remove(entry)
+                except FileNotFoundError:
+                    pass
+            else:
+                self.hits += 1
+                instrument.count("cache.hits")
+                try:
+                    os.utime(entry)
+                except FileNotFoundError:
+                    pass
+                return table
+
+        self.misses += 1
+        instrument.count("cache.misses")
+        with open(path, "r", encoding='utf8') as read_file:
+            columns = NORMALIZERS[kind](decode.iter_array(read_file, RECORD_KEYS[kind]), path)
+
+        #entries of older versions of path will never be read again
+        self._remove_entries(path)
+        import tempfile
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        table = None
+        try:
+            write_table(tmp, kind, columns)
+            #map the new entry before it is published, so it can be read even if another process evicts it
+            table = read_table(tmp)
+            os.replace(tmp, entry)
+        except BaseException:
+            if table is not None:
+                table.close()
+            os.remove(tmp)
+            raise
+        self.evict(keep=entry)
+        return table
+
+    def entries(self):
+        """Returns the paths of every file in the cache."""
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(SUFFIX)]
+
+    def invalidate(self, path=None):
+        """Deletes the cached copies of one input file, or of everything if path is None.
+
+        Entries are deleted before signatures, so a signature never outlives an entry it names.
+        """
+        self._remove_entries(path)
+        if path is None:
+            signatures = [name for name in os.listdir(self.directory) if name.endswith(SIGNATURE_SUFFIX)]
+        else:
+            signatures = [_path_key(path) + SIGNATURE_SUFFIX]
+        for name in signatures:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def _remove_entries(self, path=None):
+        prefix = None if path is None else _path_key(path) + "-"
+        for entry in self.entries():
+            if prefix is None or os.path.basename(entry).startswith(prefix):
+                try:
+                    os.remove(entry)
+                except FileNotFoundError:
+                    pass
+
+    def evict(self, keep=None):
+        """Deletes the least recently used entries until the cache fits in max_bytes.
+
+        Args:
+            keep: An entry never to delete, such as the one just written. It
+                still counts towards max_bytes.
+        """
+        stats = []
+        for entry in self.entries():
+            try:
+                stat = os.stat(entry)
+            except FileNotFoundError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in stats)
+        for _, size, entry in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the parsed weather file cache.")
+    parser.add_argument("files", nargs="*", help="only invalidate these input files")
+    parser.add_argument("--clear", action="store_true", help="delete cached entries")
+    parser.add_argument("--dir", default=None, help="cache directory")
+    args = parser.parse_args(argv)
+
+    cache = ParsedCache(args.dir)
+    if args.clear:
+        if args.files:
+            for path in args.files:
+                cache.invalidate(path)
+        else:
+            cache.invalidate()
+    entries = cache.entries()
+    size = sum(os.path.getsize(entry) for entry in entries)
+    print(f"{cache.directory}: {len(entries)} entries, {size} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
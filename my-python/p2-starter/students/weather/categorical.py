@@ -0,0 +1,84 @@
+"""Categorical encoding of repeated text fields such as WeatherText.
+
+Each distinct value is given a small integer code by a CategoryEncoder, which
+can be shared by every column (and file) holding the same kind of value.
+Columns keep only the codes, four bytes per record in an array('i'), and the
+frequency of every category comes from one bincount over them, so counting
+stays linear in the number of records however many categories there are.
+"""
+from array import array
+
+
+class CategoryEncoder:
+    """A dictionary of category value to integer code, in first-seen order."""
+
+    def __init__(self):
+        self.codes = {}
+        self.categories = []
+
+    def __len__(self):
+        return len(self.categories)
+
+    def encode(self, value):
+        """Returns the code of value, giving it the next free code if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def decode(self, code):
+        return self.categories[code]
+
+
+class CategoricalColumn:
+    """A column of category values held as integer codes.
+
+    Args:
+        encoder: The CategoryEncoder to code values with, a new one by default.
+            Share one between columns so their codes line up.
+    """
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder if encoder is not None else CategoryEncoder()
+        self.codes = array('i')
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.encoder.decode(self.codes[i])
+
+    def append(self, value):
+        self.codes.append(self.encoder.encode(value))
+
+    def extend(self, values):
+        encode = self.encoder.encode
+        self.codes.extend(encode(value) for value in values)
+
+    def counts(self):
+        """Returns a numpy array of how many times each code occurs, indexed by code."""
+        #numpy takes longer to import than the rest of part3, so only load it to count
+        import numpy as np
+
+        return np.bincount(np.frombuffer(self.codes, dtype=np.intc), minlength=len(self.encoder))
+
+    def frequencies(self):
+        """Returns the frequency table of every category present, see frequency_table."""
+        return frequency_table(self.encoder.categories, self.counts())
+
+
+def frequency_table(categories, counts):
+    """Orders categories for a bar chart, dropping any that never occur.
+
+    Args:
+        categories: A list of category values.
+        counts: How many times each one occurs, in the same order.
+    Returns:
+        A (categories, counts) tuple of lists, most frequent first and equal
+        counts in name order, so the table does not depend on the order the
+        records were read in.
+    """
+    pairs = [(category, int(count)) for category, count in zip(categories, counts) if count]
+    pairs.sort(key=lambda pair: (-pair[1], str(pair[0])))
+    return [category for category, _ in pairs], [count for _, count in pairs]
@@ -0,0 +1,136 @@
+"""Compares the daily forecasts of many stations in one pass.
+
+Forecast files are parsed in parallel worker processes, each handing back only
+the (date, minimum, maximum) of its days. The results are then merged in a
+single pass that works out part1's overview for every station and, for every
+calendar day, which station will be hottest and coldest. Each day is
+formatted once however many stations forecast it.
+"""
+import os
+from collections import Counter
+
+from weather.aggregate import ForecastOverview
+from weather.dates import LONG_DATE_FORMAT, format_date
+from weather.records import iter_forecast_days
+
+
+def station_name(path):
+    """Returns the station name of a forecast file, its file name without the extension."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def station_names(paths):
+    """Names every station, telling apart files that share a file name.
+
+    Args:
+        paths: A list of forecast JSON file paths.
+    Returns:
+        A list of names in the same order. A file is named by station_name
+        unless another file has the same one; those are named by their path
+        below the directory they have in common, without the extension. A
+        file listed more than once gets its count after the name, eg. 'a (2)'.
+    """
+    names = [station_name(path) for path in paths]
+    #name -> absolute paths of every file going by it
+    groups = {}
+    for name, path in zip(names, paths):
+        groups.setdefault(name, set()).add(os.path.abspath(path))
+    common = {name: os.path.commonpath(group) for name, group in groups.items() if len(group) > 1}
+    for i, (name, path) in enumerate(zip(names, paths)):
+        if name in common:
+            names[i] = os.path.splitext(os.path.relpath(os.path.abspath(path), common[name]))[0]
+    seen = Counter()
+    for i, name in enumerate(names):
+        seen[name] += 1
+        if seen[name] > 1:
+            names[i] = f"{name} ({seen[name]})"
+    return names
+
+
+def _load_station(path):
+    with open(path, "r", encoding='utf8') as read_file:
+        return [(day.date, day.minimum, day.maximum) for day in iter_forecast_days(read_file)]
+
+
+def load_stations(forecast_files, workers=None):
+    """Parses forecast files in parallel.
+
+    Args:
+        forecast_files: A list of forecast JSON file paths.
+        workers: The number of worker processes, None for one per CPU or 0 to
+            parse everything in this process.
+    Returns:
+        A list with one list of (ISO date, minimum, maximum) tuples per file,
+        in the same order as forecast_files, temperatures in celcius.
+    """
+    if workers == 0 or len(forecast_files) < 2:
+        return [_load_station(path) for path in forecast_files]
+    #multiprocessing is slow to import, so only load it when stations are compared
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_load_station, forecast_files, chunksize=max(1, len(forecast_files) // 64)))
+
+
+def compare_stations(forecast_files, workers=None, date_format=LONG_DATE_FORMAT):
+    """Works out every station's overview and the hottest and coldest station per day.
+
+    Days are matched on the local calendar date of each forecast. Ties go to
+    the earlier day within a station, as in part1, and to the station listed
+    first across stations.
+
+    Args:
+        forecast_files: A list of forecast JSON file paths, one per station.
+        workers: As for load_stations.
+        date_format: The strftime format the dates are reported in.
+    Returns:
+        A dictionary holding:
+            Stations: one weather.aggregate.ForecastOverview result per
+                station, labelled with formatted dates, plus its Station name
+                from station_names.
+            Days: one dictionary per calendar day, in date order, with its
+                Date, the Hottest and Coldest [station, temperature] and the
+                number of Stations forecasting it.
+    """
+    #calendar day -> its formatted date
+    formatted = {}
+    def format_day(isoDate):
+        key = isoDate[:10]
+        text = formatted.get(key)
+        if text is None:
+            text = formatted[key] = format_date(isoDate, date_format)
+        return text
+
+    stations = []
+    #calendar day -> [hottest station, max, coldest station, min, station count, first ISO date seen]
+    days = {}
+    names = station_names(forecast_files)
+    for path, name, forecast in zip(forecast_files, names, load_stations(forecast_files, workers)):
+        overview = ForecastOverview()
+        for isoDate, minT, maxT in forecast:
+            overview.add(minT, maxT, isoDate)
+
+            key = isoDate[:10]
+            day = days.get(key)
+            if day is None:
+                days[key] = [name, maxT, name, minT, 1, isoDate]
+            else:
+                if maxT > day[1]:
+                    day[0], day[1] = name, maxT
+                if minT < day[3]:
+                    day[2], day[3] = name, minT
+                day[4] += 1
+
+        station = overview.result()
+        if station is None:
+            raise ValueError(f"No DailyForecasts found in {path}")
+        station["Station"] = name
+        for key in ("Min", "Max"):
+            station[key][1] = format_day(station[key][1])
+        stations.append(station)
+
+    return {
+        "Stations": stations,
+        "Days": [{"Date": format_day(isoDate), "Hottest": [hottest, maxT], "Coldest": [coldest, minT], "Stations": count}
+                 for _, (hottest, maxT, coldest, minT, count, isoDate) in sorted(days.items())],
+    }
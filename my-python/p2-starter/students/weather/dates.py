@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+LONG_DATE_FORMAT = '%A %d %B %Y'
+SHORT_DATE_FORMAT = '%d %B %Y'
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+#AccuWeather files repeat the same handful of timestamps over and over, so a
+#few thousand entries covers years of hourly data for one station
+CACHE_SIZE = 4096
+
+_timezones = {}
+
+
+def _timezone(offset):
+    """Returns a shared tzinfo for an offset string like '+08:00'."""
+    tz = _timezones.get(offset)
+    if tz is None:
+        minutes = int(offset[1:3]) * 60 + int(offset[4:6])
+        if offset[0] == "-":
+            minutes = -minutes
+        tz = _timezones[offset] = timezone(timedelta(minutes=minutes))
+    return tz
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_iso(iso_string):
+    """Converts an ISO formatted date string into a timezone aware datetime.
+
+    Fixed width strings like '2020-06-19T07:00:00+08:00' are sliced apart
+    directly; anything else falls back to datetime.strptime.
+
+    Args:
+        iso_string: An ISO date string.
+    Returns:
+        A datetime object.
+    """
+    if (len(iso_string) == 25 and iso_string[4] == "-" and iso_string[7] == "-"
+            and iso_string[10] == "T" and iso_string[13] == ":" and iso_string[16] == ":"
+            and iso_string[19] in "+-" and iso_string[22] == ":"):
+        try:
+            return datetime(
+                int(iso_string[0:4]), int(iso_string[5:7]), int(iso_string[8:10]),
+                int(iso_string[11:13]), int(iso_string[14:16]), int(iso_string[17:19]),
+                tzinfo=_timezone(iso_string[19:]))
+        except ValueError:
+            pass
+    return datetime.strptime(iso_string, ISO_FORMAT)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(iso_string, date_format=LONG_DATE_FORMAT):
+    """Converts an ISO formatted date into a human readable format.
+
+    Args:
+        iso_string: An ISO date string.
+        date_format: A strftime format, defaults to Weekday Date Month Year.
+    Returns:
+        A date formatted like: Weekday Date Month Year
+    """
+    return parse_iso(iso_string).strftime(date_format)
@@ -0,0 +1,252 @@
+"""Decodes weather JSON with the fastest backend installed and checks its shape.
+
+orjson is used when it is installed and the standard library json module
+otherwise. Files up to WHOLE_FILE_LIMIT (1 MB unless $WEATHER_WHOLE_FILE_LIMIT
+says otherwise) are decoded in one call to the backend; bigger ones go through
+weather.stream a record at a time so memory stays flat however big the input.
+
+FORECAST_RECORD and HISTORICAL_RECORD list the fields part1-3 read out of each
+DailyForecasts day and each historical observation, and validate checks a
+record against them. Everything else in a record is ignored. If AccuWeather
+ever renames or retypes one of those fields, decoding stops with a SchemaError
+naming the file and the JSON path, rather than a KeyError or a TypeError
+somewhere further down.
+"""
+import json
+import os
+
+from weather.stream import iter_json_array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "json" if orjson is None else "orjson"
+
+#files up to this many bytes are decoded in one go, bigger ones are streamed
+WHOLE_FILE_LIMIT = int(os.environ.get("WEATHER_WHOLE_FILE_LIMIT", 1024 * 1024))
+
+TEMPERATURE_RANGES = ("Past6HourRange", "Past12HourRange", "Past24HourRange")
+
+NUMBER = (int, float)
+
+
+class Optional:
+    """Marks a schema field that may be missing or null."""
+
+    __slots__ = ("schema",)
+
+    def __init__(self, schema):
+        self.schema = schema
+
+
+_RANGE = {"Minimum": {"Value": NUMBER}, "Maximum": {"Value": NUMBER}}
+_PERIOD = {"LongPhrase": str, "RainProbability": NUMBER}
+_METRIC = {"Metric": {"Value": NUMBER}}
+
+#field name -> a type (or tuple of types), a nested schema or an Optional
+FORECAST_RECORD = {
+    "Date": str,
+    "EpochDate": int,
+    "Temperature": _RANGE,
+    "RealFeelTemperature": _RANGE,
+    "RealFeelTemperatureShade": _RANGE,
+    "Day": _PERIOD,
+    "Night": _PERIOD,
+}
+
+HISTORICAL_RECORD = {
+    "LocalObservationDateTime": str,
+    "EpochTime": int,
+    "WeatherText": str,
+    "WeatherIcon": Optional(int),
+    "PrecipitationType": Optional(str),
+    "IsDayTime": bool,
+    "UVIndex": NUMBER,
+    "Temperature": _METRIC,
+    "RealFeelTemperature": _METRIC,
+    "TemperatureSummary": {group: {"Minimum": _METRIC, "Maximum": _METRIC} for group in TEMPERATURE_RANGES},
+    "PrecipitationSummary": {"Past24Hours": _METRIC},
+}
+
+
+class SchemaError(ValueError):
+    """A record does not have a field part1-3 need, or it has the wrong type.
+
+    Args:
+        source: The file the record came from.
+        path: The JSON path of the field, eg. 'DailyForecasts[3].Temperature.Minimum.Value'.
+        problem: What is wrong with it.
+    """
+
+    def __init__(self, source, path, problem):
+        super().__init__(f"{source}: {path} {problem}")
+        self.source = source
+        self.path = path
+        self.problem = problem
+
+
+def _type_name(types):
+    if types is NUMBER:
+        return "a number"
+    return "of type " + " or ".join(t.__name__ for t in (types if isinstance(types, tuple) else (types,)))
+
+
+def _problem(value, schema):
+    """Returns None if value matches schema, else a (list of keys in reverse, problem) tuple."""
+    if isinstance(schema, Optional):
+        if value is None:
+            return None
+        schema = schema.schema
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            return [], f"should be an object, got {type(value).__name__}"
+        for key, inner in schema.items():
+            if key not in value:
+                if isinstance(inner, Optional):
+                    continue
+                return [key], "is missing"
+            problem = _problem(value[key], inner)
+            if problem is not None:
+                problem[0].append(key)
+                return problem
+        return None
+    if type(value) not in (schema if isinstance(schema, tuple) else (schema,)):
+        return [], f"should be {_type_name(schema)}, got {json.dumps(value)[:40]}"
+    return None
+
+
+def _fields(schema, path, required, optional):
+    """Flattens a dictionary schema into required (path, types) and optional (path, check) lists."""
+    for key, inner in schema.items():
+        if isinstance(inner, dict):
+            _fields(inner, path + (key,), required, optional)
+        elif isinstance(inner, Optional):
+            optional.append((path + (key,), _compile(inner.schema)))
+        else:
+            required.append((path + (key,), inner if isinstance(inner, tuple) else (inner,)))
+
+
+def _compile(schema):
+    """Turns a schema into a function saying whether a record matches it.
+
+    Nested objects are flattened into one list of key paths when the schema
+    is compiled, so checking a good record is one short loop per field
+    rather than a call for every level. _problem works out what is wrong
+    with a bad one.
+    """
+    if not isinstance(schema, dict):
+        types = schema if isinstance(schema, tuple) else (schema,)
+        return lambda value: type(value) in types
+    required = []
+    optional = []
+    _fields(schema, (), required, optional)
+
+    def check(record):
+        if type(record) is not dict:
+            return False
+        #a missing key or a value that is not an object on the way down fails the lookup
+        try:
+            for path, types in required:
+                value = record
+                for key in path:
+                    value = value[key]
+                if type(value) not in types:
+                    return False
+            for path, inner in optional:
+                value = record
+                for key in path[:-1]:
+                    value = value[key]
+                value = value.get(path[-1])
+                if value is not None and not inner(value):
+                    return False
+        except (KeyError, TypeError, AttributeError):
+            return False
+        return True
+    return check
+
+
+#id(schema) -> (schema, check), holding on to the schema so its id is not reused
+_checks = {}
+
+
+def validate(record, schema, source, path):
+    """Checks a decoded record has every field in schema, with the right types.
+
+    Args:
+        record: The decoded record.
+        schema: FORECAST_RECORD, HISTORICAL_RECORD or another schema dictionary.
+        source: The file the record came from, for the error message.
+        path: The JSON path of the record, eg. 'DailyForecasts[3]'.
+    Raises:
+        SchemaError: naming the first field that is missing or has the wrong type.
+    """
+    entry = _checks.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = _checks[id(schema)] = (schema, _compile(schema))
+    if entry[1](record):
+        return
+    problem = _problem(record, schema)
+    if problem is not None:
+        keys, message = problem
+        raise SchemaError(source, "".join([path] + [f".{key}" for key in reversed(keys)]), message)
+
+
+def source_name(read_file):
+    """Returns the name of a file object for error messages."""
+    return getattr(read_file, "name", "<stream>")
+
+
+def loads(text):
+    """Decodes a JSON str or bytes with the backend."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def load(read_file):
+    """Decodes a whole JSON file with the backend."""
+    return loads(read_file.read())
+
+
+def _size(read_file):
+    try:
+        return os.fstat(read_file.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def iter_array(read_file, key=None):
+    """Yields the elements of a JSON array, see weather.stream.iter_json_array.
+
+    Small files are decoded in one go with the backend, large ones (and file
+    objects whose size is unknown) are streamed.
+
+    Args:
+        read_file: A file object opened in text mode.
+        key: The name of the top level key holding the array, or None if the
+            document itself is the array.
+    Returns:
+        A generator of the decoded array elements.
+    Raises:
+        SchemaError: if key is missing or does not hold an array.
+    """
+    size = _size(read_file)
+    if orjson is None or size is None or size > WHOLE_FILE_LIMIT:
+        try:
+            yield from iter_json_array(read_file, key)
+        except KeyError:
+            #the streaming parser only raises KeyError for a missing top level key
+            raise SchemaError(source_name(read_file), key, "is missing") from None
+        return
+    data = load(read_file)
+    if key is not None:
+        if not isinstance(data, dict):
+            raise SchemaError(source_name(read_file), "$", f"should be an object holding {key}")
+        if key not in data:
+            raise SchemaError(source_name(read_file), key, "is missing")
+        data = data[key]
+    if not isinstance(data, list):
+        raise SchemaError(source_name(read_file), key or "$", "should be an array")
+    yield from data
@@ -0,0 +1,73 @@
+"""Min/max preserving decimation of long daily series for plotting.
+
+The series are split into equal runs of days (buckets). In each bucket the
+days holding the lowest and highest value of every series are kept, so no
+extreme of any series is lost and every series still shares the same dates.
+The number of points plotted is bounded by the target, however long the range.
+"""
+import numpy as np
+
+from weather.table import TEMPERATURE_COLUMNS
+
+DEFAULT_TARGET = 2000
+
+
+def _extreme_indices(values, starts, bucketIds, reduce):
+    extremes = reduce.reduceat(values, starts)
+    hits = np.flatnonzero(values == extremes[bucketIds])
+    #the first day in each bucket holding its extreme
+    _, first = np.unique(bucketIds[hits], return_index=True)
+    return hits[first]
+
+
+def minmax_indices(series, target=DEFAULT_TARGET):
+    """Works out which points to keep so every series keeps its extremes.
+
+    Args:
+        series: A list of equal length sequences of numbers sharing one x axis.
+        target: The most points to keep, at least 2 per series plus 2.
+    Returns:
+        A sorted numpy array of the indices to keep, always including the
+        first and last point. Every index is kept if there are no more than
+        target points.
+    """
+    arrays = [np.asarray(values, dtype=np.float64) for values in series]
+    length = len(arrays[0]) if arrays else 0
+    if any(len(values) != length for values in arrays):
+        raise ValueError("Every series must be the same length")
+    if length <= target or not arrays:
+        return np.arange(length)
+
+    #each bucket keeps at most a minimum and a maximum per series
+    buckets = (target - 2) // (2 * len(arrays))
+    if buckets < 1:
+        raise ValueError(f"target {target} is too small to keep the extremes of {len(arrays)} series")
+    starts = np.linspace(0, length, buckets + 1).astype(np.intp)[:-1]
+    bucketIds = np.repeat(np.arange(buckets), np.diff(np.append(starts, length)))
+
+    keep = [np.array([0, length - 1])]
+    for values in arrays:
+        keep.append(_extreme_indices(values, starts, bucketIds, np.fmin))
+        keep.append(_extreme_indices(values, starts, bucketIds, np.fmax))
+    return np.unique(np.concatenate(keep))
+
+
+def downsample(process_dict, target=DEFAULT_TARGET, keys=None):
+    """Thins out a part2 process_weather dictionary for plotting.
+
+    Args:
+        process_dict: A dictionary of equal length lists, eg. from part2.process_weather.
+        target: The most points to keep per series.
+        keys: The series whose extremes must be kept, defaults to the six
+            temperature columns.
+    Returns:
+        A new dictionary with every list cut down to the same kept days, or
+        process_dict itself if it already fits within target.
+    """
+    if keys is None:
+        keys = [name for name, _, _ in TEMPERATURE_COLUMNS]
+    keep = minmax_indices([process_dict[key] for key in keys], target)
+    if len(keep) == len(process_dict[keys[0]]):
+        return process_dict
+    keep = keep.tolist()
+    return {key: [values[i] for i in keep] for key, values in process_dict.items()}
@@ -0,0 +1,77 @@
+"""What kind of weather file an input is, and where its outputs go.
+
+weather.batch, weather.pipeline and weather.records all need to tell forecast
+files from historical ones, and the batch and pipeline writers both write their
+reports through a temporary file. Those pieces live here so none of them has
+to import another's internals.
+"""
+import contextlib
+import os
+import sys
+
+STUDENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+FORECAST = "forecast"
+HISTORICAL = "historical"
+
+
+def import_parts():
+    """Makes part1, part2 and part3 importable from any working directory."""
+    for part in ("part1", "part2", "part3"):
+        path = os.path.normpath(os.path.join(STUDENTS_DIR, part))
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def detect_kind(path):
+    """Works out whether a file holds forecast or historical data.
+
+    Args:
+        path: A string representing the file path to a JSON weather file.
+    Returns:
+        FORECAST for a JSON object, HISTORICAL for a JSON array.
+    """
+    with open(path, "r", encoding='utf8') as read_file:
+        while True:
+            char = read_file.read(1)
+            if not char:
+                raise ValueError(f"{path} is empty")
+            if not char.isspace() and char != "\ufeff":
+                break
+    if char == "{":
+        return FORECAST
+    if char == "[":
+        return HISTORICAL
+    raise ValueError(f"{path} is not a forecast or historical JSON file")
+
+
+def output_path(path, kind):
+    """Returns the text file written alongside an input file."""
+    stem = os.path.splitext(path)[0]
+    if kind == FORECAST:
+        return f"{stem}_output.txt"
+    return f"{stem}_summary.txt"
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Opens a text file that only replaces path once it has been written in full.
+
+    Everything is written to path + '.partial', which is renamed over path
+    when the block finishes and removed if it raises, so a failure never
+    leaves half a file behind.
+
+    Args:
+        path: A string representing the file path to write.
+    Returns:
+        A context manager giving the open file object.
+    """
+    partial = f"{path}.partial"
+    try:
+        with open(partial, "w", encoding='utf8') as write_file:
+            yield write_file
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
@@ -0,0 +1,109 @@
+"""Concurrent ingestion of many small historical observation files.
+
+Blocking reads and decoding into weather.records.Observation are handed to a
+thread pool while a bounded number of files are in flight at once, so
+throughput scales with I/O concurrency on slow network volumes instead of
+waiting on one file at a time.
+"""
+from weather import instrument
+from weather.aggregate import HistoricalSummary
+from weather.records import iter_observations
+
+DEFAULT_CONCURRENCY = 32
+
+_DONE = object()
+
+
+def _read_observations(path):
+    with open(path, "r", encoding='utf8') as read_file:
+        return list(iter_observations(read_file))
+
+
+async def iter_historical(paths, concurrency=DEFAULT_CONCURRENCY, executor=None):
+    """Reads historical files concurrently, yielding each one as it finishes.
+
+    At most concurrency files are being read at any moment and at most
+    concurrency parsed files wait to be consumed, so memory stays bounded
+    however many paths there are.
+
+    Args:
+        paths: An iterable of historical JSON file paths.
+        concurrency: How many files may be read and parsed at the same time.
+        executor: An optional concurrent.futures executor for the blocking work,
+            defaults to a thread pool of concurrency threads.
+    Returns:
+        An async generator of (path, list of Observation records or None,
+        exception or None) tuples in completion order.
+    """
+    #only load asyncio and the thread pool when files are actually read
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    ownExecutor = executor is None
+    if ownExecutor:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = iter(paths)
+    results = asyncio.Queue(maxsize=concurrency)
+
+    async def worker():
+        for path in pending:
+            try:
+                data = await loop.run_in_executor(executor, _read_observations, path)
+            except Exception as error:
+                await results.put((path, None, error))
+            else:
+                await results.put((path, data, None))
+        await results.put(_DONE)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            item = await results.get()
+            if item is _DONE:
+                running -= 1
+            else:
+                yield item
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if ownExecutor:
+            executor.shutdown(wait=False)
+
+
+async def summarise_historical(paths, name, concurrency=DEFAULT_CONCURRENCY, errors=None):
+    """Folds observations from many files into one part3 summary as each file arrives.
+
+    Files finish in no particular order, so 'Date' is taken from the oldest
+    observation seen rather than the last one added, and a tie between equal
+    minimum or maximum temperatures goes to whichever file finished first.
+
+    Args:
+        paths: An iterable of historical JSON file paths.
+        name: The period name reported as 'File'.
+        concurrency: How many files may be read and parsed at the same time.
+        errors: An optional list that (path, exception) tuples are appended to
+            for files that could not be read. Without it the first failure is raised.
+    Returns:
+        The part3 process_weather dictionary over every observation.
+    """
+    summary = HistoricalSummary(name)
+    oldest = None
+    async for path, data, error in iter_historical(paths, concurrency):
+        if error is not None:
+            if errors is None:
+                raise error
+            errors.append((path, error))
+            continue
+        with instrument.span("ingest.aggregate"):
+            for observation in data:
+                summary.add(observation)
+                if oldest is None or observation.epoch < oldest.epoch:
+                    oldest = observation
+        instrument.count("ingest.files")
+        instrument.count("ingest.records", len(data))
+    if oldest is not None:
+        summary.lastDate = oldest.date
+    return summary.result()
@@ -0,0 +1,197 @@
+"""Named timing spans and counters around each processing stage.
+
+Instrumentation is off by default. span() then hands back one shared no-op
+context manager and count() returns straight away, so the hooks cost a
+function call per stage (never per record) when nobody is looking.
+
+    from weather import instrument
+    instrument.enable()
+    with instrument.span("part3.parse_and_aggregate"):
+        ...
+    instrument.count("part3.records", len(data))
+    instrument.export("timings.csv")
+"""
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+from weather.dates import format_date, parse_iso
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+_enabled = False
+_spans = {}
+_counters = {}
+#the date caches keep their own hit counts, so remember where they stood at reset
+_cacheBase = {}
+_CACHED = (("dates.parse_iso", parse_iso), ("dates.format_date", format_date))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    """Starts recording spans and counters."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stops recording. Anything already recorded is kept until reset."""
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Forgets every recorded span and counter."""
+    _spans.clear()
+    _counters.clear()
+    for name, function in _CACHED:
+        info = function.cache_info()
+        _cacheBase[name] = (info.hits, info.misses)
+
+
+def span(name):
+    """Returns a context manager timing the block under the given stage name."""
+    if not _enabled:
+        return NULL_SPAN
+    return _Span(name)
+
+
+def record_span(name, seconds, calls=1):
+    """Adds time measured elsewhere to a named span.
+
+    For stages that run once per record, where a span each time would cost
+    more than the stage: time them with time.perf_counter and record the
+    totals once at the end.
+
+    Args:
+        name: The stage name.
+        seconds: The time spent in the stage.
+        calls: How many times the stage ran in that time.
+    """
+    if not _enabled:
+        return
+    stats = _spans.get(name)
+    if stats is None:
+        _spans[name] = [calls, seconds]
+    else:
+        stats[0] += calls
+        stats[1] += seconds
+
+
+def count(name, amount=1):
+    """Adds amount to a named counter, eg. records processed or bytes read."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def snapshot():
+    """Returns everything recorded so far.
+
+    Returns:
+        A dictionary with 'spans' (name -> {'calls', 'seconds'}) and 'counters'
+        (name -> value). The date parser cache hits and misses since the last
+        reset are included as counters.
+    """
+    counters = dict(_counters)
+    for name, function in _CACHED:
+        info = function.cache_info()
+        hits, misses = _cacheBase.get(name, (0, 0))
+        counters[f"{name}.cache_hits"] = info.hits - hits
+        counters[f"{name}.cache_misses"] = info.misses - misses
+    return {
+        "spans": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in _spans.items()},
+        "counters": counters,
+    }
+
+
+def export(path, snapshots=None):
+    """Writes per-stage timings to a .json or .csv file.
+
+    Args:
+        path: The file to write. A name ending in .csv gets one row per
+            (source, kind, name), anything else is written as JSON.
+        snapshots: A dictionary of source (eg. input file) -> snapshot. Defaults
+            to the current snapshot under the source name 'all'.
+    """
+    if snapshots is None:
+        snapshots = {"all": snapshot()}
+    if path.endswith(".csv"):
+        with open(path, "w", encoding='utf8', newline="") as write_file:
+            writer = csv.writer(write_file)
+            writer.writerow(["source", "kind", "name", "calls", "value"])
+            for source, snap in snapshots.items():
+                for name, stats in sorted(snap["spans"].items()):
+                    writer.writerow([source, "span", name, stats["calls"], f"{stats['seconds']:.6f}"])
+                for name, value in sorted(snap["counters"].items()):
+                    writer.writerow([source, "counter", name, "", value])
+    else:
+        with open(path, "w", encoding='utf8') as write_file:
+            json.dump(snapshots, write_file, indent=2)
+            write_file.write("\n")
+
+
+@contextmanager
+def profile(mode, output):
+    """Captures a cProfile or tracemalloc profile of the block.
+
+    Args:
+        mode: 'cprofile' writes pstats data (open it with python -m pstats),
+            'tracemalloc' writes the top allocation sites as text.
+        output: The file the profile is written to.
+    """
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output)
+    elif mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start(25)
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics("lineno")
+            tracemalloc.stop()
+            with open(output, "w", encoding='utf8') as write_file:
+                write_file.write(f"current {current} bytes, peak {peak} bytes\n\n")
+                for stat in stats[:50]:
+                    write_file.write(f"{stat}\n")
+    else:
+        raise ValueError(f"Unknown profile mode {mode!r}, expected one of {PROFILE_MODES}")
@@ -0,0 +1,316 @@
+"""Lazy, memory-mapped access to the records of a JSON weather file.
+
+The file is memory-mapped rather than read. Array elements and object members
+are found by a small scanner that counts brackets, letting a regex jump over
+everything else (strings and small balanced groups included) from one bracket
+to the next, so it takes time linear in the size of the text however deeply
+it nests. Nothing is decoded until it is asked for, and then only that value:
+
+    with LazyDocument("data/forecast_10days.json") as document:
+        for day in document.array("DailyForecasts"):
+            day["Temperature"]["Minimum"]["Value"]
+
+Elements are found as they are iterated, so the first record is ready before
+the rest of the file has been looked at, and an object's members are only
+indexed as far as the last key asked for. Records only borrow the mapping, so
+use them before the document is closed.
+"""
+import json
+import mmap
+import re
+
+#how deeply nested a group of brackets may be for the scanner to skip it in one regex match
+SKIP_DEPTH = 6
+
+#one JSON string, written so a match can never backtrack more than linearly
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_STRING_VALUE = re.compile(_STRING)
+#the key of a member, up to where its value starts
+_KEY = re.compile(rb'\s*(' + _STRING + rb')\s*:\s*')
+#a number, true, false or null
+_SCALAR = re.compile(rb'[^\s,\]}]+')
+
+
+def _skip_pattern(depth):
+    """Builds a regex matching everything up to and including the next bracket that is not
+    inside a string or a balanced group nesting at most depth deep.
+
+    Every part of the pattern starts with a different character, so there is only
+    ever one way to match and a failed match gives back each character a bounded
+    number of times. Deeper groups are left to _value_end's bracket counting.
+    """
+    fill = rb'[^"{}\[\]]*'
+    group = rb'[{\[]' + fill + rb'(?:' + _STRING + fill + rb')*[}\]]'
+    for _ in range(depth - 1):
+        group = rb'[{\[]' + fill + rb'(?:(?:' + _STRING + rb'|' + group + rb')' + fill + rb')*[}\]]'
+    return re.compile(fill + rb'(?:(?:' + _STRING + rb'|' + group + rb')' + fill + rb')*([{}\[\]])')
+
+
+_TO_BRACKET = _skip_pattern(SKIP_DEPTH)
+#the comma, bracket or brace after a value
+_SEPARATOR = re.compile(rb'\s*([,\]}])')
+_SPACE = re.compile(rb'\s*')
+_CLOSE = re.compile(rb'\s*[\]}]')
+_WHITESPACE = b" \t\n\r"
+
+
+def _decode_key(token):
+    if b"\\" in token:
+        return json.loads(token)
+    return str(token[1:-1], 'utf8')
+
+
+def _value(buf, start, end):
+    """Decodes buf[start:end] or wraps it lazily if it is an object or array."""
+    first = buf[start]
+    if first == 0x7b:
+        return LazyRecord(buf, start, end)
+    if first == 0x5b:
+        return LazyArray(buf, start, end)
+    return json.loads(buf[start:end])
+
+
+def _malformed(position):
+    return ValueError(f"Malformed JSON at offset {position}")
+
+
+def _value_end(buf, start):
+    """Returns where the JSON value starting at buf[start] ends.
+
+    Brackets are counted rather than paired up by type, which valid JSON never
+    needs, and a bracket inside a string is skipped along with the string.
+    """
+    first = buf[start]
+    if first != 0x7b and first != 0x5b:
+        match = (_STRING_VALUE if first == 0x22 else _SCALAR).match(buf, start)
+        if match is None:
+            raise _malformed(start)
+        return match.end()
+    match = _TO_BRACKET.match
+    depth = 1
+    position = start + 1
+    while True:
+        found = match(buf, position)
+        if found is None:
+            raise _malformed(start)
+        position = found.end()
+        if found.group(1) in b"{[":
+            depth += 1
+        else:
+            depth -= 1
+            if not depth:
+                return position
+
+
+def _item(buf, position, close):
+    """Finds the value starting at or after position and the separator after it.
+
+    Returns:
+        A tuple of the value's (start, end), whether the separator was close
+        rather than a comma, and where the next item starts.
+    """
+    start = _SPACE.match(buf, position).end()
+    if start >= len(buf):
+        raise _malformed(start)
+    end = _value_end(buf, start)
+    match = _SEPARATOR.match(buf, end)
+    if match is None or match.group(1) not in (b",", close):
+        raise _malformed(end)
+    return (start, end), match.group(1) == close, match.end()
+
+
+def _find_key(buf, start, key):
+    """Returns where the value of a key of the object at buf[start] begins.
+
+    Members in front of it are skipped whole, and its own value is not scanned
+    at all, so finding a large array does not read through it.
+    """
+    position = start + 1
+    if _CLOSE.match(buf, position):
+        raise KeyError(key)
+    while True:
+        match = _KEY.match(buf, position)
+        if match is None:
+            raise _malformed(position)
+        if _decode_key(match.group(1)) == key:
+            return match.end()
+        _, last, position = _item(buf, match.end(), b"}")
+        if last:
+            raise KeyError(key)
+
+
+class LazyRecord:
+    """A JSON object whose values are decoded only when they are read.
+
+    Args:
+        buf: The buffer (usually an mmap) holding the document.
+        start, end: Where the object's text starts and ends in buf, end being
+            None if it is not known yet.
+    """
+
+    __slots__ = ("buf", "start", "end", "_index", "_next")
+
+    def __init__(self, buf, start, end=None):
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self._index = {}
+        #where the next unindexed member starts, None once every member is indexed
+        empty = _CLOSE.match(buf, start + 1)
+        if empty is not None:
+            self._next = None
+            self.end = empty.end()
+        else:
+            self._next = start + 1
+
+    def _scan(self, key=None):
+        """Indexes members until key (or, if key is None, every member) is found."""
+        buf = self.buf
+        index = self._index
+        position = self._next
+        while position is not None:
+            match = _KEY.match(buf, position)
+            if match is None:
+                raise _malformed(position)
+            name = _decode_key(match.group(1))
+            index[name], last, position = _item(buf, match.end(), b"}")
+            if last:
+                self.end = position
+                position = None
+            if name == key:
+                break
+        self._next = position
+
+    def _span(self, key):
+        span = self._index.get(key)
+        if span is None:
+            self._scan(key)
+            span = self._index[key]
+        return span
+
+    def __getitem__(self, key):
+        start, end = self._span(key)
+        return _value(self.buf, start, end)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self._span(key)
+        except KeyError:
+            return False
+        return True
+
+    def keys(self):
+        self._scan()
+        return list(self._index)
+
+    def items(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def to_dict(self):
+        """Decodes the whole object."""
+        if self.end is None:
+            self._scan()
+        return json.loads(self.buf[self.start:self.end])
+
+
+class LazyArray:
+    """A JSON array whose elements are found and decoded as they are iterated.
+
+    Args:
+        buf: The buffer (usually an mmap) holding the document.
+        start, end: Where the array's text starts and ends in buf, end being
+            None if it is not known yet.
+    """
+
+    __slots__ = ("buf", "start", "end", "_spans")
+
+    def __init__(self, buf, start, end=None):
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self._spans = None
+
+    def __iter__(self):
+        buf = self.buf
+        if self._spans is not None:
+            for start, end in self._spans:
+                yield _value(buf, start, end)
+            return
+        spans = []
+        position = self.start + 1
+        empty = _CLOSE.match(buf, position)
+        if empty is not None:
+            position = empty.end()
+        else:
+            last = False
+            while not last:
+                (start, end), last, position = _item(buf, position, b"]")
+                spans.append((start, end))
+                yield _value(buf, start, end)
+        self.end = position
+        self._spans = spans
+
+    def __len__(self):
+        if self._spans is None:
+            for _ in self:
+                pass
+        return len(self._spans)
+
+
+class LazyDocument:
+    """A memory-mapped JSON file.
+
+    Args:
+        path: The JSON file to map.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as read_file:
+            try:
+                self.buf = mmap.mmap(read_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"{path} is empty") from None
+
+    def _start(self):
+        position = 3 if self.buf[:3] == b"\xef\xbb\xbf" else 0
+        while self.buf[position] in _WHITESPACE:
+            position += 1
+        return position
+
+    def root(self):
+        """Returns the top level value, lazily if it is an object or array."""
+        start = self._start()
+        if self.buf[start] in b"{[":
+            return _value(self.buf, start, None)
+        return json.loads(self.buf[start:])
+
+    def array(self, key=None):
+        """Returns the array under a top level key, or the top level array if key is None.
+
+        Only the part of the file in front of the array is scanned to find it.
+        """
+        start = self._start()
+        if key is not None:
+            if self.buf[start] != 0x7b:
+                raise ValueError(f"{self.path} does not hold a JSON object")
+            start = _find_key(self.buf, start, key)
+        if self.buf[start] != 0x5b:
+            raise ValueError(f"{self.path} does not hold an array{'' if key is None else ' under ' + key}")
+        return LazyArray(self.buf, start)
+
+    def close(self):
+        self.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,373 @@
+"""Out-of-core part3 summaries of historical archives larger than memory.
+
+weather.aggregate.HistoricalSummary keeps one list entry per observation for
+overallTs, overallRFTs, Mins and Maxs, so its memory grows with the archive.
+ChunkedSummary takes the same observations a fixed-size chunk at a time. Each
+chunk is boiled down to a PartialSummary holding only mergeable states:
+
+    MinsGroup, MaxGroup  MinWithLabel / MaxWithLabel, the earlier chunk keeping a tie
+    Rain24mm, DaylightHour, MaxUV  Sum, Count, Max
+    the frequency tables  a Counter per categorical field
+    the box plots  a QuantileSketch per series
+
+and merged into the running total before the next chunk is read. Memory is
+then set by chunk_size and the sketches' max_bins, whatever the archive's
+size. With a spill directory the per-observation series are also appended to
+float64 files there, and come back in the result as read-only numpy.memmap
+arrays rather than lists.
+
+The sketches give the quartiles, fences and mean plotly draws a box plot from,
+exact for temperatures recorded to one decimal place until a series needs
+more than max_bins distinct values. part3 plots them with BOX_STATS_TEMPLATE.
+"""
+import os
+from array import array
+from collections import Counter
+
+from weather.aggregate import CATEGORICAL_FIELDS, Count, Max, MaxWithLabel, MinWithLabel, Sum
+from weather.categorical import frequency_table
+from weather.dates import SHORT_DATE_FORMAT, format_date
+
+DEFAULT_CHUNK_SIZE = 50000
+#temperatures are recorded to a tenth of a degree, so this keeps every distinct value
+DEFAULT_RESOLUTION = 0.1
+DEFAULT_MAX_BINS = 4096
+
+#the per-observation series of a part3 summary, and the box plot statistics key of each
+SERIES = ("overallTs", "overallRFTs", "Mins", "Maxs")
+BOX_STATS = {key: f"{key}Box" for key in SERIES}
+
+#which observation a ChunkedSummary reports as 'Date'
+LAST = "last"
+OLDEST = "oldest"
+
+
+def _paired(bins):
+    #bin key k holds values around k * resolution, so k and k + 1 share a bin twice as wide
+    paired = Counter()
+    for key, count in bins.items():
+        paired[(key + 1) // 2] += count
+    return paired
+
+
+class QuantileSketch:
+    """A mergeable histogram of values, for approximate quantiles in bounded memory.
+
+    Values are counted in bins resolution wide. Whenever there are more than
+    max_bins bins, neighbouring bins are paired up and the resolution doubles,
+    so memory never depends on how many values are added. The count, mean,
+    minimum and maximum are always exact.
+
+    Args:
+        resolution: The starting bin width. Quantiles are exact while every
+            value is a multiple of it and no coarsening has happened.
+        max_bins: The most bins kept.
+    """
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, max_bins=DEFAULT_MAX_BINS):
+        if max_bins < 2:
+            raise ValueError("A QuantileSketch needs at least 2 bins")
+        self.base = resolution
+        self.level = 0
+        self.maxBins = max_bins
+        self.bins = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    @property
+    def resolution(self):
+        return self.base * 2 ** self.level
+
+    def __len__(self):
+        return self.count
+
+    def extend(self, values):
+        """Adds an array-like of numbers."""
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        keys, counts = np.unique(np.rint(values / self.resolution).astype(np.int64), return_counts=True)
+        self.bins.update(dict(zip(keys.tolist(), counts.tolist())))
+        self.count += len(values)
+        self.total += float(values.sum())
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        while len(self.bins) > self.maxBins:
+            self._coarsen()
+
+    def _coarsen(self):
+        self.bins = _paired(self.bins)
+        self.level += 1
+
+    def merge(self, other):
+        """Folds in the values of another sketch started with the same resolution."""
+        if other.base != self.base:
+            raise ValueError(f"Cannot merge sketches of resolution {self.base} and {other.base}")
+        if not other.count:
+            return
+        bins = other.bins
+        for _ in range(other.level, self.level):
+            bins = _paired(bins)
+        while self.level < other.level:
+            self._coarsen()
+        self.bins.update(bins)
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        while len(self.bins) > self.maxBins:
+            self._coarsen()
+
+    def _sorted(self):
+        import numpy as np
+
+        keys = np.array(sorted(self.bins), dtype=np.int64)
+        counts = np.array([self.bins[key] for key in keys.tolist()], dtype=np.int64)
+        return keys * self.resolution, np.cumsum(counts)
+
+    def quantile(self, q):
+        """Returns the q quantile, interpolated the way plotly's default 'linear' quartile method does.
+
+        Args:
+            q: A fraction between 0 and 1, eg. 0.25 for the first quartile.
+        Returns:
+            The quantile as a float, or None if nothing has been added.
+        """
+        if not self.count:
+            return None
+        values, ends = self._sorted()
+        return self._interpolate(values, ends, q)
+
+    def _interpolate(self, values, ends, q):
+        def at(rank):
+            #the exact extremes are known, so do not round them to a bin
+            if rank == 0:
+                return self.min
+            if rank == self.count - 1:
+                return self.max
+            return float(values[ends.searchsorted(rank, side="right")])
+
+        position = min(max(q * self.count - 0.5, 0), self.count - 1)
+        lower = int(position)
+        fraction = position - lower
+        if not fraction:
+            return at(lower)
+        return (1 - fraction) * at(lower) + fraction * at(lower + 1)
+
+    def box(self, ndigits=2):
+        """Returns the statistics of a plotly box trace, as q1, median, q3, lowerfence, upperfence and mean.
+
+        Each is a one item list, as plotly takes one list entry per box. The
+        fences are the furthest values within 1.5 times the interquartile
+        range of the box, as plotly draws the whiskers. Nothing is returned
+        if nothing has been added.
+        """
+        if not self.count:
+            return {}
+        values, ends = self._sorted()
+        q1, median, q3 = (self._interpolate(values, ends, q) for q in (0.25, 0.5, 0.75))
+        spread = 1.5 * (q3 - q1)
+        inside = values[(values >= q1 - spread) & (values <= q3 + spread)]
+        lowest = self.min if self.min >= q1 - spread else float(inside.min(initial=q1))
+        highest = self.max if self.max <= q3 + spread else float(inside.max(initial=q3))
+        stats = {
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "lowerfence": min(lowest, q1),
+            "upperfence": max(highest, q3),
+            "mean": self.total / self.count,
+        }
+        return {key: [round(value, ndigits)] for key, value in stats.items()}
+
+
+class SpilledSeries:
+    """A float64 series appended to a file rather than kept in memory.
+
+    Args:
+        path: The file the values are written to, replacing any already there.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.length = 0
+        self._file = open(path, "wb")
+
+    def __len__(self):
+        return self.length
+
+    def extend(self, values):
+        values = array('d', values)
+        values.tofile(self._file)
+        self.length += len(values)
+
+    def values(self):
+        """Finishes the file and returns the series as a read-only numpy.memmap."""
+        import numpy as np
+
+        if not self._file.closed:
+            self._file.close()
+        if not self.length:
+            return np.empty(0, dtype=np.float64)
+        return np.memmap(self.path, dtype=np.float64, mode="r", shape=(self.length,))
+
+
+class PartialSummary:
+    """The mergeable part3 aggregates of a run of observations.
+
+    Args:
+        resolution: The QuantileSketch resolution of each series.
+        max_bins: The most bins kept by each QuantileSketch.
+    """
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, max_bins=DEFAULT_MAX_BINS):
+        self.lastDate = None
+        self.oldest = None
+        self.minTemp = MinWithLabel()
+        self.maxTemp = MaxWithLabel()
+        self.rain = Sum()
+        self.daylight = Count()
+        self.maxUV = Max()
+        self.frequencies = {key: Counter() for key, _, _ in CATEGORICAL_FIELDS}
+        self.sketches = {key: QuantileSketch(resolution, max_bins) for key in SERIES}
+
+    @classmethod
+    def from_chunk(cls, observations, resolution=DEFAULT_RESOLUTION, max_bins=DEFAULT_MAX_BINS):
+        """Aggregates one chunk of weather.records.Observation records.
+
+        Returns:
+            A tuple of the PartialSummary and a dictionary of each name in
+            SERIES to the chunk's values of it, for spilling.
+        """
+        partial = cls(resolution, max_bins)
+        series = {key: [] for key in SERIES}
+        temperatures, realFeels, mins, maxs = (series[key] for key in SERIES)
+        for observation in observations:
+            temperatures.append(observation.temperature)
+            realFeels.append(observation.realFeel)
+            for group, mn, mx in observation.ranges:
+                partial.minTemp.add(mn, group)
+                mins.append(mn)
+                partial.maxTemp.add(mx, group)
+                maxs.append(mx)
+            partial.rain.add(observation.rain)
+            partial.daylight.add(observation.isDay)
+            partial.maxUV.add(observation.uv)
+            if partial.oldest is None or observation.epoch < partial.oldest[0]:
+                partial.oldest = (observation.epoch, observation.date)
+        if observations:
+            partial.lastDate = observations[-1].date
+        for key, _, attribute in CATEGORICAL_FIELDS:
+            partial.frequencies[key].update(getattr(observation, attribute) for observation in observations)
+        for key in SERIES:
+            partial.sketches[key].extend(series[key])
+        return partial, series
+
+    def merge(self, other):
+        """Folds in the aggregates of the observations that came after these ones."""
+        if other.lastDate is not None:
+            self.lastDate = other.lastDate
+        if other.oldest is not None and (self.oldest is None or other.oldest[0] < self.oldest[0]):
+            self.oldest = other.oldest
+        self.minTemp.merge(other.minTemp)
+        self.maxTemp.merge(other.maxTemp)
+        self.rain.merge(other.rain)
+        self.daylight.merge(other.daylight)
+        self.maxUV.merge(other.maxUV)
+        for key, counter in other.frequencies.items():
+            self.frequencies[key].update(counter)
+        for key, sketch in other.sketches.items():
+            self.sketches[key].merge(sketch)
+
+
+class ChunkedSummary:
+    """A drop in for weather.aggregate.HistoricalSummary whose memory does not grow with the input.
+
+    Observations are buffered until chunk_size of them have been added, then
+    aggregated into a PartialSummary and merged into the total. The result
+    holds every HistoricalSummary key except the per-observation series,
+    plus a BOX_STATS key of box plot statistics (see QuantileSketch.box) for
+    each of them. With spill set the series are there too, as numpy.memmap
+    arrays of SERIES.f64 files in a new directory of their own inside spill
+    (spillDirectory), so summaries spilling to the same place never share files.
+
+    Args:
+        name: The period name reported as 'File'.
+        chunk_size: How many observations are held in memory at once.
+        spill: An optional directory to write the per-observation series to,
+            created if missing.
+        resolution: The QuantileSketch resolution, in degrees.
+        max_bins: The most bins each QuantileSketch keeps.
+        date: LAST to report the date of the last observation added as 'Date',
+            like HistoricalSummary, or OLDEST for the oldest one, for
+            observations from many files read in no particular order.
+    """
+
+    def __init__(self, name, chunk_size=DEFAULT_CHUNK_SIZE, spill=None, resolution=DEFAULT_RESOLUTION,
+                 max_bins=DEFAULT_MAX_BINS, date=LAST):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if date not in (LAST, OLDEST):
+            raise ValueError(f"date must be {LAST!r} or {OLDEST!r}, got {date!r}")
+        self.name = name
+        self.date = date
+        self.chunkSize = chunk_size
+        self.resolution = resolution
+        self.maxBins = max_bins
+        self.total = PartialSummary(resolution, max_bins)
+        self.chunk = []
+        self.spilled = None
+        self.spillDirectory = None
+        if spill is not None:
+            import tempfile
+            os.makedirs(spill, exist_ok=True)
+            self.spillDirectory = tempfile.mkdtemp(prefix=f"{name}.", dir=spill)
+            self.spilled = {key: SpilledSeries(os.path.join(self.spillDirectory, f"{key}.f64")) for key in SERIES}
+
+    def add(self, observation):
+        """Adds one weather.records.Observation, aggregating the chunk once it is full."""
+        self.chunk.append(observation)
+        if len(self.chunk) >= self.chunkSize:
+            self.flush()
+
+    def flush(self):
+        """Aggregates the observations added since the last chunk."""
+        if not self.chunk:
+            return
+        partial, series = PartialSummary.from_chunk(self.chunk, self.resolution, self.maxBins)
+        self.total.merge(partial)
+        if self.spilled is not None:
+            for key, values in series.items():
+                self.spilled[key].extend(values)
+        self.chunk = []
+
+    def result(self):
+        self.flush()
+        total = self.total
+        if self.date == OLDEST:
+            date = total.oldest[1] if total.oldest is not None else None
+        else:
+            date = total.lastDate
+        result = {
+            "File": self.name,
+            "Date": format_date(date, SHORT_DATE_FORMAT) if date else None,
+            "DaylightHour": total.daylight.result(),
+            "MaxUV": total.maxUV.result(),
+            "MinsGroup": total.minTemp.result(),
+            "MaxGroup": total.maxTemp.result(),
+            "Rain24mm": total.rain.result(),
+        }
+        for key in SERIES:
+            result[BOX_STATS[key]] = total.sketches[key].box()
+            if self.spilled is not None:
+                result[key] = self.spilled[key].values()
+        for key, freqKey, _ in CATEGORICAL_FIELDS:
+            counter = total.frequencies[key]
+            result[key], result[freqKey] = frequency_table(list(counter), list(counter.values()))
+        return result
+
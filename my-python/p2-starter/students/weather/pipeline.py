@@ -0,0 +1,120 @@
+"""One pass over a weather file, feeding every output made from it.
+
+part1's report and part2's chart of the same forecast file, or part3's summary
+and charts of the same historical file, each used to parse the file again.
+Here weather.records.iter_records parses and normalizes a file once, and
+feed hands every record to every sink:
+
+    forecast    part1.ReportSink (the text report), SeriesSink (part2's series)
+    historical  weather.aggregate.HistoricalSummary (part3's summary and charts)
+
+A sink is anything with add(record) and result(), like the accumulators in
+weather.aggregate. build_outputs wires up the sinks a file needs and writes
+the outputs asked for. It is what weather.watch runs for each changed input,
+so a one-off run over whole directories is:
+
+    python -m weather.watch part1/data part3/data --figures charts --once
+"""
+import os
+
+from weather import instrument
+from weather.aggregate import HistoricalSummary
+from weather.files import FORECAST, atomic_write, detect_kind, import_parts, output_path
+from weather.plotting import export_figures
+from weather.records import iter_records
+
+#what build_outputs can write for a file
+REPORT = "report"
+FIGURES = "figures"
+
+
+class SeriesSink:
+    """Builds part2's ForecastTable from weather.records.ForecastDay records as they arrive."""
+
+    def __init__(self):
+        from weather.table import ForecastTableBuilder
+        self.builder = ForecastTableBuilder()
+
+    def add(self, day):
+        self.builder.add(day)
+
+    def result(self):
+        return self.builder.result()
+
+
+def feed(records, sinks):
+    """Hands every record to every sink in a single pass.
+
+    Args:
+        records: An iterable of records, eg. from iter_records.
+        sinks: A list of objects with an add(record) method.
+    Returns:
+        The number of records fed.
+    """
+    adds = [sink.add for sink in sinks]
+    count = 0
+    for record in records:
+        for add in adds:
+            add(record)
+        count += 1
+    return count
+
+
+def _write_text(path, chunks):
+    with atomic_write(path) as write_file:
+        write_file.writelines(chunks)
+    return path
+
+
+def build_outputs(path, outputs=(REPORT,), figures=None, formats=("html",), cache=None, max_points=None):
+    """Builds the outputs of one weather file from a single parse.
+
+    Args:
+        path: A string representing the file path to a JSON weather file.
+        outputs: Any of REPORT, the text file weather.batch writes next to
+            the input, and FIGURES, the part2 or part3 charts.
+        figures: The directory FIGURES charts are written to.
+        formats: The chart formats, any of 'html', 'json' and 'svg'.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+        max_points: If set, long forecast series are thinned out to about this
+            many days in the chart.
+    Returns:
+        A dictionary of each output in outputs to the list of paths written.
+    """
+    if FIGURES in outputs and figures is None:
+        raise ValueError("A figures directory is needed to write figures")
+    import_parts()
+    kind = detect_kind(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    written = {}
+
+    if kind == FORECAST:
+        import part1
+        import part2
+        sinks = {}
+        if REPORT in outputs:
+            sinks[REPORT] = part1.ReportSink(path)
+        if FIGURES in outputs:
+            sinks[FIGURES] = SeriesSink()
+        with instrument.span("pipeline.parse_and_feed"):
+            feed(iter_records(path, kind, cache), list(sinks.values()))
+        if REPORT in sinks:
+            written[REPORT] = [_write_text(output_path(path, kind), sinks[REPORT].result())]
+        if FIGURES in sinks:
+            process_dict = sinks[FIGURES].result().to_dict()
+            if max_points:
+                from weather.downsample import downsample
+                process_dict = downsample(process_dict, max_points)
+            written[FIGURES] = export_figures([(name, part2.FORECAST_TEMPLATE.spec(process_dict))], figures, formats)
+        return written
+
+    import part3
+    summary = HistoricalSummary(part3.period_name(path))
+    with instrument.span("pipeline.parse_and_feed"):
+        feed(iter_records(path, kind, cache), [summary])
+    result = summary.result()
+    if REPORT in outputs:
+        written[REPORT] = [_write_text(output_path(path, kind), part3.iter_summary(result))]
+    if FIGURES in outputs:
+        written[FIGURES] = export_figures(part3.iter_figures(name, result), figures, formats)
+    return written
@@ -0,0 +1,163 @@
+"""Figure specs built from trace templates, and batch export without a browser.
+
+A figure spec is the plain {'data': [...], 'layout': {...}} dictionary plotly
+accepts anywhere it takes a Figure. Building one from a FigureTemplate is a
+few dictionary copies, so thousands of charts cost far less than building and
+validating a plotly Figure for each.
+
+export_figures writes specs to HTML, JSON or SVG files. Every HTML page in a
+directory loads the same plotly.min.js (written once next to them, or taken
+from the CDN) rather than embedding its own multi-megabyte copy.
+"""
+import html
+import json
+import os
+
+from weather import instrument
+
+FORMATS = ("html", "json", "svg")
+PLOTLYJS_FILE = "plotly.min.js"
+#plotly-latest.min.js is frozen at plotly.js 1.x, so pages load the version the installed plotly ships
+PLOTLYJS_CDN = "https://cdn.plot.ly/plotly-{version}.min.js"
+
+#trace keys naming a process_weather dictionary key to take the values from
+DATA_FIELDS = ("x", "y")
+#trace key naming a process_weather dictionary key holding more trace settings, eg. a box's q1, median and q3
+STATS_FIELD = "stats"
+
+_HTML = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{title}</title><script src="{src}"></script></head>
+<body>
+<div id="figure" style="width:100%;height:100vh;"></div>
+<script>var spec = {spec}; Plotly.newPlot("figure", spec.data, spec.layout, {{responsive: true}});</script>
+</body>
+</html>
+"""
+
+
+class FigureTemplate:
+    """The styling of a chart, filled in with each file's data to make a figure spec.
+
+    Specs go straight to plotly.js, so the layout uses nested keys such as
+    {'xaxis': {'title': {'text': ...}}} rather than plotly's xaxis_title shorthand.
+
+    Args:
+        traces: A list of plotly trace dictionaries. The x and y entries name the
+            process_weather dictionary key holding the values rather than the
+            values themselves. A stats entry names a key holding a dictionary
+            of settings to add to the trace, such as precomputed box statistics.
+        title: The chart title. It may hold {Key} fields, filled in from the
+            process_weather dictionary.
+        layout: Any other plotly layout settings.
+    """
+
+    def __init__(self, traces, title, layout=None):
+        self.traces = [dict(trace) for trace in traces]
+        self.title = title
+        self.layout = dict(layout or {})
+
+    def spec(self, process_dict):
+        """Returns the figure spec for one process_weather dictionary."""
+        data = []
+        for trace in self.traces:
+            trace = dict(trace)
+            for field in DATA_FIELDS:
+                if field in trace:
+                    trace[field] = process_dict[trace[field]]
+            if STATS_FIELD in trace:
+                trace.update(process_dict[trace.pop(STATS_FIELD)])
+            data.append(trace)
+        layout = dict(self.layout, title={"text": self.title.format_map(process_dict)})
+        return {"data": data, "layout": layout}
+
+
+def axis_titles(x, y):
+    """Returns the layout settings labelling both axes."""
+    return {"xaxis": {"title": {"text": x}}, "yaxis": {"title": {"text": y}}}
+
+
+def to_figure(spec):
+    """Builds a plotly Figure from a spec, for showing it or further editing."""
+    #plotly takes longer to import than everything else here, so only load it for a chart
+    with instrument.span("plotly.import"):
+        import plotly.graph_objects as go
+    return go.Figure(spec)
+
+
+def _write_plotlyjs(directory, plotlyjs):
+    if plotlyjs == "cdn":
+        with instrument.span("plotly.import"):
+            from plotly.offline import get_plotlyjs_version
+        return PLOTLYJS_CDN.format(version=get_plotlyjs_version())
+    path = os.path.join(directory, PLOTLYJS_FILE)
+    if not os.path.exists(path):
+        with instrument.span("plotly.import"):
+            from plotly.offline import get_plotlyjs
+        #worker processes may export into the same directory at once
+        partial = f"{path}.{os.getpid()}.partial"
+        with open(partial, "w", encoding='utf8') as write_file:
+            write_file.write(get_plotlyjs())
+        os.replace(partial, path)
+    return PLOTLYJS_FILE
+
+
+def _write_svgs(specs, paths):
+    try:
+        import plotly.io as pio
+    except ImportError as error:
+        raise RuntimeError("SVG export needs plotly and kaleido installed") from error
+    try:
+        #newer plotly renders a whole batch with one kaleido browser
+        write_images = pio.write_images
+    except AttributeError:
+        for spec, path in zip(specs, paths):
+            pio.write_image(spec, path, format="svg")
+    else:
+        write_images(specs, paths, format="svg")
+
+
+def export_figures(figures, directory, formats=("html",), plotlyjs="directory"):
+    """Writes figure specs to files, one file per figure and format.
+
+    Args:
+        figures: An iterable of (name, figure spec) tuples. name becomes the
+            file name without its extension.
+        directory: The directory the files are written to, created if missing.
+        formats: Any of 'html', 'json' and 'svg'. SVG needs kaleido installed.
+        plotlyjs: 'directory' to write plotly.min.js next to the HTML pages once,
+            or 'cdn' to have the pages load the same version from the plotly CDN.
+    Returns:
+        The list of paths written, not counting plotly.min.js.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export formats {sorted(unknown)}, expected some of {FORMATS}")
+    os.makedirs(directory, exist_ok=True)
+    src = _write_plotlyjs(directory, plotlyjs) if "html" in formats else None
+
+    written = []
+    svgSpecs = []
+    svgPaths = []
+    with instrument.span("plotting.export"):
+        for name, spec in figures:
+            base = os.path.join(directory, name)
+            text = json.dumps(spec)
+            if "json" in formats:
+                with open(base + ".json", "w", encoding='utf8') as write_file:
+                    write_file.write(text)
+                written.append(base + ".json")
+            if "html" in formats:
+                title = spec.get("layout", {}).get("title", {}).get("text", name)
+                with open(base + ".html", "w", encoding='utf8') as write_file:
+                    #a '</' inside the JSON would end the script block early
+                    write_file.write(_HTML.format(title=html.escape(title), src=src, spec=text.replace("</", "<\\/")))
+                written.append(base + ".html")
+            if "svg" in formats:
+                svgSpecs.append(spec)
+                svgPaths.append(base + ".svg")
+            instrument.count("plotting.figures")
+        if svgSpecs:
+            _write_svgs(svgSpecs, svgPaths)
+            written.extend(svgPaths)
+    return written
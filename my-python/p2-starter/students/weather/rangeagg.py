@@ -0,0 +1,169 @@
+"""Precomputed structures answering part3's metrics over any range in O(1).
+
+Additive metrics (rain, daylight hours) use prefix sums, so a range total is
+one subtraction. Minimum and maximum metrics use sparse tables: the best index
+of every power-of-two long run is stored, and any range is covered by two
+overlapping runs. Category counts keep the sorted positions of each category
+and binary search them, which costs O(log n) per category but only O(n) memory
+however many categories there are. Building costs O(n log n) once; after that
+a query's cost does not grow with the width of the range.
+"""
+import numpy as np
+
+from weather.aggregate import CATEGORICAL_FIELDS
+from weather.categorical import CategoricalColumn, frequency_table
+from weather.dates import SHORT_DATE_FORMAT, format_date
+
+
+class PrefixSum:
+    """Range totals of a sequence in O(1).
+
+    Args:
+        values: A sequence of numbers.
+    """
+
+    def __init__(self, values):
+        self.totals = np.concatenate(([0], np.cumsum(np.asarray(values, dtype=np.float64))))
+
+    def total(self, lo, hi):
+        """Returns the sum of values[lo:hi]."""
+        if hi <= lo:
+            return 0
+        return float(self.totals[hi] - self.totals[lo])
+
+
+class SparseTable:
+    """Position of the smallest or largest value of any range in O(1).
+
+    Among equal values the later position wins.
+
+    Args:
+        values: A sequence of numbers.
+        smallest: True to find minimums, False for maximums.
+    """
+
+    def __init__(self, values, smallest):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.smallest = smallest
+        #levels[k][i] is the best position in values[i:i + 2**k]
+        self.levels = [np.arange(len(self.values))]
+        width = 1
+        while 2 * width <= len(self.values):
+            previous = self.levels[-1]
+            left = previous[:-width]
+            right = previous[width:]
+            if smallest:
+                takeRight = self.values[right] <= self.values[left]
+            else:
+                takeRight = self.values[right] >= self.values[left]
+            self.levels.append(np.where(takeRight, right, left))
+            width *= 2
+
+    def best(self, lo, hi):
+        """Returns the position of the best value in values[lo:hi], or None if the range is empty."""
+        if hi <= lo:
+            return None
+        k = (hi - lo).bit_length() - 1
+        left = int(self.levels[k][lo])
+        right = int(self.levels[k][hi - (1 << k)])
+        leftValue = self.values[left]
+        rightValue = self.values[right]
+        if leftValue == rightValue:
+            return max(left, right)
+        if (leftValue < rightValue) == self.smallest:
+            return left
+        return right
+
+
+class CategoryPositions:
+    """How often each category code occurs in any range in O(k log n).
+
+    Args:
+        codes: A sequence of category codes, each in range(size).
+        size: How many categories there are.
+    """
+
+    def __init__(self, codes, size):
+        codes = np.asarray(codes, dtype=np.intp)
+        #the positions of code k are positions[starts[k]:starts[k + 1]], in ascending order
+        self.positions = np.argsort(codes, kind="stable")
+        self.starts = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=size)))).astype(np.intp)
+
+    def counts(self, lo, hi):
+        """Returns a list of how many times each code occurs in codes[lo:hi]."""
+        result = []
+        for k in range(len(self.starts) - 1):
+            positions = self.positions[self.starts[k]:self.starts[k + 1]]
+            result.append(int(positions.searchsorted(hi) - positions.searchsorted(lo)) if hi > lo else 0)
+        return result
+
+
+class RangeAggregates:
+    """part3's metrics over any run of observations sorted oldest first.
+
+    Ties are settled as weather.aggregate.HistoricalSummary settles them for
+    a newest first file: the newest observation wins, then the first
+    TemperatureSummary range listed.
+
+    Args:
+        observations: A list of weather.records.Observation, oldest first.
+    """
+
+    def __init__(self, observations):
+        self.observations = observations
+        self.rain = PrefixSum([obs.rain for obs in observations])
+        self.daylight = PrefixSum([obs.isDay for obs in observations])
+        self.uv = SparseTable([obs.uv for obs in observations], smallest=False)
+
+        #one entry per (observation, range), ranges reversed so a later entry is the preferred tie
+        self.entries = [(group, mn, mx) for obs in observations for group, mn, mx in reversed(obs.ranges)]
+        self.entryStarts = np.concatenate(([0], np.cumsum([len(obs.ranges) for obs in observations]))).astype(np.intp)
+        self.minTemp = SparseTable([mn for _, mn, _ in self.entries], smallest=True)
+        self.maxTemp = SparseTable([mx for _, _, mx in self.entries], smallest=False)
+
+        #Observation attribute -> (column, CategoryPositions)
+        self.categoryCounts = {}
+        for _, _, attribute in CATEGORICAL_FIELDS:
+            column = CategoricalColumn()
+            column.extend(getattr(obs, attribute) for obs in observations)
+            codes = np.frombuffer(column.codes, dtype=np.intc)
+            self.categoryCounts[attribute] = (column, CategoryPositions(codes, len(column.encoder)))
+
+    def __len__(self):
+        return len(self.observations)
+
+    def frequencies(self, lo, hi, attribute="text"):
+        """Returns the frequency table of an Observation attribute over observations[lo:hi], lo <= hi.
+
+        Returns:
+            A (categories, counts) tuple, see weather.categorical.frequency_table.
+        """
+        column, positions = self.categoryCounts[attribute]
+        return frequency_table(column.encoder.categories, positions.counts(lo, hi))
+
+    def summary(self, lo, hi, name):
+        """Works out the part3 metrics of observations[lo:hi], lo <= hi.
+
+        Returns:
+            A dictionary with the File, Date, DaylightHour, MaxUV, MinsGroup,
+            MaxGroup, Rain24mm and category frequency keys of part3's
+            process_weather dictionary. The per-observation lists are left out
+            since building them is linear in the range.
+        """
+        uv = self.uv.best(lo, hi)
+        entryLo = int(self.entryStarts[lo])
+        entryHi = int(self.entryStarts[hi])
+        minEntry = self.minTemp.best(entryLo, entryHi)
+        maxEntry = self.maxTemp.best(entryLo, entryHi)
+        result = {
+            "File": name,
+            "Date": format_date(self.observations[lo].date, SHORT_DATE_FORMAT) if hi > lo else None,
+            "DaylightHour": int(self.daylight.total(lo, hi)),
+            "MaxUV": max(self.observations[uv].uv, 0) if uv is not None else 0,
+            "MinsGroup": [self.entries[minEntry][0], self.entries[minEntry][1]] if minEntry is not None else [None, None],
+            "MaxGroup": [self.entries[maxEntry][0], self.entries[maxEntry][2]] if maxEntry is not None else [None, None],
+            "Rain24mm": round(self.rain.total(lo, hi), 1),
+        }
+        for key, freqKey, attribute in CATEGORICAL_FIELDS:
+            result[key], result[freqKey] = self.frequencies(lo, hi, attribute)
+        return result
@@ -0,0 +1,228 @@
+"""Compact record types holding only the fields part1-3 use.
+
+A decoded AccuWeather record is a tree of nested dictionaries, most of which
+is never read. The classes here copy the handful of fields we need into
+__slots__ instances, so the tree can be dropped as soon as a record is built.
+"""
+import os
+import sys
+
+from weather import instrument
+from weather.cache import FORECAST, NULL_INT, TEMPERATURE_RANGES
+from weather.decode import FORECAST_RECORD, HISTORICAL_RECORD, iter_array, source_name, validate
+from weather.files import detect_kind
+from weather.units import convert_f_to_c
+
+
+class ForecastDay:
+    """One day of a daily forecast, with temperatures in celcius.
+
+    Args:
+        date: The ISO date string of the forecast.
+        epoch: The EpochDate.
+        minimum, maximum: The Temperature range.
+        realFeelMinimum, realFeelMaximum: The RealFeelTemperature range.
+        realFeelShadeMinimum, realFeelShadeMaximum: The RealFeelTemperatureShade range.
+        dayPhrase, dayRain: The daytime LongPhrase and chance of rain.
+        nightPhrase, nightRain: The nighttime LongPhrase and chance of rain.
+    """
+
+    __slots__ = ("date", "epoch", "minimum", "maximum", "realFeelMinimum", "realFeelMaximum",
+                 "realFeelShadeMinimum", "realFeelShadeMaximum", "dayPhrase", "dayRain",
+                 "nightPhrase", "nightRain")
+
+    def __init__(self, date, epoch, minimum, maximum, realFeelMinimum, realFeelMaximum,
+                 realFeelShadeMinimum, realFeelShadeMaximum, dayPhrase, dayRain, nightPhrase, nightRain):
+        self.date = date
+        self.epoch = epoch
+        self.minimum = minimum
+        self.maximum = maximum
+        self.realFeelMinimum = realFeelMinimum
+        self.realFeelMaximum = realFeelMaximum
+        self.realFeelShadeMinimum = realFeelShadeMinimum
+        self.realFeelShadeMaximum = realFeelShadeMaximum
+        self.dayPhrase = dayPhrase
+        self.dayRain = dayRain
+        self.nightPhrase = nightPhrase
+        self.nightRain = nightRain
+
+    @classmethod
+    def from_json(cls, t):
+        """Builds a record from one raw DailyForecasts dictionary, converting farenheit to celcius."""
+        temperature = t['Temperature']
+        realFeel = t['RealFeelTemperature']
+        shade = t['RealFeelTemperatureShade']
+        return cls(
+            t['Date'], t['EpochDate'],
+            convert_f_to_c(temperature['Minimum']['Value']),
+            convert_f_to_c(temperature['Maximum']['Value']),
+            convert_f_to_c(realFeel['Minimum']['Value']),
+            convert_f_to_c(realFeel['Maximum']['Value']),
+            convert_f_to_c(shade['Minimum']['Value']),
+            convert_f_to_c(shade['Maximum']['Value']),
+            sys.intern(t['Day']['LongPhrase']), t['Day']['RainProbability'],
+            sys.intern(t['Night']['LongPhrase']), t['Night']['RainProbability'])
+
+    @classmethod
+    def from_table(cls, table):
+        """Yields one record per row of a FORECAST weather.cache.ColumnTable."""
+        for row in zip(table["Date"], table["EpochDate"], table["Mins"], table["Max"],
+                       table["RealFeelTemperatureMins"], table["RealFeelTemperatureMax"],
+                       table["RealFeelTemperatureShadeMins"], table["RealFeelTemperatureShadeMax"],
+                       table["DayLongPhrase"], table["DayRainProbability"],
+                       table["NightLongPhrase"], table["NightRainProbability"]):
+            yield cls(*row)
+
+
+class Observation:
+    """One historical observation, with temperatures in celcius and rain in mm.
+
+    Args:
+        date: The LocalObservationDateTime ISO string.
+        epoch: The EpochTime.
+        temperature, realFeel: The Temperature and RealFeelTemperature.
+        ranges: A tuple of (TemperatureSummary range, minimum, maximum) tuples
+            in the order the file lists them.
+        rain: The Past24Hours precipitation.
+        isDay: Whether the observation was made in daylight.
+        uv: The UVIndex.
+        text: The WeatherText.
+        icon: The WeatherIcon number.
+        precipitationType: The PrecipitationType, None when it is not raining.
+    """
+
+    __slots__ = ("date", "epoch", "temperature", "realFeel", "ranges", "rain", "isDay", "uv", "text",
+                 "icon", "precipitationType")
+
+    def __init__(self, date, epoch, temperature, realFeel, ranges, rain, isDay, uv, text,
+                 icon=None, precipitationType=None):
+        self.date = date
+        self.epoch = epoch
+        self.temperature = temperature
+        self.realFeel = realFeel
+        self.ranges = ranges
+        self.rain = rain
+        self.isDay = isDay
+        self.uv = uv
+        self.text = text
+        self.icon = icon
+        self.precipitationType = precipitationType
+
+    @classmethod
+    def from_json(cls, obj):
+        """Builds a record from one raw historical observation dictionary."""
+        ranges = tuple((sys.intern(group), value["Minimum"]["Metric"]["Value"], value["Maximum"]["Metric"]["Value"])
+                       for group, value in obj["TemperatureSummary"].items())
+        return cls(
+            obj["LocalObservationDateTime"], obj["EpochTime"],
+            obj["Temperature"]["Metric"]["Value"],
+            obj["RealFeelTemperature"]["Metric"]["Value"],
+            ranges,
+            obj["PrecipitationSummary"]["Past24Hours"]["Metric"]["Value"],
+            bool(obj["IsDayTime"]), obj["UVIndex"], sys.intern(obj["WeatherText"]),
+            obj.get("WeatherIcon"), obj.get("PrecipitationType"))
+
+    @classmethod
+    def from_table(cls, table):
+        """Yields one record per row of a HISTORICAL weather.cache.ColumnTable."""
+        rows = zip(table["LocalObservationDateTime"], table["EpochTime"], table["Temperature"],
+                   table["RealFeelTemperature"], table["Past24HoursRain"], table["IsDayTime"], table["UVIndex"],
+                   table["WeatherText"], table["WeatherIcon"], table["PrecipitationType"])
+        bounds = zip(*(table[f"{group}.{bound}"] for group in TEMPERATURE_RANGES for bound in ("Minimum", "Maximum")))
+        for (date, epoch, temperature, realFeel, rain, isDay, uv, text, icon, precipitationType), values in zip(rows, bounds):
+            yield cls(
+                date, epoch, temperature, realFeel,
+                tuple((group, values[2 * j], values[2 * j + 1]) for j, group in enumerate(TEMPERATURE_RANGES)),
+                rain, bool(isDay), uv, sys.intern(text),
+                #the cache has no nulls, so a missing icon is stored as NULL_INT and no precipitation as ''
+                None if icon == NULL_INT else icon, precipitationType or None)
+
+
+def iter_daily_forecasts(read_file):
+    """Decodes a forecast file one raw DailyForecasts day at a time, checking each against FORECAST_RECORD.
+
+    Args:
+        read_file: A forecast JSON file opened in text mode.
+    Returns:
+        A generator of DailyForecasts dictionaries, temperatures still in farenheit.
+    Raises:
+        weather.decode.SchemaError: if a day is missing a field or has the wrong type.
+    """
+    source = source_name(read_file)
+    for i, t in enumerate(iter_array(read_file, "DailyForecasts")):
+        validate(t, FORECAST_RECORD, source, f"DailyForecasts[{i}]")
+        yield t
+
+
+def iter_forecast_days(read_file):
+    """Decodes a forecast file one day at a time.
+
+    Args:
+        read_file: A forecast JSON file opened in text mode.
+    Returns:
+        A generator of ForecastDay records.
+    Raises:
+        weather.decode.SchemaError: if a day is missing a field or has the wrong type.
+    """
+    for t in iter_daily_forecasts(read_file):
+        yield ForecastDay.from_json(t)
+
+
+def iter_observations(read_file):
+    """Decodes a historical file one observation at a time.
+
+    Args:
+        read_file: A historical JSON file opened in text mode.
+    Returns:
+        A generator of Observation records, in file order.
+    Raises:
+        weather.decode.SchemaError: if an observation is missing a field or has the wrong type.
+    """
+    source = source_name(read_file)
+    for i, obj in enumerate(iter_array(read_file)):
+        validate(obj, HISTORICAL_RECORD, source, f"[{i}]")
+        yield Observation.from_json(obj)
+
+
+def iter_records(path, kind=None, cache=None):
+    """Parses and normalizes a weather file, one record at a time.
+
+    Args:
+        path: A string representing the file path to a JSON weather file.
+        kind: FORECAST or HISTORICAL, worked out from the file if None.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    Returns:
+        A generator of ForecastDay records for a forecast file, or Observation
+        records for a historical one.
+    """
+    if kind is None:
+        kind = detect_kind(path)
+    record = ForecastDay if kind == FORECAST else Observation
+    if cache is not None:
+        with cache.load(path, kind) as table:
+            yield from record.from_table(table)
+        return
+    instrument.count("bytes_read", os.path.getsize(path))
+    with open(path, "r", encoding='utf8') as read_file:
+        yield from (iter_forecast_days if kind == FORECAST else iter_observations)(read_file)
+
+
+def iter_forecast_temperatures(forecast_file):
+    """Reads just the date and temperature range of each day of a forecast file.
+
+    The file is memory-mapped and only those three values of each day are
+    decoded, see weather.lazy.
+
+    Args:
+        forecast_file: The path of a forecast JSON file.
+    Returns:
+        A generator of (ISO date, minimum, maximum) tuples, temperatures in celcius.
+    """
+    #the scanner's regexes take a while to compile, so only load it when it is used
+    from weather.lazy import LazyDocument
+
+    with LazyDocument(forecast_file) as document:
+        for t in document.array("DailyForecasts"):
+            temperature = t['Temperature']
+            yield (t['Date'], convert_f_to_c(temperature['Minimum']['Value']),
+                   convert_f_to_c(temperature['Maximum']['Value']))
@@ -0,0 +1,26 @@
+CHUNK_SIZE = 64 * 1024
+
+
+def render(chunks, write_file=None):
+    """Writes rendered text chunks to a file, or joins them into one string.
+
+    Args:
+        chunks: An iterable of strings, eg. a report generator.
+        write_file: A text file object (or socket wrapper with a write method).
+            If None the chunks are joined and returned instead.
+    Returns:
+        The full text if write_file is None, otherwise None.
+    """
+    if write_file is None:
+        return "".join(chunks)
+    for chunk in chunks:
+        write_file.write(chunk)
+
+
+def iter_file(read_file, chunk_size=CHUNK_SIZE):
+    """Yields the rest of a text file in chunks of chunk_size characters."""
+    while True:
+        chunk = read_file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,169 @@
+"""part3's summary over a sliding time window of a live feed of observations.
+
+RollingSummary holds the observations still in the window and can give the
+same dictionary as part3.process_weather at any point, so a feed that runs
+for days can be reported on without summarising it again from the start.
+window_name names a window the way part3 names its files, eg. '24hours'.
+"""
+from collections import deque
+
+from weather.aggregate import CATEGORICAL_FIELDS
+from weather.categorical import frequency_table
+from weather.dates import SHORT_DATE_FORMAT, format_date
+
+WINDOW_6H = 6 * 60 * 60
+WINDOW_24H = 24 * 60 * 60
+WINDOW_7D = 7 * 24 * 60 * 60
+
+
+def window_name(seconds):
+    """Returns a period name like part3's file names, eg. '6hours' or '7days'."""
+    if seconds % (24 * 60 * 60) == 0 and seconds >= 2 * 24 * 60 * 60:
+        return f"{seconds // (24 * 60 * 60)}days"
+    return f"{seconds // (60 * 60)}hours"
+
+
+class _WindowExtreme:
+    """Sliding window minimum or maximum using a monotonic deque.
+
+    Every entry is pushed and popped at most once, so updates are O(1) amortized.
+
+    Args:
+        smallest: True to track the minimum, False for the maximum.
+    """
+
+    def __init__(self, smallest):
+        self.smallest = smallest
+        self.entries = deque()
+
+    def push(self, epoch, value, label=None):
+        entries = self.entries
+        #a newer entry that is at least as good makes older ones unreachable
+        if self.smallest:
+            while entries and entries[-1][1] >= value:
+                entries.pop()
+        else:
+            while entries and entries[-1][1] <= value:
+                entries.pop()
+        entries.append((epoch, value, label))
+
+    def expire(self, cutoff):
+        entries = self.entries
+        while entries and entries[0][0] <= cutoff:
+            entries.popleft()
+
+    def best(self):
+        """Returns the (epoch, value, label) of the current extreme, or None if empty."""
+        return self.entries[0] if self.entries else None
+
+
+class RollingSummary:
+    """Keeps part3's summary up to date over a sliding time window.
+
+    Observations are added one at a time in time order and anything older than
+    the window is dropped as newer ones arrive, so each update costs O(1)
+    amortized no matter how long the feed runs. The window covers
+    (latest EpochTime - window, latest EpochTime].
+
+    Ties are settled the same way as weather.aggregate.HistoricalSummary: the
+    newest observation wins, then the first TemperatureSummary range listed.
+
+    Args:
+        window: The window length in seconds, eg. WINDOW_24H.
+        name: The period name reported as 'File', defaults to one based on the window.
+    """
+
+    def __init__(self, window=WINDOW_24H, name=None):
+        if window <= 0:
+            raise ValueError("window must be a positive number of seconds")
+        self.window = window
+        self.name = name or window_name(window)
+        self.latest = None
+        self.observations = deque()
+        self.minTemp = _WindowExtreme(smallest=True)
+        self.maxTemp = _WindowExtreme(smallest=False)
+        self.maxUV = _WindowExtreme(smallest=False)
+        self.rain = 0
+        self.daylight = 0
+        #Observation attribute -> {category: count} of the observations in the window
+        self.counts = {attribute: {} for _, _, attribute in CATEGORICAL_FIELDS}
+
+    def __len__(self):
+        return len(self.observations)
+
+    def add(self, obs):
+        """Adds one observation, which must not be older than the last one added.
+
+        Args:
+            obs: A weather.records.Observation.
+        """
+        if self.latest is not None and obs.epoch < self.latest:
+            raise ValueError(f"Observation at {obs.date} is older than the last one added")
+
+        self.observations.append(obs)
+        #push ranges last to first so the first listed one wins a tie
+        for group, mn, mx in reversed(obs.ranges):
+            self.minTemp.push(obs.epoch, mn, group)
+            self.maxTemp.push(obs.epoch, mx, group)
+        self.maxUV.push(obs.epoch, obs.uv)
+        self.rain += obs.rain
+        self.daylight += obs.isDay
+        for attribute, counts in self.counts.items():
+            category = getattr(obs, attribute)
+            counts[category] = counts.get(category, 0) + 1
+        self.advance(obs.epoch)
+
+    def extend(self, observations):
+        """Adds many observations, sorting them oldest first as AccuWeather lists the newest first."""
+        for obs in sorted(observations, key=lambda obs: obs.epoch):
+            self.add(obs)
+
+    def advance(self, epoch):
+        """Moves the end of the window to epoch, dropping observations that fall out of it."""
+        if self.latest is not None and epoch < self.latest:
+            return
+        self.latest = epoch
+        cutoff = epoch - self.window
+        observations = self.observations
+        while observations and observations[0].epoch <= cutoff:
+            obs = observations.popleft()
+            self.rain -= obs.rain
+            self.daylight -= obs.isDay
+            for attribute, counts in self.counts.items():
+                category = getattr(obs, attribute)
+                count = counts[category] - 1
+                if count:
+                    counts[category] = count
+                else:
+                    del counts[category]
+        if not observations:
+            #start again from exactly zero rather than carrying float error forward
+            self.rain = 0
+        self.minTemp.expire(cutoff)
+        self.maxTemp.expire(cutoff)
+        self.maxUV.expire(cutoff)
+
+    def result(self):
+        """Returns the current window in the same shape as part3.process_weather."""
+        minTemp = self.minTemp.best()
+        maxTemp = self.maxTemp.best()
+        maxUV = self.maxUV.best()
+        observations = self.observations
+        result = {
+            "File": self.name,
+            #the oldest observation in the window, like the last entry of a part3 file
+            "Date": format_date(observations[0].date, SHORT_DATE_FORMAT) if observations else None,
+            "DaylightHour": self.daylight,
+            "MaxUV": maxUV[1] if maxUV else 0,
+            "MinsGroup": [minTemp[2], minTemp[1]] if minTemp else [None, None],
+            "MaxGroup": [maxTemp[2], maxTemp[1]] if maxTemp else [None, None],
+            "Rain24mm": round(self.rain, 1),
+            "overallTs": [obs.temperature for obs in observations],
+            "overallRFTs": [obs.realFeel for obs in observations],
+            "Mins": [mn for obs in observations for _, mn, _ in obs.ranges],
+            "Maxs": [mx for obs in observations for _, _, mx in obs.ranges],
+        }
+        for key, freqKey, attribute in CATEGORICAL_FIELDS:
+            counts = self.counts[attribute]
+            result[key], result[freqKey] = frequency_table(list(counts), list(counts.values()))
+        return result
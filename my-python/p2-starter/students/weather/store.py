@@ -0,0 +1,213 @@
+"""An in-memory index of historical observations by station and time.
+
+Each station's observations are kept sorted by EpochTime, so finding the ones
+in a time range is a binary search and part3's metrics can be worked out over
+any range without going back to the files:
+
+    store = ObservationStore()
+    store.load("data/historical_24hours_a.json", station="cardiff")
+    store.summary("2020-06-19T10:00:00+08:00", "2020-06-19T14:00:00+08:00")["MaxUV"]
+"""
+import heapq
+import os
+from bisect import bisect_left
+from datetime import datetime
+
+from weather.aggregate import CATEGORICAL_FIELDS, HistoricalSummary, MaxWithLabel, MinWithLabel
+from weather.categorical import frequency_table
+from weather.dates import parse_iso
+from weather.rangeagg import RangeAggregates
+from weather.records import iter_observations
+
+
+def to_epoch(when):
+    """Converts an EpochTime number, ISO string or aware datetime to epoch seconds."""
+    if isinstance(when, str):
+        return parse_iso(when).timestamp()
+    if isinstance(when, datetime):
+        return when.timestamp()
+    return when
+
+
+class _Partition:
+    """One station's observations, sorted by EpochTime once anything asks for them."""
+
+    def __init__(self):
+        self.observations = []
+        self.epochs = []
+        self.unsorted = False
+        self._aggregates = None
+
+    def add(self, observation):
+        if self.epochs and observation.epoch < self.epochs[-1]:
+            #sorting once on the next query beats inserting in the middle every time
+            self.unsorted = True
+        self.observations.append(observation)
+        self.epochs.append(observation.epoch)
+        self._aggregates = None
+
+    def aggregates(self):
+        """Returns the RangeAggregates of this partition, rebuilt after anything is added."""
+        if self._aggregates is None:
+            self.ensure_sorted()
+            self._aggregates = RangeAggregates(self.observations)
+        return self._aggregates
+
+    def ensure_sorted(self):
+        if self.unsorted:
+            self.observations.sort(key=lambda observation: observation.epoch)
+            self.epochs = [observation.epoch for observation in self.observations]
+            self.unsorted = False
+
+    def bounds(self, start, end):
+        """Returns the (first, last + 1) positions of observations with start <= EpochTime < end."""
+        self.ensure_sorted()
+        lo = 0 if start is None else bisect_left(self.epochs, to_epoch(start))
+        hi = len(self.epochs) if end is None else bisect_left(self.epochs, to_epoch(end))
+        return lo, max(lo, hi)
+
+
+class ObservationStore:
+    """Historical observations partitioned by station and indexed by time.
+
+    Adding an observation is O(1). A range lookup is O(log n) to find the range
+    plus the cost of walking the observations in it. aggregate skips the walk:
+    after a one-off O(n log n) build per station it answers in O(log n).
+    """
+
+    DEFAULT_STATION = "default"
+
+    def __init__(self):
+        self.partitions = {}
+
+    def __len__(self):
+        return sum(len(partition.epochs) for partition in self.partitions.values())
+
+    def stations(self):
+        """Returns the station names in the order they were first added."""
+        return list(self.partitions)
+
+    def add(self, observation, station=DEFAULT_STATION):
+        """Adds one weather.records.Observation under the given station."""
+        partition = self.partitions.get(station)
+        if partition is None:
+            partition = self.partitions[station] = _Partition()
+        partition.add(observation)
+
+    def extend(self, observations, station=DEFAULT_STATION):
+        """Adds many observations, in any order, under the given station."""
+        for observation in observations:
+            self.add(observation, station)
+
+    def load(self, path, station=None):
+        """Adds every observation in a historical JSON file.
+
+        Args:
+            path: The historical file to read.
+            station: The station the file belongs to, defaults to the file name
+                without its extension.
+        Returns:
+            The station name the observations were added under.
+        """
+        if station is None:
+            station = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding='utf8') as read_file:
+            self.extend(iter_observations(read_file), station)
+        return station
+
+    def _partitions(self, station):
+        if station is None:
+            return list(self.partitions.values())
+        if station not in self.partitions:
+            raise KeyError(f"Unknown station {station!r}")
+        return [self.partitions[station]]
+
+    def range(self, start=None, end=None, station=None):
+        """Returns the observations with start <= EpochTime < end, oldest first.
+
+        Args:
+            start, end: EpochTime numbers, ISO strings or aware datetimes. None
+                leaves that end of the range open.
+            station: The station to look in, or None for every station.
+        Returns:
+            A list of weather.records.Observation.
+        """
+        runs = []
+        for partition in self._partitions(station):
+            lo, hi = partition.bounds(start, end)
+            runs.append(partition.observations[lo:hi])
+        if len(runs) == 1:
+            return runs[0]
+        return list(heapq.merge(*runs, key=lambda observation: observation.epoch))
+
+    def summary(self, start=None, end=None, station=None, name=None):
+        """Works out part3's metrics over a time range.
+
+        The observations are folded newest first, the way AccuWeather lists them,
+        so 'Date' and tie breaks come out as they would for a file holding
+        exactly that range.
+
+        Args:
+            start, end: The range, as for range.
+            station: The station to summarise, or None for every station.
+            name: The period name reported as 'File', defaults to the station.
+        Returns:
+            The part3 process_weather dictionary for the range.
+        """
+        summary = HistoricalSummary(name or station or "all")
+        for observation in reversed(self.range(start, end, station)):
+            summary.add(observation)
+        return summary.result()
+
+    def aggregate(self, start=None, end=None, station=None, name=None):
+        """Works out part3's metrics over a time range without walking it.
+
+        The first call for a station (and the first after anything is added to
+        it) builds its weather.rangeagg.RangeAggregates. Across several stations
+        a tie goes to the station added first.
+
+        Args:
+            start, end: The range, as for range.
+            station: The station to summarise, or None for every station.
+            name: The period name reported as 'File', defaults to the station.
+        Returns:
+            The summary keys of part3's process_weather dictionary, see
+            weather.rangeagg.RangeAggregates.summary.
+        """
+        name = name or station or "all"
+        results = []
+        for partition in self._partitions(station):
+            lo, hi = partition.bounds(start, end)
+            results.append((partition, lo, hi, partition.aggregates().summary(lo, hi, name)))
+        if not results:
+            return RangeAggregates([]).summary(0, 0, name)
+        if len(results) == 1:
+            return results[0][3]
+
+        minTemp = MinWithLabel()
+        maxTemp = MaxWithLabel()
+        oldest = None
+        rain = 0
+        for partition, lo, hi, result in results:
+            if hi > lo:
+                minTemp.add(result["MinsGroup"][1], result["MinsGroup"][0])
+                maxTemp.add(result["MaxGroup"][1], result["MaxGroup"][0])
+                if oldest is None or partition.epochs[lo] < oldest[0]:
+                    oldest = (partition.epochs[lo], result["Date"])
+            rain += partition.aggregates().rain.total(lo, hi)
+        combined = {
+            "File": name,
+            "Date": oldest[1] if oldest else None,
+            "DaylightHour": sum(result["DaylightHour"] for _, _, _, result in results),
+            "MaxUV": max([result["MaxUV"] for _, _, _, result in results] or [0]),
+            "MinsGroup": minTemp.result(),
+            "MaxGroup": maxTemp.result(),
+            "Rain24mm": round(rain, 1),
+        }
+        for key, freqKey, _ in CATEGORICAL_FIELDS:
+            counts = {}
+            for _, _, _, result in results:
+                for category, count in zip(result[key], result[freqKey]):
+                    counts[category] = counts.get(category, 0) + count
+            combined[key], combined[freqKey] = frequency_table(list(counts), list(counts.values()))
+        return combined
@@ -0,0 +1,117 @@
+import json
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+_decoder = json.JSONDecoder()
+
+
+class _ChunkReader:
+    """Keeps a small sliding window over a text file for incremental decoding.
+
+    Args:
+        read_file: A file object opened in text mode.
+        chunk_size: The number of characters read from the file at a time.
+    """
+
+    def __init__(self, read_file, chunk_size):
+        self.read_file = read_file
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """Reads another chunk into the window. Returns False at end of file."""
+        if self.eof:
+            return False
+        if self.pos:
+            #drop everything already consumed so the window stays small
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.read_file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, got {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def decode(self):
+        """Decodes the next complete JSON value, reading more input as needed."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            #a bare number could be cut off by the window edge, so only trust
+            #a value that is followed by at least one more character
+            if end is not None and (end < len(self.buf) or self.eof):
+                self.pos = end
+                return value
+            if not self.fill(size):
+                if end is not None:
+                    self.pos = end
+                    return value
+                raise ValueError(f"Malformed JSON value at offset {self.pos}")
+            size *= 2
+
+
+def iter_json_array(read_file, key=None, chunk_size=CHUNK_SIZE):
+    """Yields the elements of a JSON array one at a time.
+
+    Only one element (plus a chunk of look-ahead) is held in memory, so the
+    size of the file does not matter.
+
+    Args:
+        read_file: A file object opened in text mode.
+        key: The name of the top level key holding the array, eg. 'DailyForecasts'.
+            If None the document itself must be an array.
+        chunk_size: The number of characters read from the file at a time.
+    Returns:
+        A generator of the decoded array elements.
+    """
+    reader = _ChunkReader(read_file, chunk_size)
+
+    if key is not None:
+        #walk the top level object, skipping values until we reach the key
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise KeyError(key)
+            name = reader.decode()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.decode()
+            if reader.peek() == ",":
+                reader.pos += 1
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.decode()
+        char = reader.peek()
+        reader.pos += 1
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' at offset {reader.pos - 1}, got {char!r}")
@@ -0,0 +1,149 @@
+import datetime
+from array import array
+
+import numpy as np
+
+from weather.dates import SHORT_DATE_FORMAT, parse_iso
+from weather.units import convert_array_f_to_c
+
+#(column name, json key, Minimum/Maximum) in the order part2 reports them
+TEMPERATURE_COLUMNS = (
+    ("Mins", "Temperature", "Minimum"),
+    ("Max", "Temperature", "Maximum"),
+    ("RealFeelTemperatureMins", "RealFeelTemperature", "Minimum"),
+    ("RealFeelTemperatureMax", "RealFeelTemperature", "Maximum"),
+    ("RealFeelTemperatureShadeMins", "RealFeelTemperatureShade", "Minimum"),
+    ("RealFeelTemperatureShadeMax", "RealFeelTemperatureShade", "Maximum"),
+)
+#column name -> the weather.records.ForecastDay attribute holding it
+RECORD_ATTRIBUTES = {
+    "Mins": "minimum",
+    "Max": "maximum",
+    "RealFeelTemperatureMins": "realFeelMinimum",
+    "RealFeelTemperatureMax": "realFeelMaximum",
+    "RealFeelTemperatureShadeMins": "realFeelShadeMinimum",
+    "RealFeelTemperatureShadeMax": "realFeelShadeMaximum",
+}
+#datetime64[D] counts days from here
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def convert_column_f_to_c(temps_in_farenheit):
+    """Converts a whole column of temperatures from farenheit to celcius in one go.
+
+    Args:
+        temps_in_farenheit: An array-like of temperatures in degrees farenheit.
+    Returns:
+        A float32 numpy array of temperatures in degrees celcius, rounded to 1 decimal place.
+    """
+    return convert_array_f_to_c(temps_in_farenheit).astype(np.float32)
+
+
+class ForecastTableBuilder:
+    """Builds a ForecastTable from weather.records.ForecastDay records one at a time.
+
+    Each record is copied straight into compact per-column arrays, so the
+    records themselves can be dropped as soon as they are added.
+    """
+
+    def __init__(self):
+        self.days = array('q')
+        self.columns = {name: array('f') for name, _, _ in TEMPERATURE_COLUMNS}
+        self.appends = [(self.columns[name].append, RECORD_ATTRIBUTES[name]) for name, _, _ in TEMPERATURE_COLUMNS]
+
+    def add(self, day):
+        """Appends one ForecastDay record, already in celcius."""
+        self.days.append(parse_iso(day.date).date().toordinal() - EPOCH_ORDINAL)
+        for append, attribute in self.appends:
+            append(getattr(day, attribute))
+
+    def result(self):
+        """Returns a ForecastTable with one row per record added."""
+        dates = np.frombuffer(self.days, dtype=np.int64).astype("datetime64[D]")
+        return ForecastTable(dates, {name: np.frombuffer(values, dtype=np.float32)
+                                     for name, values in self.columns.items()})
+
+
+class ForecastTable:
+    """A columnar table of daily forecasts backed by contiguous numpy arrays.
+
+    Dates are held as datetime64[D] (the local calendar day of the forecast) and
+    every temperature column as float32 degrees celcius.
+
+    Args:
+        dates: A datetime64[D] array with one entry per day.
+        columns: A dictionary mapping each name in TEMPERATURE_COLUMNS to a
+            float32 array the same length as dates.
+    """
+
+    def __init__(self, dates, columns):
+        self.dates = np.ascontiguousarray(dates, dtype="datetime64[D]")
+        self.columns = {}
+        for name, _, _ in TEMPERATURE_COLUMNS:
+            column = np.ascontiguousarray(columns[name], dtype=np.float32)
+            if column.shape != self.dates.shape:
+                raise ValueError(f"Column {name} has {len(column)} rows, expected {len(self.dates)}")
+            self.columns[name] = column
+
+    @classmethod
+    def from_forecasts(cls, daily_forecasts):
+        """Builds a table from the raw AccuWeather DailyForecasts entries.
+
+        Args:
+            daily_forecasts: An iterable of DailyForecasts dictionaries.
+        Returns:
+            A ForecastTable with the temperatures converted to celcius.
+        """
+        days = []
+        raw = {name: array('d') for name, _, _ in TEMPERATURE_COLUMNS}
+        appends = [(raw[name].append, key, bound) for name, key, bound in TEMPERATURE_COLUMNS]
+        for t in daily_forecasts:
+            days.append(parse_iso(t['Date']).date())
+            for append, key, bound in appends:
+                append(t[key][bound]['Value'])
+
+        dates = np.array(days, dtype="datetime64[D]")
+        return cls(dates, {name: convert_column_f_to_c(np.frombuffer(values, dtype=np.float64))
+                           for name, values in raw.items()})
+
+    @classmethod
+    def from_records(cls, days):
+        """Builds a table from weather.records.ForecastDay records.
+
+        Args:
+            days: An iterable of ForecastDay records, already in celcius.
+        Returns:
+            A ForecastTable with one row per record.
+        """
+        builder = ForecastTableBuilder()
+        for day in days:
+            builder.add(day)
+        return builder.result()
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Builds a table from FORECAST columns of a weather.cache.ColumnTable.
+
+        The cached temperatures are already in celcius so they are copied
+        straight across without converting them again.
+        """
+        dates = np.array([parse_iso(date).date() for date in columns["Date"]], dtype="datetime64[D]")
+        return cls(dates, {name: np.asarray(columns[name], dtype=np.float32) for name, _, _ in TEMPERATURE_COLUMNS})
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def formatted_dates(self, date_format=SHORT_DATE_FORMAT):
+        """Returns the dates as a list of strings, eg. '19 June 2020'."""
+        return [d.strftime(date_format) for d in self.dates.tolist()]
+
+    def to_dict(self):
+        """Returns the table as the dictionary of lists part2.process_weather has always returned."""
+        output = {"Dates": self.formatted_dates()}
+        for name, _, _ in TEMPERATURE_COLUMNS:
+            #widen before rounding so float32 noise (8.300000190734863) does not leak out
+            output[name] = np.round(self.columns[name].astype(np.float64), 1).tolist()
+        return output
@@ -0,0 +1,26 @@
+"""Paths and loaders shared by the weather package tests."""
+import json
+import os
+
+from weather.aggregate import HistoricalSummary
+from weather.records import iter_observations
+
+STUDENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir)
+DATA_DIR = os.path.join(STUDENTS_DIR, "part3", "data")
+
+
+def load_historical(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf8') as read_file:
+        return json.load(read_file)
+
+
+def load_observations(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf8') as read_file:
+        return list(iter_observations(read_file))
+
+
+def summarise(observations, name):
+    summary = HistoricalSummary(name)
+    for observation in observations:
+        summary.add(observation)
+    return summary.result()
@@ -0,0 +1,25 @@
+import os
+import unittest
+from collections import Counter
+from weather.files import import_parts
+from support import DATA_DIR, load_historical, load_observations, summarise
+
+
+class HistoricalSummaryTests(unittest.TestCase):
+
+    def test_weather_text_lists_every_category(self):
+        #part3 used to report only 'Light rain' and 'Sunny', whatever the file held
+        counts = Counter(obj["WeatherText"] for obj in load_historical("historical_24hours_b.json"))
+        self.assertEqual(6, len(counts))
+        result = summarise(load_observations("historical_24hours_b.json"), "24hours")
+        self.assertEqual(counts, dict(zip(result["WeatherText"], result["WeatherFreq"])))
+        self.assertEqual(sorted(counts.values(), reverse=True), result["WeatherFreq"])
+
+    def test_part3_bar_chart_has_a_bar_per_category(self):
+        import_parts()
+        import part3
+        process_dict = part3.process_weather(os.path.join(DATA_DIR, "historical_24hours_b.json"))
+        trace = part3.BAR_TEMPLATE.spec(process_dict)["data"][0]
+        self.assertEqual(process_dict["WeatherText"], list(trace["x"]))
+        self.assertEqual(process_dict["WeatherFreq"], list(trace["y"]))
+        self.assertEqual(6, len(trace["x"]))
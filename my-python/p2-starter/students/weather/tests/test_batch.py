@@ -0,0 +1,41 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from weather.batch import main as batch_main, run_batch
+from weather.decode import SchemaError
+from support import STUDENTS_DIR, DATA_DIR
+
+
+class BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        shutil.copy(os.path.join(STUDENTS_DIR, "part1", "data", "forecast_5days_a.json"), self.directory)
+        shutil.copy(os.path.join(DATA_DIR, "historical_6hours.json"), self.directory)
+        #an object, so it is taken for a forecast and fails part way through its report
+        self.bad = os.path.join(self.directory, "forecast_broken.json")
+        with open(self.bad, "w", encoding='utf8') as write_file:
+            json.dump({"DailyForecasts": [{"Date": "2020-06-19T07:00:00+08:00"}]}, write_file)
+        self.paths = sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory))
+
+    def test_one_bad_file_does_not_stop_the_rest(self):
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                progress = io.StringIO()
+                failures = run_batch(self.paths, workers, progress)
+                self.assertEqual([self.bad], [path for path, _ in failures])
+                self.assertIn("SchemaError", failures[0][1])
+                self.assertEqual(3, len(progress.getvalue().splitlines()))
+                written = sorted(name for name in os.listdir(self.directory) if not name.endswith(".json"))
+                self.assertEqual(["forecast_5days_a_output.txt", "historical_6hours_summary.txt"], written)
+
+    def test_exit_status_reports_failures(self):
+        with mock.patch("sys.stderr", io.StringIO()) as stderr:
+            self.assertEqual(1, batch_main([self.directory, "-j", "0", "-q"]))
+            self.assertIn("2 of 3 files processed, 1 failed", stderr.getvalue())
+            self.assertEqual(0, batch_main([self.paths[0], self.paths[2], "-j", "0", "-q"]))
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from weather import cache as cache_module
+from weather.cache import HISTORICAL, ParsedCache, normalize_historical
+from weather.files import import_parts
+from weather.records import Observation, iter_observations
+from support import STUDENTS_DIR, DATA_DIR, load_historical
+
+
+class ParsedCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(DATA_DIR, "historical_24hours_a.json")
+
+    def test_second_load_is_a_hit_with_the_same_columns(self):
+        cache = ParsedCache(self.directory)
+        expected = normalize_historical(load_historical("historical_24hours_a.json"))
+        for _ in range(2):
+            with cache.load(self.path, HISTORICAL) as table:
+                for name, values in expected.items():
+                    self.assertEqual(values, list(table[name]), name)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def write_input(self, name, data):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding='utf8') as write_file:
+            json.dump(data, write_file)
+        return path
+
+    def test_summaries_from_cache_render_like_summaries_from_json(self):
+        import_parts()
+        import part3
+        cache = ParsedCache(self.directory)
+        for name in ("historical_6hours", "historical_24hours_a", "historical_24hours_b"):
+            path = os.path.join(DATA_DIR, f"{name}.json")
+            expected = part3.summarise_weather(part3.process_weather(path))
+            for _ in range(2):
+                with self.subTest(name=name, hits=cache.hits):
+                    self.assertEqual(expected, part3.summarise_weather(part3.process_weather(path, cache)))
+        self.assertEqual((3, 3), (cache.hits, cache.misses))
+
+    def test_ints_and_floats_keep_their_type(self):
+        data = load_historical("historical_24hours_a.json")
+        data[0]["UVIndex"] = 2.5
+        data[0]["Temperature"]["Metric"]["Value"] = 8
+        data[1]["Temperature"]["Metric"]["Value"] = 8.5
+        path = self.write_input("historical.json", data)
+        with open(path, encoding='utf8') as read_file:
+            expected = list(iter_observations(read_file))
+        cache = ParsedCache(self.directory)
+        for _ in range(2):
+            with cache.load(path, HISTORICAL) as table:
+                cached = list(Observation.from_table(table))
+            for want, got in zip(expected, cached):
+                for name in ("temperature", "realFeel", "ranges", "rain", "uv"):
+                    self.assertEqual(repr(getattr(want, name)), repr(getattr(got, name)), name)
+        self.assertEqual(("2.5", "8", "8.5"), (repr(cached[0].uv), repr(cached[0].temperature), repr(cached[1].temperature)))
+
+    def test_float_rain_probability_renders_like_json(self):
+        import_parts()
+        import part1
+        with open(os.path.join(STUDENTS_DIR, "part1", "data", "forecast_5days_a.json"), encoding='utf8') as read_file:
+            data = json.load(read_file)
+        data["DailyForecasts"][0]["Day"]["RainProbability"] = 12.5
+        path = self.write_input("forecast.json", data)
+        cache = ParsedCache(self.directory)
+        expected = part1.process_weather(path)
+        self.assertIn("12.5%", expected)
+        for _ in range(2):
+            self.assertEqual(expected, part1.process_weather(path, cache))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_missing_icon_is_none(self):
+        data = load_historical("historical_24hours_a.json")
+        del data[0]["WeatherIcon"]
+        data[1]["WeatherIcon"] = None
+        path = self.write_input("historical.json", data)
+        cache = ParsedCache(self.directory)
+        with cache.load(path, HISTORICAL) as table:
+            icons = [observation.icon for observation in Observation.from_table(table)]
+        self.assertEqual([None, None, data[2]["WeatherIcon"]], icons[:3])
+
+    def test_unchanged_file_is_not_hashed_again(self):
+        path = self.write_input("historical.json", load_historical("historical_24hours_a.json"))
+        cache = ParsedCache(self.directory)
+        with mock.patch.object(cache_module, "hash_file", wraps=cache_module.hash_file) as hashFile:
+            entry = cache.entry_path(path)
+            cache.load(path, HISTORICAL).close()
+            cache.load(path, HISTORICAL).close()
+            self.assertEqual((1, 1, 1), (hashFile.call_count, cache.hits, cache.misses))
+
+            #a new modification time is hashed again, but the same contents are still a hit
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+            cache.load(path, HISTORICAL).close()
+            self.assertEqual((2, 2, 1), (hashFile.call_count, cache.hits, cache.misses))
+        self.assertEqual([entry], cache.entries())
+
+    def test_invalidate_and_evict(self):
+        cache = ParsedCache(self.directory)
+        cache.load(self.path, HISTORICAL).close()
+        cache.invalidate(self.path)
+        self.assertEqual([], cache.entries())
+
+        cache.load(self.path, HISTORICAL).close()
+        cache.max_bytes = 0
+        cache.evict()
+        self.assertEqual([], cache.entries())
+
+    def test_size_bound_keeps_the_newest_entry(self):
+        other = os.path.join(DATA_DIR, "historical_24hours_b.json")
+        cache = ParsedCache(self.directory, max_bytes=100)
+        expected = normalize_historical(load_historical("historical_24hours_a.json"))
+        for path in (other, self.path):
+            #every entry is over max_bytes on its own, but the one just written is still returned
+            with cache.load(path, HISTORICAL) as table:
+                self.assertEqual(len(table), len(list(table["Temperature"])))
+        self.assertEqual([cache.entry_path(self.path)], cache.entries())
+
+        with cache.load(self.path, HISTORICAL) as table:
+            self.assertEqual(expected["Temperature"], list(table["Temperature"]))
+        self.assertEqual(1, cache.hits)
+
+    def test_entry_evicted_by_another_process_is_a_miss(self):
+        cache = ParsedCache(self.directory)
+        cache.load(self.path, HISTORICAL).close()
+        entry = cache.entry_path(self.path)
+        readTable = cache_module.read_table
+
+        def evicted_first(path):
+            #another worker deletes the entry between the exists check and the read
+            if path == entry and os.path.exists(entry):
+                os.remove(entry)
+            return readTable(path)
+
+        with mock.patch.object(cache_module, "read_table", evicted_first):
+            with cache.load(self.path, HISTORICAL) as table:
+                self.assertTrue(len(table))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
@@ -0,0 +1,37 @@
+import json
+import unittest
+from weather.categorical import CategoricalColumn, CategoryEncoder
+from weather.rangeagg import CategoryPositions
+from support import load_observations, summarise
+
+
+class CategoricalTests(unittest.TestCase):
+
+    def test_frequencies_cover_every_category(self):
+        data = load_observations("historical_24hours_b.json")
+        texts = [observation.text for observation in data]
+        column = CategoricalColumn()
+        column.extend(texts)
+        categories, counts = column.frequencies()
+        self.assertEqual(sorted(set(texts)), sorted(categories))
+        self.assertEqual([texts.count(text) for text in categories], counts)
+        self.assertEqual(sorted(counts, reverse=True), counts)
+        self.assertEqual((categories, counts), (summarise(data, "24hours")["WeatherText"],
+                                                summarise(data, "24hours")["WeatherFreq"]))
+
+    def test_shared_encoder_lines_codes_up(self):
+        encoder = CategoryEncoder()
+        first = CategoricalColumn(encoder)
+        second = CategoricalColumn(encoder)
+        first.extend(["Sunny", "Cloudy"])
+        second.extend(["Cloudy", None])
+        self.assertEqual([1, 2], list(second.codes))
+        self.assertEqual(["Cloudy", None], [second[0], second[1]])
+        self.assertEqual([1, 1, 0], list(first.counts()))
+
+    def test_category_positions_count_any_range(self):
+        codes = [2, 0, 2, 1, 2, 0, 0]
+        positions = CategoryPositions(codes, 4)
+        for lo in range(len(codes) + 1):
+            for hi in range(lo, len(codes) + 1):
+                self.assertEqual([codes[lo:hi].count(code) for code in range(4)], positions.counts(lo, hi))
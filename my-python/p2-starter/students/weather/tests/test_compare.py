@@ -0,0 +1,26 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from weather.compare import compare_stations, station_names
+from support import STUDENTS_DIR
+
+
+class CompareTests(unittest.TestCase):
+
+    def test_stations_sharing_a_file_name_are_told_apart(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        forecast = os.path.join(STUDENTS_DIR, "part1", "data", "forecast_5days_a.json")
+        paths = []
+        for city in ("perth", "darwin"):
+            os.makedirs(os.path.join(directory, city))
+            paths.append(shutil.copy(forecast, os.path.join(directory, city, "forecast.json")))
+        paths += [forecast, forecast]
+        names = station_names(paths)
+        self.assertEqual([os.path.join("perth", "forecast"), os.path.join("darwin", "forecast"),
+                          "forecast_5days_a", "forecast_5days_a (2)"], names)
+        comparison = compare_stations(paths, workers=0)
+        self.assertEqual(names, [station["Station"] for station in comparison["Stations"]])
+        self.assertEqual(["Friday 19 June 2020", 4], [comparison["Days"][0]["Date"], comparison["Days"][0]["Stations"]])
@@ -0,0 +1,51 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from weather.dates import ISO_FORMAT, SHORT_DATE_FORMAT, format_date, parse_iso
+
+
+class DatesTests(unittest.TestCase):
+
+    def setUp(self):
+        parse_iso.cache_clear()
+        format_date.cache_clear()
+        self.addCleanup(parse_iso.cache_clear)
+        self.addCleanup(format_date.cache_clear)
+
+    def parse_counting_strptime(self, iso_string):
+        with mock.patch("weather.dates.datetime", wraps=datetime) as wrapped:
+            parsed = parse_iso(iso_string)
+        return parsed, wrapped.strptime.call_count
+
+    def test_fast_path_matches_strptime(self):
+        for iso_string in ("2020-06-19T07:00:00+08:00", "2020-06-19T07:00:00-05:30", "2020-12-31T23:59:59+00:00"):
+            with self.subTest(iso_string=iso_string):
+                parsed, strptimeCalls = self.parse_counting_strptime(iso_string)
+                expected = datetime.strptime(iso_string, ISO_FORMAT)
+                self.assertEqual(0, strptimeCalls)
+                self.assertEqual(expected, parsed)
+                self.assertEqual(expected.utcoffset(), parsed.utcoffset())
+
+    def test_other_layouts_fall_back_to_strptime(self):
+        for iso_string, offset in (("2020-06-19T07:00:00Z", timedelta(0)),
+                                   ("2020-06-19T07:00:00+0800", timedelta(hours=8)),
+                                   ("2020-06-19T07:00:00-05:30:15", -timedelta(hours=5, minutes=30, seconds=15))):
+            with self.subTest(iso_string=iso_string):
+                parsed, strptimeCalls = self.parse_counting_strptime(iso_string)
+                self.assertEqual(1, strptimeCalls)
+                self.assertEqual(datetime.strptime(iso_string, ISO_FORMAT), parsed)
+                self.assertEqual(offset, parsed.utcoffset())
+
+    def test_malformed_strings_raise(self):
+        #the first one has the fixed width layout but no 13th month, so it gets past the fast path check
+        for iso_string in ("2020-13-19T07:00:00+08:00", "2020-06-19", "19 June 2020", "2020-06-19T07:00:00+08:0x", ""):
+            with self.subTest(iso_string=iso_string):
+                with self.assertRaises(ValueError):
+                    parse_iso(iso_string)
+
+    def test_format_date_keeps_the_local_day(self):
+        self.assertEqual("Friday 19 June 2020", format_date("2020-06-19T23:30:00-05:00"))
+        self.assertEqual("Friday 19 June 2020", format_date("2020-06-19T00:30:00+10:00"))
+        self.assertEqual("19 June 2020", format_date("2020-06-19T07:00:00Z", SHORT_DATE_FORMAT))
+        with self.assertRaises(ValueError):
+            format_date("2020-06-31T07:00:00+08:00")
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+from weather.decode import HISTORICAL_RECORD, WHOLE_FILE_LIMIT, SchemaError, iter_array, validate
+from weather.files import import_parts
+from weather.records import iter_forecast_days, iter_observations
+from support import DATA_DIR, load_historical
+
+
+class DecodeTests(unittest.TestCase):
+
+    def write(self, name, data):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding='utf8') as write_file:
+            json.dump(data, write_file)
+        return path
+
+    def test_backend_matches_streaming(self):
+        path = os.path.join(DATA_DIR, "historical_6hours.json")
+        with open(path, encoding='utf8') as read_file:
+            decoded = list(iter_array(read_file))
+        with open(path, encoding='utf8') as read_file:
+            self.assertEqual(json.load(read_file), decoded)
+
+    def test_schema_drift_names_the_field(self):
+        observations = load_historical("historical_6hours.json")
+        observations[2]["Temperature"]["Metric"]["Value"] = "12.5"
+        path = self.write("drifted.json", observations)
+        with open(path, encoding='utf8') as read_file:
+            with self.assertRaises(SchemaError) as context:
+                list(iter_observations(read_file))
+        self.assertEqual("[2].Temperature.Metric.Value", context.exception.path)
+        self.assertIn("drifted.json", str(context.exception))
+
+        forecast = {"DailyForecasts": [{"Date": "2020-06-19T07:00:00+08:00"}]}
+        path = self.write("forecast.json", forecast)
+        with open(path, encoding='utf8') as read_file:
+            with self.assertRaises(SchemaError) as context:
+                list(iter_forecast_days(read_file))
+        self.assertEqual("DailyForecasts[0].EpochDate", context.exception.path)
+
+    def test_optional_fields_and_bools(self):
+        observation = load_historical("historical_6hours.json")[0]
+        del observation["WeatherIcon"]
+        observation["PrecipitationType"] = None
+        validate(observation, HISTORICAL_RECORD, "test", "[0]")
+        observation["UVIndex"] = True
+        with self.assertRaises(SchemaError):
+            validate(observation, HISTORICAL_RECORD, "test", "[0]")
+
+    def test_schemas_built_per_call_are_checked_against_themselves(self):
+        #a throwaway schema's id can be handed to the next one once it is collected
+        for types, value, good in ((int, 1, True), (str, 1, False), (int, "a", False), (str, "a", True)):
+            schema = {"Outer": {"Inner": types}}
+            if good:
+                validate({"Outer": {"Inner": value}}, schema, "test", "$")
+            else:
+                with self.assertRaises(SchemaError):
+                    validate({"Outer": {"Inner": value}}, schema, "test", "$")
+            del schema
+        with self.assertRaises(SchemaError) as context:
+            validate({"Outer": [1]}, {"Outer": {"Inner": int}}, "test", "$")
+        self.assertEqual("$.Outer", context.exception.path)
+
+    def test_missing_top_level_key(self):
+        path = self.write("forecast.json", {"Headline": {}})
+        with open(path, encoding='utf8') as read_file:
+            with self.assertRaises(SchemaError) as context:
+                list(iter_array(read_file, "DailyForecasts"))
+        self.assertEqual("DailyForecasts", context.exception.path)
+        with open(path, encoding='utf8') as read_file, mock.patch("weather.decode.WHOLE_FILE_LIMIT", 0):
+            with self.assertRaises(SchemaError) as context:
+                list(iter_array(read_file, "DailyForecasts"))
+        self.assertEqual("DailyForecasts", context.exception.path)
+
+    def test_part1_streams_files_over_the_limit(self):
+        from benchmarks.generate import write_forecast
+        import_parts()
+        import part1
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "forecast.json")
+        write_forecast(path, 600)
+        size = os.path.getsize(path)
+        self.assertGreater(size, WHOLE_FILE_LIMIT)
+
+        class Discard:
+            def write(self, text):
+                return len(text)
+
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        with mock.patch("weather.decode.load", side_effect=AssertionError("decoded the whole file")):
+            part1.write_weather(path, Discard())
+        #the decoded file would take several times its size, a day at a time it is a fraction of it
+        self.assertLess(tracemalloc.get_traced_memory()[1], size // 2)
@@ -0,0 +1,18 @@
+import unittest
+from weather.downsample import downsample, minmax_indices
+
+
+class DownsampleTests(unittest.TestCase):
+
+    def test_keeps_every_extreme_within_the_target(self):
+        lows = [(i * 37) % 101 for i in range(5000)]
+        highs = [(i * 53) % 97 for i in range(5000)]
+        keep = minmax_indices([lows, highs], 200)
+        self.assertLessEqual(len(keep), 200)
+        self.assertEqual([0, 4999], [keep[0], keep[-1]])
+        self.assertEqual(min(lows), min(lows[i] for i in keep))
+        self.assertEqual(max(highs), max(highs[i] for i in keep))
+
+    def test_short_series_are_left_alone(self):
+        process_dict = {"Dates": ["a", "b", "c"], "Mins": [1, 2, 3], "Max": [4, 5, 6]}
+        self.assertIs(process_dict, downsample(process_dict, 10, keys=["Mins", "Max"]))
@@ -0,0 +1,31 @@
+import asyncio
+import json
+import os
+import unittest
+from weather.ingest import summarise_historical
+from support import DATA_DIR, load_observations, summarise
+
+
+class IngestTests(unittest.TestCase):
+
+    NAMES = ["historical_24hours_a.json", "historical_24hours_b.json", "historical_6hours.json"]
+
+    def test_concurrent_summary_matches_serial(self):
+        paths = [os.path.join(DATA_DIR, name) for name in self.NAMES]
+        result = asyncio.run(summarise_historical(paths, "all", concurrency=2))
+        data = [observation for name in self.NAMES for observation in load_observations(name)]
+        data.sort(key=lambda observation: observation.epoch, reverse=True)
+        expected = summarise(data, "all")
+        for key in ["Date", "DaylightHour", "MaxUV", "Rain24mm", "WeatherFreq"]:
+            self.assertEqual(expected[key], result[key], key)
+        self.assertEqual(expected["MinsGroup"][1], result["MinsGroup"][1])
+        self.assertEqual(sorted(expected["overallTs"]), sorted(result["overallTs"]))
+
+    def test_unreadable_files_are_collected(self):
+        paths = [os.path.join(DATA_DIR, self.NAMES[0]), os.path.join(DATA_DIR, "missing.json")]
+        errors = []
+        result = asyncio.run(summarise_historical(paths, "all", errors=errors))
+        self.assertEqual(paths[1:], [path for path, _ in errors])
+        self.assertEqual(len(load_observations(self.NAMES[0])), len(result["overallTs"]))
+        with self.assertRaises(OSError):
+            asyncio.run(summarise_historical(paths, "all"))
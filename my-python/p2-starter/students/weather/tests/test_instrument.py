@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from weather import instrument
+from weather.dates import format_date, parse_iso
+
+
+class InstrumentTests(unittest.TestCase):
+
+    def setUp(self):
+        parse_iso.cache_clear()
+        instrument.reset()
+        self.addCleanup(instrument.reset)
+        self.addCleanup(instrument.disable)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_nothing_is_recorded_when_disabled(self):
+        self.assertIs(instrument.NULL_SPAN, instrument.span("stage"))
+        with instrument.span("stage"):
+            instrument.count("records", 5)
+        self.assertEqual({}, instrument.snapshot()["spans"])
+        self.assertNotIn("records", instrument.snapshot()["counters"])
+
+    def test_nested_spans_time_each_level(self):
+        instrument.enable()
+        clock = mock.Mock(perf_counter=mock.Mock(side_effect=[0.0, 1.0, 3.0, 4.0, 6.5, 10.0, 11.0, 12.0]))
+        with mock.patch.object(instrument, "time", clock):
+            with instrument.span("outer"):
+                for _ in range(2):
+                    with instrument.span("inner"):
+                        pass
+            with self.assertRaises(KeyError):
+                with instrument.span("failing"):
+                    raise KeyError("the span still closes")
+        spans = instrument.snapshot()["spans"]
+        self.assertEqual({"calls": 1, "seconds": 10.0}, spans["outer"])
+        self.assertEqual({"calls": 2, "seconds": 4.5}, spans["inner"])
+        self.assertEqual({"calls": 1, "seconds": 1.0}, spans["failing"])
+
+        instrument.disable()
+        with instrument.span("outer"):
+            pass
+        self.assertEqual(1, instrument.snapshot()["spans"]["outer"]["calls"])
+
+    def test_recorded_spans_add_to_timed_ones(self):
+        instrument.record_span("stage", 2.0, calls=5)
+        self.assertEqual({}, instrument.snapshot()["spans"])
+        instrument.enable()
+        clock = mock.Mock(perf_counter=mock.Mock(side_effect=[0.0, 1.5]))
+        with mock.patch.object(instrument, "time", clock):
+            with instrument.span("stage"):
+                pass
+        instrument.record_span("stage", 2.0, calls=5)
+        self.assertEqual({"calls": 6, "seconds": 3.5}, instrument.snapshot()["spans"]["stage"])
+
+    def test_counters_and_date_cache_since_reset(self):
+        parse_iso("2020-06-19T07:00:00+08:00")
+        instrument.reset()
+        instrument.enable()
+        instrument.count("records", 3)
+        instrument.count("records", 4)
+        for _ in range(3):
+            parse_iso("2020-06-19T07:00:00+08:00")
+        parse_iso("2020-06-20T07:00:00+08:00")
+        counters = instrument.snapshot()["counters"]
+        self.assertEqual(7, counters["records"])
+        self.assertEqual(3, counters["dates.parse_iso.cache_hits"])
+        self.assertEqual(1, counters["dates.parse_iso.cache_misses"])
+
+    def test_export_csv_and_json(self):
+        snapshots = {
+            "a.json": {"spans": {"parse": {"calls": 2, "seconds": 0.5}}, "counters": {"records": 10}},
+            "b.json": {"spans": {}, "counters": {"records": 1}},
+        }
+        path = os.path.join(self.directory, "timings.csv")
+        instrument.export(path, snapshots)
+        with open(path, encoding='utf8', newline="") as read_file:
+            rows = list(csv.reader(read_file))
+        self.assertEqual([["source", "kind", "name", "calls", "value"],
+                          ["a.json", "span", "parse", "2", "0.500000"],
+                          ["a.json", "counter", "records", "", "10"],
+                          ["b.json", "counter", "records", "", "1"]], rows)
+
+        path = os.path.join(self.directory, "timings.json")
+        instrument.enable()
+        with instrument.span("stage"):
+            pass
+        instrument.export(path)
+        with open(path, encoding='utf8') as read_file:
+            exported = json.load(read_file)
+        self.assertEqual(["all"], list(exported))
+        self.assertEqual(1, exported["all"]["spans"]["stage"]["calls"])
+
+    def test_profile_modes(self):
+        format_date.cache_clear()
+        output = os.path.join(self.directory, "run.cprofile")
+        with instrument.profile("cprofile", output):
+            format_date("2020-06-19T07:00:00+08:00")
+        stats = pstats.Stats(output)
+        self.assertTrue(any(function == "format_date" for _, _, function in stats.stats))
+
+        output = os.path.join(self.directory, "run.tracemalloc")
+        with instrument.profile("tracemalloc", output):
+            kept = [str(i) for i in range(1000)]
+        with open(output, encoding='utf8') as read_file:
+            self.assertRegex(read_file.readline(), r"^current \d+ bytes, peak \d+ bytes$")
+        self.assertEqual(1000, len(kept))
+
+        with self.assertRaises(ValueError):
+            with instrument.profile("perf", output):
+                pass
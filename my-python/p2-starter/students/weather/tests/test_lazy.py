@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from weather.lazy import LazyDocument
+from support import DATA_DIR, load_historical
+
+
+class LazyTests(unittest.TestCase):
+
+    def test_records_match_json_load(self):
+        for name in os.listdir(DATA_DIR):
+            path = os.path.join(DATA_DIR, name)
+            with LazyDocument(path) as document:
+                records = list(document.array())
+                expected = load_historical(name)
+                self.assertEqual(len(expected), len(records))
+                for record, obj in zip(records, expected):
+                    self.assertEqual(list(obj), record.keys())
+                    self.assertEqual(obj, record.to_dict())
+                    self.assertEqual(obj["Temperature"]["Metric"]["Value"], record["Temperature"]["Metric"]["Value"])
+                    self.assertEqual(obj.get("PrecipitationType"), record.get("PrecipitationType"))
+
+    def test_array_under_key(self):
+        path = os.path.join(tempfile.mkdtemp(), "nested.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        obj = {"Headline": {"Text": "a [tricky] \"string\", {}"}, "DailyForecasts": [{"Day": {"Rain": 1}}, {"Day": {}}], "Empty": [ ]}
+        with open(path, "w", encoding='utf8') as write_file:
+            json.dump(obj, write_file, indent=4)
+        with LazyDocument(path) as document:
+            self.assertEqual(obj["DailyForecasts"], [day.to_dict() for day in document.array("DailyForecasts")])
+            self.assertEqual([], list(document.array("Empty")))
+            self.assertEqual(obj["Headline"], document.root()["Headline"].to_dict())
+            with self.assertRaises(KeyError):
+                document.array("Missing")
+
+    def test_deep_and_malformed_nesting(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        deep = [{"a": [1, "]}"]}]
+        for _ in range(50):
+            deep = [{"a": deep, "b": "x"}]
+        texts = {
+            "deep": json.dumps([{"d": deep}, {"c": 1}]),
+            #used to backtrack exponentially
+            "malformed": "[" + '{"a": [' * 40 + '1, "x' + "]}" * 40 + "]",
+            "unclosed": "[" + '{"a": [' * 40 + "1",
+        }
+        for name, text in texts.items():
+            path = os.path.join(directory, f"{name}.json")
+            with open(path, "w", encoding='utf8') as write_file:
+                write_file.write(text)
+            with LazyDocument(path) as document:
+                if name == "deep":
+                    self.assertEqual(json.loads(text), [value.to_dict() for value in document.array()])
+                else:
+                    with self.assertRaises(ValueError):
+                        list(document.array())
@@ -0,0 +1,84 @@
+import json
+import shutil
+import tempfile
+import unittest
+from weather.files import import_parts
+from weather.ooc import BOX_STATS, OLDEST, SERIES, ChunkedSummary, QuantileSketch
+from support import load_observations, summarise
+
+
+class ChunkedSummaryTests(unittest.TestCase):
+
+    def test_chunks_merge_into_the_single_pass_summary(self):
+        observations = load_observations("historical_24hours_b.json")
+        expected = summarise(observations, "24hours")
+        spill = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill)
+        for chunkSize in (1, 5, len(observations) + 1):
+            summary = ChunkedSummary("24hours", chunkSize, spill)
+            for observation in observations:
+                summary.add(observation)
+            result = summary.result()
+            for key, value in expected.items():
+                if key in SERIES:
+                    self.assertEqual(value, result[key].tolist())
+                else:
+                    self.assertEqual(value, result[key], key)
+
+    def test_spills_of_the_same_period_do_not_collide(self):
+        spill = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill)
+        results = []
+        for name in ("historical_24hours_a.json", "historical_24hours_b.json"):
+            summary = ChunkedSummary("24hours", 4, spill)
+            for observation in load_observations(name):
+                summary.add(observation)
+            results.append((name, summary.result()))
+        for name, result in results:
+            self.assertEqual(summarise(load_observations(name), "24hours")["overallTs"], result["overallTs"].tolist())
+
+    def test_oldest_date(self):
+        observations = load_observations("historical_24hours_a.json")
+        summary = ChunkedSummary("24hours", 3, date=OLDEST)
+        for observation in reversed(observations):
+            summary.add(observation)
+        self.assertEqual(summarise(observations, "24hours")["Date"], summary.result()["Date"])
+
+    def test_box_statistics_match_plotly_quartiles(self):
+        values = [round(v * 0.7 % 23 - 4, 1) for v in range(1001)]
+        whole = QuantileSketch()
+        whole.extend(values)
+        merged = QuantileSketch()
+        for start in range(0, len(values), 97):
+            part = QuantileSketch()
+            part.extend(values[start:start + 97])
+            merged.merge(part)
+        self.assertEqual(whole.box(), merged.box())
+
+        ordered = sorted(values)
+        #plotly's 'linear' quartiles: position q * n - 0.5 into the sorted values
+        for q in (0.25, 0.5, 0.75):
+            position = q * len(ordered) - 0.5
+            lower = int(position)
+            fraction = position - lower
+            exact = (1 - fraction) * ordered[lower] + fraction * ordered[lower + 1]
+            self.assertAlmostEqual(exact, whole.quantile(q))
+
+    def test_sketch_memory_is_capped(self):
+        sketch = QuantileSketch(max_bins=64)
+        sketch.extend([v / 10 for v in range(-5000, 5000)])
+        self.assertLessEqual(len(sketch.bins), 64)
+        self.assertEqual(-500, sketch.quantile(0))
+        self.assertAlmostEqual(0, sketch.quantile(0.5), delta=sketch.resolution)
+
+    def test_box_plot_drawn_from_statistics(self):
+        import_parts()
+        import part3
+        summary = ChunkedSummary("6hours", 2)
+        for observation in load_observations("historical_6hours.json"):
+            summary.add(observation)
+        result = summary.result()
+        self.assertNotIn("overallTs", result)
+        trace = part3.box_template(result).spec(result)["data"][0]
+        self.assertEqual(result[BOX_STATS["overallTs"]]["median"], trace["median"])
+        self.assertNotIn("y", trace)
@@ -0,0 +1,39 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from weather.pipeline import build_outputs
+from weather.watch import FIGURES, REPORT
+from support import STUDENTS_DIR, DATA_DIR
+
+
+class PipelineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def read(self, path):
+        with open(path, encoding='utf8') as read_file:
+            return read_file.read()
+
+    def test_one_parse_matches_each_part(self):
+        forecast = shutil.copy(os.path.join(STUDENTS_DIR, "part1", "data", "forecast_10days.json"), self.directory)
+        historical = shutil.copy(os.path.join(DATA_DIR, "historical_6hours.json"), self.directory)
+        charts = os.path.join(self.directory, "charts")
+        outputs = (REPORT, FIGURES)
+
+        written = build_outputs(forecast, outputs, charts, ["json"])
+        expected = os.path.join(STUDENTS_DIR, "part1", "tests", "expected_output", "forecast_10days_output.txt")
+        self.assertEqual(self.read(expected), self.read(written[REPORT][0]))
+        import part2
+        part2.export_forecasts([forecast], os.path.join(self.directory, "part2"), ["json"])
+        self.assertEqual(self.read(os.path.join(self.directory, "part2", "forecast_10days.json")),
+                         self.read(written[FIGURES][0]))
+
+        written = build_outputs(historical, outputs, charts, ["json"])
+        self.assertEqual(self.read(os.path.join(STUDENTS_DIR, "part3", "historical_6hours_summary.txt")),
+                         self.read(written[REPORT][0]))
+        self.assertEqual(["historical_6hours_box.json", "historical_6hours_bar.json"],
+                         [os.path.basename(path) for path in written[FIGURES]])
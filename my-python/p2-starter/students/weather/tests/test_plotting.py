@@ -0,0 +1,31 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from weather.plotting import FigureTemplate, export_figures
+
+
+class PlottingTests(unittest.TestCase):
+
+    TEMPLATE = FigureTemplate([dict(type="box", y="overallTs", name="Temperature")], "Past {File}")
+
+    def test_template_fills_in_data_and_title(self):
+        spec = self.TEMPLATE.spec({"File": "6hours", "overallTs": [1.5, 2.5]})
+        self.assertEqual([dict(type="box", y=[1.5, 2.5], name="Temperature")], spec["data"])
+        self.assertEqual({"text": "Past 6hours"}, spec["layout"]["title"])
+        self.assertEqual("overallTs", self.TEMPLATE.traces[0]["y"])
+
+    def test_export_writes_one_file_per_figure_and_format(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        figures = [(name, self.TEMPLATE.spec({"File": name, "overallTs": [1]})) for name in ("a", "b")]
+        written = export_figures(figures, directory, ("html", "json"), plotlyjs="cdn")
+        self.assertEqual(["a.html", "a.json", "b.html", "b.json"], sorted(map(os.path.basename, written)))
+        with open(os.path.join(directory, "b.json"), encoding='utf8') as read_file:
+            self.assertEqual(figures[1][1], json.loads(read_file.read()))
+        with open(os.path.join(directory, "a.html"), encoding='utf8') as read_file:
+            page = read_file.read()
+        self.assertRegex(page, r'<script src="https://cdn\.plot\.ly/plotly-\d+\.\d+\.\d+\.min\.js">')
+        with self.assertRaises(ValueError):
+            export_figures(figures, directory, ("png",))
@@ -0,0 +1,43 @@
+import io
+import json
+import os
+import unittest
+from weather.files import import_parts
+from weather.render import iter_file, render
+from support import STUDENTS_DIR, DATA_DIR
+
+
+class RenderTests(unittest.TestCase):
+
+    def test_render_joins_or_streams(self):
+        self.assertEqual("ab", render(iter(["a", "b"])))
+        write_file = io.StringIO()
+
+        def chunks():
+            yield "first\n"
+            #the first chunk is already written before the next one is made
+            self.assertEqual("first\n", write_file.getvalue())
+            yield "second\n"
+        self.assertIsNone(render(chunks(), write_file))
+        self.assertEqual("first\nsecond\n", write_file.getvalue())
+
+    def test_iter_file_reads_in_chunks(self):
+        read_file = io.StringIO("abcdefghij")
+        read_file.read(1)
+        self.assertEqual(["bcde", "fghi", "j"], list(iter_file(read_file, 4)))
+
+    def test_part3_summaries_render_the_same_text_every_way(self):
+        import_parts()
+        import part3
+        for name in ("historical_6hours", "historical_24hours_a", "historical_24hours_b"):
+            with self.subTest(name=name):
+                with open(os.path.join(STUDENTS_DIR, "part3", f"{name}_summary.txt"), encoding='utf8') as read_file:
+                    expected = read_file.read()
+                process_dict = part3.process_weather(os.path.join(DATA_DIR, f"{name}.json"))
+                chunks = list(part3.iter_summary(process_dict))
+                self.assertEqual(expected, "".join(chunks))
+                self.assertTrue(all(chunk.count("\n") == 1 and chunk.endswith("\n") for chunk in chunks))
+                self.assertEqual(expected, part3.summarise_weather(process_dict))
+                write_file = io.StringIO()
+                part3.write_summary(process_dict, write_file)
+                self.assertEqual(expected, write_file.getvalue())
@@ -0,0 +1,36 @@
+import json
+import unittest
+from weather.rolling import RollingSummary, WINDOW_6H, WINDOW_24H
+from support import load_observations, summarise
+
+
+class RollingSummaryTests(unittest.TestCase):
+
+    KEYS = ["Date", "DaylightHour", "MaxUV", "MinsGroup", "MaxGroup", "Rain24mm", "WeatherFreq"]
+
+    def test_full_window_matches_whole_file(self):
+        data = load_observations("historical_24hours_b.json")
+        rolling = RollingSummary(WINDOW_24H)
+        rolling.extend(data)
+        expected = summarise(data, "24hours")
+        result = rolling.result()
+        for key in self.KEYS:
+            self.assertEqual(expected[key], result[key], key)
+
+    def test_sliding_window_drops_old_observations(self):
+        data = load_observations("historical_24hours_b.json")
+        rolling = RollingSummary(WINDOW_6H)
+        rolling.extend(data)
+        #AccuWeather lists the newest observation first
+        expected = summarise(data[:6], "6hours")
+        result = rolling.result()
+        self.assertEqual(6, len(rolling))
+        for key in self.KEYS:
+            self.assertEqual(expected[key], result[key], key)
+
+    def test_rejects_older_observation(self):
+        data = load_observations("historical_6hours.json")
+        rolling = RollingSummary(WINDOW_6H)
+        rolling.add(data[0])
+        with self.assertRaises(ValueError):
+            rolling.add(data[1])
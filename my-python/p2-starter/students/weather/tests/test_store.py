@@ -0,0 +1,40 @@
+import json
+import os
+import unittest
+from weather.store import ObservationStore
+from support import DATA_DIR, load_observations, summarise
+
+
+class ObservationStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ObservationStore()
+        for name in ("historical_24hours_a.json", "historical_24hours_b.json"):
+            self.store.load(os.path.join(DATA_DIR, name))
+
+    def test_whole_station_matches_file_summary(self):
+        expected = summarise(load_observations("historical_24hours_a.json"), "24hours")
+        self.assertEqual(expected, self.store.summary(station="historical_24hours_a", name="24hours"))
+
+    def test_range_query(self):
+        data = load_observations("historical_24hours_b.json")
+        start, end = data[5].date, data[0].epoch + 1
+        expected = summarise(data[:6], "6hours")
+        self.assertEqual(expected, self.store.summary(start, end, "historical_24hours_b", "6hours"))
+        self.assertEqual(6, len(self.store.range(start, end, "historical_24hours_b")))
+        everywhere = self.store.range(start, end)
+        self.assertEqual(sorted(obs.epoch for obs in everywhere), [obs.epoch for obs in everywhere])
+        with self.assertRaises(KeyError):
+            self.store.range(station="nowhere")
+
+    def test_aggregate_matches_summary_over_every_range(self):
+        keys = ["Date", "DaylightHour", "MaxUV", "MinsGroup", "MaxGroup", "Rain24mm", "WeatherText", "WeatherFreq",
+                "WeatherIcon", "WeatherIconFreq", "PrecipitationType", "PrecipitationFreq"]
+        epochs = [obs.epoch for obs in self.store.range()]
+        for station in (None, "historical_24hours_a"):
+            for start in epochs[::5]:
+                for end in epochs[::7]:
+                    expected = self.store.summary(start, end, station)
+                    result = self.store.aggregate(start, end, station)
+                    for key in keys:
+                        self.assertEqual(expected[key], result[key], (station, start, end, key))
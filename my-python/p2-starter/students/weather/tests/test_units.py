@@ -0,0 +1,29 @@
+import json
+import os
+import unittest
+from weather.records import ForecastDay, iter_daily_forecasts
+from weather.table import ForecastTable
+from weather.units import LUT_MAX, LUT_MIN, convert_all_f_to_c, convert_array_f_to_c, convert_f_to_c
+from support import STUDENTS_DIR
+
+
+class UnitsTests(unittest.TestCase):
+
+    def test_every_path_matches_exact_rounding(self):
+        temps = list(range(LUT_MIN - 5, LUT_MAX + 5)) + [45.5, 50.0, -2.25, 1e6]
+        expected = [round((temp - 32) / 1.8, 1) for temp in temps]
+        self.assertEqual(expected, [convert_f_to_c(temp) for temp in temps])
+        self.assertEqual(expected, convert_all_f_to_c(temps))
+        self.assertEqual(expected, convert_array_f_to_c(temps).tolist())
+        self.assertEqual(expected[:10], convert_array_f_to_c(temps[:10]).tolist())
+
+    def test_forecast_table_columns_match_record_conversion(self):
+        path = os.path.join(STUDENTS_DIR, "part1", "data", "forecast_10days.json")
+        with open(path, encoding='utf8') as read_file:
+            days = list(iter_daily_forecasts(read_file))
+        #a fraction and a value outside the lookup table take convert_array_f_to_c's exact fallback
+        days[0]["Temperature"]["Minimum"]["Value"] = 45.5
+        days[1]["Temperature"]["Maximum"]["Value"] = LUT_MAX + 7
+        columnar = ForecastTable.from_forecasts(days)
+        scalar = ForecastTable.from_records(ForecastDay.from_json(t) for t in days)
+        self.assertEqual(scalar.to_dict(), columnar.to_dict())
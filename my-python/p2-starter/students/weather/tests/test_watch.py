@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from weather.watch import FIGURES, REPORT, Watcher
+from support import DATA_DIR
+
+
+class WatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.data = os.path.join(self.directory, "data")
+        os.makedirs(self.data)
+        for name in ("historical_6hours.json", "historical_24hours_a.json"):
+            shutil.copy(os.path.join(DATA_DIR, name), self.data)
+        self.state = os.path.join(self.directory, "state.json")
+
+    def watcher(self, **kwargs):
+        return Watcher([self.data], workers=0, state=self.state, progress=None, **kwargs)
+
+    def built(self, watcher):
+        return sorted((os.path.basename(path), task) for path, task, _, error in watcher.poll() if error is None)
+
+    def test_only_changed_files_are_rebuilt(self):
+        six = os.path.join(self.data, "historical_6hours.json")
+        watcher = self.watcher()
+        self.assertEqual([("historical_24hours_a.json", REPORT), ("historical_6hours.json", REPORT)], self.built(watcher))
+        self.assertEqual([], self.built(watcher))
+
+        #a new modification time alone does not count as a change
+        os.utime(six, ns=(0, 0))
+        self.assertEqual([], self.built(watcher))
+
+        with open(six, "a", encoding='utf8') as write_file:
+            write_file.write("\n")
+        self.assertEqual([("historical_6hours.json", REPORT)], self.built(watcher))
+
+        os.remove(os.path.join(self.data, "historical_24hours_a_summary.txt"))
+        self.assertEqual([("historical_24hours_a.json", REPORT)], self.built(watcher))
+
+    def test_state_carries_over_and_new_tasks_run(self):
+        self.built(self.watcher())
+        figures = os.path.join(self.directory, "charts")
+        watcher = self.watcher(figures=figures, formats=["json"])
+        self.assertEqual([("historical_24hours_a.json", FIGURES), ("historical_6hours.json", FIGURES)], self.built(watcher))
+        self.assertTrue(os.path.exists(os.path.join(figures, "historical_6hours_box.json")))
+        self.assertEqual([], self.built(self.watcher(figures=figures, formats=["json"])))
+
+    def test_crashed_workers_are_retried_in_a_new_pool(self):
+        class BrokenPool:
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool("a worker died"))
+                return future
+
+            def shutdown(self, wait=True):
+                pass
+
+        watcher = Watcher([self.data], workers=1, state=self.state, progress=None)
+        self.addCleanup(watcher.close)
+        broken = watcher._executor = BrokenPool()
+        results = watcher.poll()
+        self.assertEqual(2, len(results))
+        self.assertTrue(all(outputs is None and "a worker died" in error for _, _, outputs, error in results))
+        self.assertIsNot(broken, watcher._executor)
+        self.assertEqual([("historical_24hours_a.json", REPORT), ("historical_6hours.json", REPORT)], self.built(watcher))
@@ -0,0 +1,68 @@
+"""Farenheit to celcius conversion with a lookup table fast path.
+
+AccuWeather's Imperial values are almost always whole degrees in a narrow
+range, so the rounded celcius value of every whole degree from LUT_MIN to
+LUT_MAX is worked out once at import. Anything else (fractions, extremes)
+falls back to the exact arithmetic, so every path returns exactly what
+round((f - 32) / 1.8, 1) would.
+"""
+LUT_MIN = -200
+LUT_MAX = 200
+
+
+def _exact_f_to_c(temp):
+    return round((temp - 32) / 1.8, 1)
+
+
+_LUT = [_exact_f_to_c(temp) for temp in range(LUT_MIN, LUT_MAX + 1)]
+_lutArray = None
+
+
+def convert_f_to_c(temp_in_farenheit):
+    """Converts an temperature from farenheit to celcius
+
+    Args:
+        temp_in_farenheit: integer representing a temperature.
+    Returns:
+        A float representing a temperature in degrees celcius, rounded to 1 decimal place.
+    """
+    if type(temp_in_farenheit) is int and LUT_MIN <= temp_in_farenheit <= LUT_MAX:
+        return _LUT[temp_in_farenheit - LUT_MIN]
+    return _exact_f_to_c(temp_in_farenheit)
+
+
+def convert_all_f_to_c(temps_in_farenheit):
+    """Converts a sequence of temperatures from farenheit to celcius.
+
+    Args:
+        temps_in_farenheit: An iterable of temperatures in degrees farenheit.
+    Returns:
+        A list of temperatures in degrees celcius, rounded to 1 decimal place.
+    """
+    lut = _LUT
+    return [lut[temp - LUT_MIN] if type(temp) is int and LUT_MIN <= temp <= LUT_MAX else _exact_f_to_c(temp)
+            for temp in temps_in_farenheit]
+
+
+def convert_array_f_to_c(temps_in_farenheit):
+    """Converts a whole numpy array of temperatures from farenheit to celcius in one go.
+
+    Args:
+        temps_in_farenheit: An array-like of temperatures in degrees farenheit.
+    Returns:
+        A float64 numpy array of temperatures in degrees celcius, rounded to 1 decimal place.
+    """
+    global _lutArray
+    import numpy as np
+
+    if _lutArray is None:
+        _lutArray = np.array(_LUT, dtype=np.float64)
+    temps = np.asarray(temps_in_farenheit, dtype=np.float64)
+    inTable = (temps == np.floor(temps)) & (temps >= LUT_MIN) & (temps <= LUT_MAX)
+    if inTable.all():
+        return _lutArray[temps.astype(np.intp) - LUT_MIN]
+    result = np.empty(temps.shape, dtype=np.float64)
+    result[inTable] = _lutArray[temps[inTable].astype(np.intp) - LUT_MIN]
+    outside = ~inTable
+    result[outside] = [_exact_f_to_c(temp) for temp in temps[outside].tolist()]
+    return result
@@ -0,0 +1,284 @@
+"""Watches data directories and rebuilds only the outputs of files that changed.
+
+Usage, from the students directory:
+
+    python -m weather.watch part1/data part3/data --figures charts --workers 4
+
+Every --interval seconds the inputs are listed and stat'ed. A file is only
+hashed when its modification time or size moved, and only counts as changed
+when its contents did, so touching a file or copying it over itself costs
+nothing. A dependency graph records, for every input, the version it was last
+built from and the outputs each task wrote from it:
+
+    report   <name>_output.txt or <name>_summary.txt next to the input, as
+             weather.batch writes them
+    figures  the part2 or part3 charts, written to the --figures directory
+
+Only the tasks of changed inputs, and tasks whose outputs have gone missing,
+are handed to the worker pool, and every task of one input is built from a
+single parse, see weather.pipeline. With --state the graph is saved after every
+cycle, so a restarted watcher carries on where it left off instead of
+rebuilding everything. Outputs of deleted inputs are left alone.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from weather.batch import find_inputs
+from weather.cache import ParsedCache, file_signature
+from weather.files import atomic_write
+from weather.pipeline import FIGURES, REPORT, build_outputs
+
+DEFAULT_INTERVAL = 2.0
+STATE_VERSION = 1
+
+
+class DependencyGraph:
+    """Which outputs were built from which version of every input file.
+
+    Args:
+        entries: A dictionary of input path to {"signature": [mtime_ns, size,
+            digest], "outputs": {task: [output paths] or None}}, as saved by save. A task maps to None if it failed for that version.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries if entries is not None else {}
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def signature(self, path):
+        entry = self.entries.get(path)
+        return None if entry is None else entry["signature"]
+
+    def outputs(self, path):
+        """Returns every output built from path."""
+        entry = self.entries.get(path)
+        if entry is None:
+            return []
+        return [out for outs in entry["outputs"].values() if outs for out in outs]
+
+    def invalidate(self, path, signature):
+        """Forgets the outputs of path, which now has a new version."""
+        self.entries[path] = {"signature": signature, "outputs": {}}
+
+    def touch(self, path, signature):
+        """Records a new stat for path when its contents are unchanged."""
+        self.entries[path]["signature"] = signature
+
+    def record(self, path, task, outputs):
+        """Records the outputs a task built from the current version of path, None if it failed."""
+        self.entries[path]["outputs"][task] = outputs
+
+    def stale_tasks(self, path, tasks):
+        """Returns the tasks of path that have not been built, or whose outputs have gone missing."""
+        built = self.entries[path]["outputs"]
+        return [task for task in tasks
+                if task not in built or (built[task] is not None and not all(os.path.exists(out) for out in built[task]))]
+
+    def remove(self, path):
+        self.entries.pop(path, None)
+
+    def save(self, path):
+        with atomic_write(path) as write_file:
+            json.dump({"version": STATE_VERSION, "inputs": self.entries}, write_file)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a saved graph, or returns an empty one if there is none or it is out of date."""
+        try:
+            with open(path, "r", encoding='utf8') as read_file:
+                state = json.load(read_file)
+        except (OSError, ValueError):
+            return cls()
+        if state.get("version") != STATE_VERSION:
+            return cls()
+        return cls(state["inputs"])
+
+
+def build(path, tasks, figures=None, formats=("html",), cache=None):
+    """Runs the tasks of one input file from a single parse, never raising.
+
+    Args:
+        path: A string representing the file path to a JSON weather file.
+        tasks: Any of REPORT and FIGURES.
+        figures: The directory FIGURES charts are written to.
+        formats: The chart formats, any of 'html', 'json' and 'svg'.
+        cache: An optional weather.cache.ParsedCache to load the parsed data from.
+    Returns:
+        A tuple of (path, dictionary of task to list of outputs, error message
+        or None). No task has outputs if there is an error.
+    """
+    try:
+        return path, build_outputs(path, tasks, figures, formats, cache), None
+    except Exception:
+        return path, {}, traceback.format_exc(limit=3).strip()
+
+
+class Watcher:
+    """Polls input files and rebuilds the outputs of those that changed.
+
+    Args:
+        inputs: A list of file paths, directories or glob patterns, as for
+            weather.batch.find_inputs. They are listed again on every poll, so
+            new files are picked up.
+        figures: The directory to write charts to, or None to only write reports.
+        formats: The chart formats, any of 'html', 'json' and 'svg'.
+        workers: The number of worker processes, defaults to the number of
+            cores. 0 runs every task in this process.
+        cache: An optional weather.cache.ParsedCache shared by every worker.
+        state: A file to keep the dependency graph in between runs, or None.
+        progress: A text file that receives one line per task run, or None.
+    """
+
+    def __init__(self, inputs, figures=None, formats=("html",), workers=None, cache=None, state=None,
+                 progress=sys.stderr):
+        self.inputs = inputs
+        self.figures = figures
+        self.formats = tuple(formats)
+        self.workers = workers
+        self.cache = cache
+        self.state = state
+        self.progress = progress
+        self.tasks = (REPORT, FIGURES) if figures else (REPORT,)
+        self.graph = DependencyGraph.load(state) if state else DependencyGraph()
+        self._executor = None
+        self._dirty = state is not None and not os.path.exists(state)
+
+    def pending(self):
+        """Works out what needs building.
+
+        Returns:
+            A list of (path, list of tasks) tuples, in path order.
+        """
+        graph = self.graph
+        paths = find_inputs(self.inputs)
+        for path in set(graph.entries) - set(paths):
+            graph.remove(path)
+            self._dirty = True
+
+        jobs = []
+        for path in paths:
+            previous = graph.signature(path)
+            try:
+                signature = file_signature(path, previous)
+            except OSError:
+                #deleted between listing and stat, it is dropped on the next poll
+                continue
+            if previous is None or signature[2] != previous[2]:
+                graph.invalidate(path, signature)
+                jobs.append((path, list(self.tasks)))
+                continue
+            if signature is not previous:
+                graph.touch(path, signature)
+                self._dirty = True
+            stale = graph.stale_tasks(path, self.tasks)
+            if stale:
+                jobs.append((path, stale))
+        return jobs
+
+    def _results(self, jobs):
+        if self.workers == 0:
+            for path, tasks in jobs:
+                yield tasks, build(path, tasks, self.figures, self.formats, self.cache)
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = {self._executor.submit(build, path, tasks, self.figures, self.formats, self.cache): (path, tasks)
+                   for path, tasks in jobs}
+        for future in as_completed(futures):
+            path, tasks = futures[future]
+            try:
+                yield tasks, future.result()
+            except BrokenProcessPool:
+                #a worker died, taking every unfinished task with it; start a fresh pool on the next poll
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                yield tasks, (path, None, traceback.format_exc(limit=3).strip())
+
+    def poll(self):
+        """Runs one cycle, building whatever changed since the last one.
+
+        Returns:
+            A list of (path, task, outputs, error message) tuples, one per task run.
+        """
+        jobs = self.pending()
+        results = []
+        for tasks, (path, written, error) in self._results(jobs):
+            for task in tasks:
+                outputs = None if written is None else written.get(task)
+                #written is None when the worker died, leave those tasks unbuilt so the next poll retries them
+                if written is not None:
+                    self.graph.record(path, task, outputs)
+                results.append((path, task, outputs, error))
+            if self.progress is not None:
+                if error is None:
+                    status = f"-> {', '.join(out for task in tasks for out in written[task])}"
+                elif written is None:
+                    status = f"NOT BUILT, retrying on the next poll\n{error}"
+                else:
+                    status = f"FAILED\n{error}"
+                print(f"{path} [{', '.join(tasks)}] {status}", file=self.progress, flush=True)
+        if self.state and (jobs or self._dirty):
+            self.graph.save(self.state)
+            self._dirty = False
+        return results
+
+    def run(self, interval=DEFAULT_INTERVAL, cycles=None):
+        """Polls every interval seconds until interrupted, or for a number of cycles.
+
+        Args:
+            interval: The seconds to wait between the end of one poll and the next.
+            cycles: How many polls to run, None to keep going.
+        """
+        try:
+            done = 0
+            while cycles is None or done < cycles:
+                self.poll()
+                done += 1
+                if cycles is None or done < cycles:
+                    time.sleep(interval)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch weather files and rebuild only the outputs of changed ones.")
+    parser.add_argument("inputs", nargs="+", help="JSON files, directories or glob patterns")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes, 0 to run in this process (default: one per core)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between polls (default: %(default)s)")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    parser.add_argument("--figures", metavar="DIR", help="also write every file's charts to DIR")
+    parser.add_argument("--formats", default="html",
+                        help="comma separated chart formats out of html, json and svg (default: %(default)s)")
+    parser.add_argument("--state", metavar="FILE", help="keep the dependency graph in FILE between runs")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="reuse parsed files from the weather cache (default dir: $WEATHER_CACHE_DIR or ~/.cache/weather)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print each task run")
+    args = parser.parse_args(argv)
+
+    cache = None if args.cache is None else ParsedCache(args.cache or None)
+    watcher = Watcher(args.inputs, args.figures, args.formats.split(","), args.workers, cache, args.state,
+                      None if args.quiet else sys.stderr)
+    try:
+        watcher.run(args.interval, 1 if args.once else None)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())